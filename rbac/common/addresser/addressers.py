@@ -12,21 +12,45 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # -----------------------------------------------------------------------------
-"""A registry of addressers; to facilitate root level addresser functions"""
+"""A registry of addressers; to facilitate root level addresser functions
+
+An address type is determined by fixed positions in the address: the object
+type, related type and relationship type. Root level functions look up the
+addresser by that slice of the address, then validate the whole address with
+the addresser's pattern.
+"""
 from rbac.common.logs import get_default_logger
 
 LOGGER = get_default_logger(__name__)
 ADDRESSERS = {}
+ADDRESSERS_BY_TYPE_KEY = {}
+
+
+def address_type_key(address):
+    """Returns the hex characters of an address holding its object type,
+    related type and relationship type"""
+    return address[10:14] + address[38:44]
 
 
 def register_addresser(addresser):
     """Register the addresser so it can respond to root addresser methods"""
     ADDRESSERS[addresser.address_type_name] = addresser
+    ADDRESSERS_BY_TYPE_KEY.setdefault(addresser.address_type_key, addresser)
+
+
+def _lookup(address):
+    """Returns the registered addresser for the address type key of an
+    address, or None"""
+    try:
+        return ADDRESSERS_BY_TYPE_KEY.get(address_type_key(address))
+    except TypeError:
+        return None
 
 
 def get_address_type(address):
     """Returns the address type of the address from AddressSpace"""
-    for _, addresser in ADDRESSERS.items():
+    addresser = _lookup(address)
+    if addresser:
         result = addresser.get_address_type(address=address)
         if result:
             return result
@@ -39,7 +63,8 @@ def get_address_type(address):
 
 def get_addresser(address):
     """Returns addresser that handles the address type of given address"""
-    for _, addresser in ADDRESSERS.items():
+    addresser = _lookup(address)
+    if addresser:
         result = addresser.get_addresser(address=address)
         if result:
             return result
@@ -50,7 +75,8 @@ def get_addresser(address):
 
 def parse(address):
     """Parses an address into its components"""
-    for _, addresser in ADDRESSERS.items():
+    addresser = _lookup(address)
+    if addresser:
         result = addresser.parse(address=address)
         if result:
             return result
@@ -64,7 +90,8 @@ def parse_addresses(addresses):
 
 def deserialize(address, data):
     """Deserializes the container of a given an address"""
-    for _, addresser in ADDRESSERS.items():
+    addresser = _lookup(address)
+    if addresser:
         result = addresser.deserialize(address=address, data=data)
         if result:
             return result
@@ -75,7 +102,8 @@ def deserialize(address, data):
 
 def deserialize_list(address, data):
     """Deserializes the container of a given an address and returns the store list"""
-    for _, addresser in ADDRESSERS.items():
+    addresser = _lookup(address)
+    if addresser:
         result = addresser.deserialize_list(address=address, data=data)
         if result:
             return result
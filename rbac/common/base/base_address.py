@@ -119,14 +119,19 @@ class AddressBase(StateBase):
     def __init__(self):
         """The regular expression pattern of addresses matching the address scheme"""
         StateBase.__init__(self)
-        self._pattern = regex.compile(
-            r"^"
-            + family.namespace
+        self._prefix = (
+            family.namespace
             + PATTERN_ZERO_BYTE * 2
             + hex(self.object_type.value)[2:].zfill(4)
+        )
+        self._infix = hex(self.related_type.value)[2:].zfill(4) + hex(
+            self.relationship_type.value
+        )[2:].zfill(2)
+        self._pattern = regex.compile(
+            r"^"
+            + self._prefix
             + PATTERN_12_HEX_BYTES
-            + hex(self.related_type.value)[2:].zfill(4)
-            + hex(self.relationship_type.value)[2:].zfill(2)
+            + self._infix
             + PATTERN_12_HEX_BYTES
             + PATTERN_ZERO_BYTE
             + r"$"
@@ -134,17 +139,13 @@ class AddressBase(StateBase):
 
     def _address(self, object_id, related_id):
         """Makes an address using the address scheme"""
-        address = (
-            family.namespace
-            + PATTERN_ZERO_BYTE * 2
-            + hex(self.object_type.value)[2:].zfill(4)
+        return (
+            self._prefix
             + self.hash(object_id)
-            + hex(self.related_type.value)[2:].zfill(4)
-            + hex(self.relationship_type.value)[2:].zfill(2)
+            + self._infix
             + self.hash(related_id)
             + PATTERN_ZERO_BYTE
         )
-        return address
 
     def parse(self, address):
         """Returns the components of an address if the address if of the address type
@@ -204,10 +205,56 @@ class AddressBase(StateBase):
             + self.relationship_type.name
         )
 
+    @property
+    def address_type_key(self):
+        """Returns the characters that identify this address type at fixed
+        positions of an address, see addressers.address_type_key"""
+        return self._prefix[-4:] + self._infix
+
     def address(self, object_id, related_id=None):
         """Makes a blockchain address of this address type"""
         return self._address(object_id=object_id, related_id=related_id)
 
+    def addresses_bulk(self, object_ids, related_ids=None):
+        """Makes the blockchain addresses of many objects of this address type
+        in one pass, hashing each distinct id once.
+        Args:
+            object_ids:
+                list: of object ids, or a single object id shared by
+                every related id
+            related_ids:
+                list: of related ids, paired with object_ids by position
+        Returns:
+            list: of addresses
+        """
+        hashes = {}
+
+        def hashed(value):
+            if value not in hashes:
+                hashes[value] = self.hash(value)
+            return hashes[value]
+
+        if related_ids is None:
+            if isinstance(object_ids, str):
+                raise TypeError(
+                    "addresses_bulk expected a list of object_ids, got a string: {}".format(
+                        object_ids
+                    )
+                )
+            pairs = ((object_id, None) for object_id in object_ids)
+        elif isinstance(object_ids, str):
+            pairs = ((object_ids, related_id) for related_id in related_ids)
+        else:
+            pairs = zip(object_ids, related_ids)
+        return [
+            self._prefix
+            + hashed(object_id)
+            + self._infix
+            + hashed(related_id)
+            + PATTERN_ZERO_BYTE
+            for object_id, related_id in pairs
+        ]
+
     def addresses_are(self, addresses):
         """Determines if all addresses given are of the classes' address type"""
         return all([self.get_address_type(a) for a in addresses])
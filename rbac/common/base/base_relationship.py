@@ -20,6 +20,7 @@ from rbac.common import protobuf
 from rbac.common.protobuf import relationship_state_pb2
 from rbac.common.sawtooth.client_sync import ClientSync
 from rbac.common.base.base_address import AddressBase
+from rbac.common.base.base_state import class_property
 from rbac.common.logs import get_default_logger
 
 LOGGER = get_default_logger(__name__)
@@ -56,7 +57,7 @@ class BaseRelationship(AddressBase):
         """Tasks relationship state container collection name is relationships"""
         return "relationships"
 
-    @property
+    @class_property
     def _state_object(self):
         """The state object (protobuf) used by this object type
         New relationships use the generic stre relationship_state_pb2.Relationship
@@ -72,7 +73,7 @@ class BaseRelationship(AddressBase):
             getattr(protobuf, self._name_lower + "_state_pb2"), self._state_object_name
         )
 
-    @property
+    @class_property
     def _state_container(self):
         """The state container (protobuf) used by this object type
         New relationships use the generic container relationship_state_pb2.RelationshipContainer
@@ -90,14 +91,54 @@ class BaseRelationship(AddressBase):
             self._name_camel + "RelationshipContainer",
         )
 
-    def exists(self, object_id, related_id):
-        """Check the existence of a relationship record"""
-        # pylint: disable=not-callable
-        container = self._state_container()
+    def exists(self, object_id, related_id, snapshot=None):
+        """Check the existence of a relationship record
+        Args:
+            snapshot (StateSnapshot): state read at a pinned head to check
+                against, the current state if not given
+        """
+        if snapshot is not None:
+            return self.exists_many([(object_id, related_id)], snapshot)[
+                (object_id, related_id)
+            ]
         address = self.address(object_id=object_id, related_id=related_id)
         data = ClientSync().get_address(address=address)
+        return self._exists_in(data, address, object_id, related_id)
+
+    def exists_many(self, pairs, snapshot=None):
+        """Check the existence of many relationship records, reading their
+        addresses in parallel
+        Args:
+            pairs (iterable of tuple): the (object_id, related_id) to check
+            snapshot (StateSnapshot): state read at a pinned head to check
+                against, the current state if not given
+        Returns:
+            dict: whether each (object_id, related_id) exists
+        """
+        addresses = {
+            (object_id, related_id): self.address(
+                object_id=object_id, related_id=related_id
+            )
+            for object_id, related_id in pairs
+        }
+        if snapshot is not None:
+            data = snapshot.get_addresses(addresses.values())
+        else:
+            data = ClientSync().get_addresses(addresses.values())
+        return {
+            (object_id, related_id): self._exists_in(
+                data[address], address, object_id, related_id
+            )
+            for (object_id, related_id), address in addresses.items()
+        }
+
+    def _exists_in(self, data, address, object_id, related_id):
+        """Check the existence of a relationship record in the data read
+        from its address"""
+        # pylint: disable=not-callable
         if not data:
             return False
+        container = self._state_container()
         container.ParseFromString(data)
         stores = list(container.relationships)
         if not stores:
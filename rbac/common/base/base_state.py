@@ -20,6 +20,8 @@ the object is stored on the blockchain: the state and container protubufs,
 and the unique identifier name"""
 # pylint: disable=too-many-public-methods
 
+import functools
+
 from rbac.common import protobuf
 from rbac.common.crypto.hash import unique_id, hash_id
 from rbac.common.sawtooth.batcher import message_to_message
@@ -29,6 +31,24 @@ from rbac.common.logs import get_default_logger
 LOGGER = get_default_logger(__name__)
 
 
+def class_property(func):
+    """A property computed once per class: the object type names and the
+    protobuf classes derived from them don't vary between instances, and are
+    read for every address (de)serialized. Errors are not cached."""
+    values = {}
+
+    @functools.wraps(func)
+    def getter(self):
+        cls = type(self)
+        try:
+            return values[cls]
+        except KeyError:
+            value = values[cls] = func(self)
+            return value
+
+    return property(getter)
+
+
 class StateBase:
     """Base class for both the address and message base classes
     This handles common blockchain state access and manipulation"""
@@ -44,21 +64,21 @@ class StateBase:
         Default to False, override to True when plural"""
         return False
 
-    @property
+    @class_property
     def _name_upper(self):
         """The lowercase name of the object type
         Example: ObjectType.USER -> 'USER'
         """
         return self.object_type.name.upper()
 
-    @property
+    @class_property
     def _name_lower(self):
         """The lowercase name of the object type
         Example: ObjectType.USER -> 'user'
         """
         return self.object_type.name.lower()
 
-    @property
+    @class_property
     def _name_title(self):
         """The title case name of the object type
         Example: ObjectType.USER -> 'User'
@@ -71,7 +91,7 @@ class StateBase:
         Example: ROLE_ATTRIBUTE -> RoleAttribute"""
         return value.title().replace(" ", "").replace("_", "")
 
-    @property
+    @class_property
     def _name_camel(self):
         """The camel case name of the object type
         Example: ObjectType.USER -> 'User'
@@ -79,7 +99,7 @@ class StateBase:
         """
         return self._camel_case(self.object_type.name)
 
-    @property
+    @class_property
     def _name_id(self):
         """The attribute name for the object type
         Example: ObjectType.Role -> 'role_id'
@@ -93,7 +113,7 @@ class StateBase:
         """The attribute name for the related_id if not related_id"""
         return "related_id"
 
-    @property
+    @class_property
     def _name_upper_plural(self):
         """The uppercase plural name of the object type
         Example: ObjectType.USER -> 'USERS'
@@ -102,7 +122,7 @@ class StateBase:
             return self._name_upper
         return self._name_upper + "s"
 
-    @property
+    @class_property
     def _name_lower_plural(self):
         """The lowercase plural name of the object type
         Example: ObjectType.USER -> 'users'
@@ -111,7 +131,7 @@ class StateBase:
             return self._name_lower
         return self._name_lower + "s"
 
-    @property
+    @class_property
     def _name_title_plural(self):
         """The uppercase plural name of the object type
         Example: ObjectType.USER -> 'Users'
@@ -120,7 +140,7 @@ class StateBase:
             return self._name_title
         return self._name_title + "s"
 
-    @property
+    @class_property
     def _name_camel_plural(self):
         """The lowercase plural name of the object type
         Example: ObjectType.ROLE_ATTRIBUTE -> 'RoleAttributes'
@@ -129,27 +149,27 @@ class StateBase:
             return self._name_camel
         return self._name_camel + "s"
 
-    @property
+    @class_property
     def _state_object_name(self):
         """The name of the state object on the state protobuf
         The 'User' in protobuf.user_state_pb2.User
         Defaults to self._name_camel, override where differs from this norm"""
         return self._name_camel
 
-    @property
+    @class_property
     def _state_container_prefix(self):
         """The 'User' in protobuf.user_state_pb2.UserContainer
         Defaults to self._state_object_name, override where differs from this norm"""
         return self._state_object_name
 
-    @property
+    @class_property
     def _state_container_list_name(self):
         """The name of the state collection on the state container protobuf
         The 'users' in protobuf.user_state_pb2.UserContainer.users
         Defaults to self._name_lower_plural, override where differs from this norm"""
         return self._name_lower_plural
 
-    @property
+    @class_property
     def _state_object(self):
         """The state object (protobuf) used by this object type
         Derives name of the protobuf class from the object type name
@@ -171,7 +191,7 @@ class StateBase:
             getattr(protobuf, self._name_lower + "_state_pb2"), self._state_object_name
         )
 
-    @property
+    @class_property
     def _state_container(self):
         """The state container (protobuf) used by this object type
         Derives name of the protobuf class from the object type name
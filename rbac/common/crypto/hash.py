@@ -18,11 +18,13 @@ a suitable random oracle (hash collision probability = birthday problem calculat
 
 import os
 import re as regex
+from functools import lru_cache
 from hashlib import sha512
 
 PATTERN_ZERO_BYTE = r"00"
 PATTERN_12_HEX_BYTES = r"[0-9a-f]{24}"
 PATTERN_12_BYTE_HASH = regex.compile(r"^" + PATTERN_12_HEX_BYTES + r"$")
+HASH_ID_CACHE_SIZE = 16384
 
 
 def unique_id():
@@ -37,7 +39,13 @@ def hash_id(value):
     Returns zero bytes if the value is None or falsey"""
     if not value:
         return PATTERN_ZERO_BYTE * 12
-    value = str(value).lower()
+    return _hash_string(str(value).lower())
+
+
+@lru_cache(maxsize=HASH_ID_CACHE_SIZE)
+def _hash_string(value):
+    """Returns the 12-byte hash of a lowercased string, memoized as the same
+    user, role and key ids are hashed for every message that addresses them"""
     if PATTERN_12_BYTE_HASH.match(value):
         return value
     return sha512(value.encode()).hexdigest()[:24]
@@ -57,6 +57,13 @@ def deserialize_api_key(secret_key, token):
     return serializer.loads(token)
 
 
+def deserialize_api_key_with_expiry(secret_key, token):
+    """Decode the API key of a user, along with the unix time it expires"""
+    serializer = Serializer(secret_key)
+    payload, header = serializer.loads(token, return_header=True)
+    return payload, header.get("exp")
+
+
 # pylint: disable=unused-argument
 def encrypt_private_key(aes_key, next_id, private_key):
     """Encrypt the private key of a user"""
@@ -78,26 +78,22 @@ class ImportsRole(BaseMessage):
         """Makes the appropriate inputs & output addresses for the message type"""
         inputs, _ = super().make_addresses(message, signer_user_id)
 
+        inputs.add(addresser.role.address(message.role_id))
         inputs.update(
-            {addresser.role.address(message.role_id)}
-            | {addresser.role.admin.address(message.role_id, a) for a in message.admins}
-            | {addresser.role.owner.address(message.role_id, o) for o in message.owners}
-            | {
-                addresser.role.member.address(message.role_id, o)
-                for o in message.members
-            }
-            | {
-                addresser.user.address(u)
-                for u in set(message.admins) | set(message.owners)
-            }
-            | {
-                addresser.role.owner.address(message.role_id, o)
-                for o in message.deleted_owners
-            }
-            | {
-                addresser.role.member.address(message.role_id, o)
-                for o in message.deleted_members
-            }
+            addresser.role.admin.addresses_bulk(message.role_id, message.admins)
+        )
+        inputs.update(
+            addresser.role.owner.addresses_bulk(
+                message.role_id, list(message.owners) + list(message.deleted_owners)
+            )
+        )
+        inputs.update(
+            addresser.role.member.addresses_bulk(
+                message.role_id, list(message.members) + list(message.deleted_members)
+            )
+        )
+        inputs.update(
+            addresser.user.addresses_bulk(set(message.admins) | set(message.owners))
         )
 
         outputs = inputs
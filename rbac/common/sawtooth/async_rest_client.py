@@ -0,0 +1,187 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Asynchronous client of the Sawtooth REST API for use inside Sanic.
+
+Mirrors the requests of RestClient over an aiohttp session, with the same
+timeouts and the same retry policy: idempotent requests are retried on
+connection errors and RETRY_STATUSES with exponential backoff, POSTs are
+never retried.
+"""
+import asyncio
+import json
+
+import aiohttp
+from google.protobuf.message import Message as BaseMessage
+
+from rbac.common.logs import get_default_logger
+from rbac.common.sawtooth.rest_client import (
+    CliException,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BACKOFF,
+    RETRY_STATUSES,
+)
+
+LOGGER = get_default_logger(__name__)
+
+
+class AsyncRestClient:
+    """Async client of the Sawtooth REST API.
+    Args:
+        base_url (str): the REST API url
+        session (aiohttp.ClientSession): session to share, e.g. the API
+            server's HTTP_SESSION; the client opens its own if not given
+        pool_size (int): connections kept open by the client's own session
+        connect_timeout (float): seconds to wait for a connection
+        read_timeout (float): seconds to wait for a response, added to the
+            wait of requests that ask the REST API to wait
+        retries (int): retries of idempotent requests
+        retry_backoff (float): backoff factor of the retries, in seconds
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        session=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+    ):
+        self._base_url = base_url or "http://localhost:8008"
+        self._own_session = session is None
+        self._session = session or aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size)
+        )
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._retries = retries
+        self._retry_backoff = retry_backoff
+
+    async def close(self):
+        """Close the client's own session."""
+        if self._own_session:
+            await self._session.close()
+
+    async def get(self, path, **queries):
+        """GET a resource, concatenating the data of every page.
+        Returns:
+            dict: the json result, or None if the resource does not exist
+        """
+        code, json_result = await self._submit_request(
+            self._base_url + path, params=_format_queries(queries)
+        )
+        while code == 200 and "next" in json_result.get("paging", {}):
+            previous_data = json_result.get("data", [])
+            code, json_result = await self._submit_request(
+                json_result["paging"]["next"]
+            )
+            json_result["data"] = previous_data + json_result.get("data", [])
+        if code == 200:
+            return json_result
+        if code == 404:
+            return None
+        raise CliException("{}: {} {}".format(self._base_url, code, json_result))
+
+    async def post(self, path, data, **queries):
+        """POST json or bytes to the REST API.
+        Returns:
+            dict: the json result
+        """
+        if isinstance(data, bytes):
+            headers = {"Content-Type": "application/octet-stream"}
+        else:
+            data = json.dumps(data).encode()
+            headers = {"Content-Type": "application/json"}
+        code, json_result = await self._submit_request(
+            self._base_url + path,
+            params=_format_queries(queries),
+            data=data,
+            headers=headers,
+            method="POST",
+            wait=queries.get("wait"),
+        )
+        if code in (200, 201, 202):
+            return json_result
+        raise CliException("({}): {}".format(code, json_result))
+
+    async def get_leaf(self, address, head=None):
+        """Read an address of the blockchain state."""
+        return await self.get("/state/" + address, head=head)
+
+    async def get_statuses(self, batch_ids, wait=None):
+        """Fetch the committed status of a list of batch ids.
+        Returns:
+            list of dict: Dicts with 'id' and 'status' properties
+        """
+        return (await self.post("/batch_statuses", batch_ids, wait=wait))["data"]
+
+    async def send_batches(self, batch_list):
+        """Send a BatchList to the validator.
+        Returns:
+            dict: the json result
+        """
+        if isinstance(batch_list, BaseMessage):
+            batch_list = batch_list.SerializeToString()
+        return await self.post("/batches", batch_list)
+
+    async def _submit_request(
+        self, url, params=None, data=None, headers=None, method="GET", wait=None
+    ):
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self._connect_timeout,
+            sock_read=self._read_timeout + (wait or 0),
+        )
+        retries = self._retries if method == "GET" else 0
+        attempt = 0
+        while True:
+            try:
+                async with self._session.request(
+                    method,
+                    url,
+                    params=params or None,
+                    data=data,
+                    headers=headers,
+                    timeout=timeout,
+                ) as response:
+                    # read the body so the connection goes back to the pool
+                    body = await response.read()
+                    if response.status in RETRY_STATUSES and attempt < retries:
+                        raise _RetryableStatus(response.status)
+                    if response.status >= 400:
+                        return response.status, response.reason
+                    return response.status, json.loads(body.decode())
+            except (
+                aiohttp.ClientConnectionError,
+                asyncio.TimeoutError,
+                _RetryableStatus,
+            ) as err:
+                if attempt >= retries:
+                    raise CliException(
+                        'Request to "{}" failed: {!r}'.format(self._base_url, err)
+                    )
+            await asyncio.sleep(self._retry_backoff * (2 ** attempt))
+            attempt += 1
+
+
+class _RetryableStatus(Exception):
+    pass
+
+
+def _format_queries(queries):
+    return {key: str(value) for key, value in queries.items() if value is not None}
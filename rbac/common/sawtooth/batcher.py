@@ -32,6 +32,8 @@ from rbac.common.logs import get_default_logger
 
 LOGGER = get_default_logger(__name__)
 
+SIGNING_CHUNK_SIZE = 64
+
 
 def get_message_type_name(message_type):
     """ Gets the name of the message type (from the protobuf enum)
@@ -42,7 +44,15 @@ def get_message_type_name(message_type):
 def make_transaction_header(payload, signer_keypair):
     """ Make the signed transaction header for a payload
     """
-    header = transaction_pb2.TransactionHeader(
+    header = _make_transaction_header(payload=payload, signer_keypair=signer_keypair)
+    signature = signer_keypair.sign(header.SerializeToString())
+    return header, signature
+
+
+def _make_transaction_header(payload, signer_keypair):
+    """ Make the unsigned transaction header for a payload
+    """
+    return transaction_pb2.TransactionHeader(
         inputs=payload.inputs,
         outputs=payload.outputs,
         batcher_public_key=signer_keypair.public_key,
@@ -54,9 +64,6 @@ def make_transaction_header(payload, signer_keypair):
         payload_sha512=sha512(payload.SerializeToString()).hexdigest(),
     )
 
-    signature = signer_keypair.sign(header.SerializeToString())
-    return header, signature
-
 
 def make_payload(
     message, message_type, inputs, outputs, signer_user_id, signer_public_key
@@ -92,6 +99,67 @@ def make_transaction(payload, signer_keypair):
     )
 
 
+def sign_headers(private_key, headers):
+    """ Sign serialized headers with a private key. Runs in the worker
+    processes of make_transactions_parallel, so takes the private key as a
+    hex string rather than a Key.
+    """
+    signer = Key(private_key=private_key)
+    return [signer.sign(header) for header in headers]
+
+
+def make_transactions_parallel(
+    payloads, signer_keypair, executor=None, chunk_size=SIGNING_CHUNK_SIZE
+):
+    """ Make transactions from many payloads, signing their headers in
+    chunks of chunk_size on a process pool executor. Signs serially when
+    no executor is given or there is only a single chunk.
+    Args:
+        payloads:
+            list: of RBACPayload
+        signer_keypair:
+            Key: the key to sign the transactions with
+        executor:
+            concurrent.futures.ProcessPoolExecutor: pool to sign on
+        chunk_size:
+            int: number of headers sent to a worker process at once
+    Returns:
+        list: of transactions, in the order of the payloads
+    """
+    payloads = list(payloads)
+    headers = [
+        _make_transaction_header(
+            payload=payload, signer_keypair=signer_keypair
+        ).SerializeToString()
+        for payload in payloads
+    ]
+    if executor is None or len(headers) <= chunk_size:
+        signatures = [signer_keypair.sign(header) for header in headers]
+    else:
+        chunks = [
+            headers[start : start + chunk_size]
+            for start in range(0, len(headers), chunk_size)
+        ]
+        signatures = list(
+            itertools.chain.from_iterable(
+                executor.map(
+                    sign_headers,
+                    itertools.repeat(signer_keypair.private_key, len(chunks)),
+                    chunks,
+                )
+            )
+        )
+
+    return [
+        transaction_pb2.Transaction(
+            payload=payload.SerializeToString(),
+            header=header,
+            header_signature=signature,
+        )
+        for payload, header, signature in zip(payloads, headers, signatures)
+    ]
+
+
 def make_batch(transaction, signer_keypair):
     """ Batch a transaction
     """
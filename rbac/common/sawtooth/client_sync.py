@@ -14,7 +14,9 @@
 # -----------------------------------------------------------------------------
 """Sawtooth REST API client wrapper"""
 
+import time
 from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
 from rbac.common.sawtooth.rest_client import RestClient
 from rbac.common.sawtooth.rest_client import BaseMessage
 from rbac.common.sawtooth.batcher import get_batch_ids
@@ -24,7 +26,16 @@ from rbac.common.logs import get_default_logger
 LOGGER = get_default_logger(__name__)
 
 VALIDATOR_REST_ENDPOINT = get_config("VALIDATOR_REST_ENDPOINT")
-_CLIENT = RestClient(base_url=VALIDATOR_REST_ENDPOINT)
+POOL_SIZE = int(get_config("REST_CLIENT_POOL_SIZE"))
+STATE_SNAPSHOT_TTL = int(get_config("STATE_SNAPSHOT_TTL")) / 1000
+_CLIENT = RestClient(
+    base_url=VALIDATOR_REST_ENDPOINT,
+    pool_size=POOL_SIZE,
+    connect_timeout=int(get_config("REST_CLIENT_CONNECT_TIMEOUT")) / 1000,
+    read_timeout=int(get_config("REST_CLIENT_READ_TIMEOUT")) / 1000,
+    retries=int(get_config("REST_CLIENT_RETRIES")),
+    retry_backoff=int(get_config("REST_CLIENT_RETRY_BACKOFF")) / 1000,
+)
 
 
 class ClientSync:
@@ -56,6 +67,29 @@ class ClientSync:
             return None
         return b64decode(leaf["data"])
 
+    def get_addresses(self, addresses, head=None):
+        """Reads addresses of the blockchain state in parallel over the
+        client's connection pool
+        Args:
+            addresses (iterable of str): the addresses to read
+            head (str): the block id to read the state at, the chain head
+                if not given
+        Returns:
+            dict: the data of each address, None where it is not set
+        """
+        addresses = list(set(addresses))
+        if len(addresses) < 2:
+            return {
+                address: self.get_address(address, head=head) for address in addresses
+            }
+        with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(addresses))) as pool:
+            data = pool.map(lambda address: self.get_address(address, head), addresses)
+            return dict(zip(addresses, data))
+
+    def get_head(self):
+        """Gets the id of the chain head block"""
+        return self._client.get_head()
+
     def list_blocks(self, limit=None):
         """Return a block generator.
         Args:
@@ -95,6 +129,30 @@ class ClientSync:
         """Lists the state of a given address prefix"""
         return self._client.get("/state", address=subtree, head=head)
 
+    def iter_state(self, subtree=None, head=None, limit=None, prefetch=0):
+        """Streams the state entries of a given address prefix, holding one
+        page in memory at a time.
+        Args:
+            subtree (str): the address prefix
+            head (str): the block id to read the state at, the chain head
+                if not given
+            limit (int): the page size of requests
+            prefetch (int): pages fetched ahead on a thread, none if 0
+        """
+        return self._client.iter_state(subtree, head, limit, prefetch)
+
+    def iter_blocks(self, limit=None, prefetch=0):
+        """Streams the blocks, newest first, see iter_state"""
+        return self._client.iter_blocks(limit, prefetch)
+
+    def iter_batches(self, limit=None, prefetch=0):
+        """Streams the batches, see iter_state"""
+        return self._client.iter_batches(limit, prefetch)
+
+    def iter_transactions(self, limit=None, prefetch=0):
+        """Streams the transactions, see iter_state"""
+        return self._client.iter_transactions(limit, prefetch)
+
     def get_leaf(self, address, head=None):
         """Gets an address leaf"""
         return self._client.get("/state/" + address, head=head)
@@ -121,3 +179,42 @@ class ClientSync:
         if isinstance(batch_list, BaseMessage):
             batch_list = batch_list.SerializeToString()
         return self._client.post("/batches", batch_list)
+
+
+class StateSnapshot:
+    """Addresses of the blockchain state read at one chain head and kept
+    for a short while, so repeated checks within a request read the REST API
+    once per address. Once the ttl has passed, the head is read again and
+    the addresses are forgotten.
+    Args:
+        ttl (float): seconds the head and the addresses are kept
+        client (ClientSync): the client reading the state
+    """
+
+    def __init__(self, ttl=STATE_SNAPSHOT_TTL, client=None):
+        self._ttl = ttl
+        self._client = client or ClientSync()
+        self._head = None
+        self._expires = 0
+        self._data = {}
+
+    @property
+    def head(self):
+        """The block id the addresses are read at"""
+        if self._head is None or time.monotonic() >= self._expires:
+            self._head = self._client.get_head()
+            self._expires = time.monotonic() + self._ttl
+            self._data = {}
+        return self._head
+
+    def get_addresses(self, addresses):
+        """Reads the addresses not yet read at the head
+        Returns:
+            dict: the data of each address, None where it is not set
+        """
+        addresses = list(addresses)
+        head = self.head
+        missing = [address for address in addresses if address not in self._data]
+        if missing:
+            self._data.update(self._client.get_addresses(missing, head=head))
+        return {address: self._data[address] for address in addresses}
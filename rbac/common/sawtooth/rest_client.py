@@ -17,15 +17,29 @@
 # original source: https://github.com/hyperledger/sawtooth-core/blob/master/cli/sawtooth_cli/rest_client.py
 
 import json
+import queue
+import threading
 from base64 import b64encode
 from http.client import RemoteDisconnected
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from google.protobuf.message import Message as BaseMessage
 from rbac.common.logs import get_default_logger
 
 LOGGER = get_default_logger(__name__)
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+# responses of a REST API that is restarting or overloaded
+RETRY_STATUSES = (502, 503, 504)
+# seconds a prefetch thread waits on a full queue before checking it was stopped
+PREFETCH_POLL = 0.1
+
 
 class CliException(Exception):
     pass
@@ -35,9 +49,61 @@ class RestClientException(Exception):
     pass
 
 
+def make_session(
+    pool_size=DEFAULT_POOL_SIZE,
+    retries=DEFAULT_RETRIES,
+    retry_backoff=DEFAULT_RETRY_BACKOFF,
+):
+    """Create a keep-alive session holding up to pool_size connections per
+    host. Idempotent requests are retried on connection errors and on
+    RETRY_STATUSES, backing off exponentially by retry_backoff seconds; POSTs
+    are never retried.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=retry_backoff,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class RestClient:
-    def __init__(self, base_url=None, user=None):
+    """Client of the Sawtooth REST API over a pooled keep-alive session.
+    Args:
+        base_url (str): the REST API url
+        user (str): "user:password" for basic auth, if any
+        pool_size (int): connections kept open to the REST API
+        connect_timeout (float): seconds to wait for a connection
+        read_timeout (float): seconds to wait for a response, added to the
+            wait of requests that ask the REST API to wait
+        retries (int): retries of idempotent requests
+        retry_backoff (float): backoff factor of the retries, in seconds
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        user=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+    ):
         self._base_url = base_url or "http://localhost:8008"
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._session = make_session(pool_size, retries, retry_backoff)
 
         if user:
             b64_string = b64encode(user.encode()).decode()
@@ -45,6 +111,10 @@ class RestClient:
         else:
             self._auth_header = None
 
+    def close(self):
+        """Close the pooled connections."""
+        self._session.close()
+
     def list_blocks(self, limit=None):
         """Return a block generator.
         Args:
@@ -52,6 +122,30 @@ class RestClient:
         """
         return self._get_data("/blocks", limit=limit)
 
+    def iter_blocks(self, limit=None, prefetch=0):
+        """Stream the blocks, newest first, one page in memory at a time.
+        Args:
+            limit (int): The page size of requests
+            prefetch (int): pages fetched ahead on a thread, none if 0
+        """
+        return self._get_data("/blocks", prefetch=prefetch, limit=limit)
+
+    def iter_batches(self, limit=None, prefetch=0):
+        """Stream the batches, see iter_blocks."""
+        return self._get_data("/batches", prefetch=prefetch, limit=limit)
+
+    def iter_transactions(self, limit=None, prefetch=0):
+        """Stream the transactions, see iter_blocks."""
+        return self._get_data("/transactions", prefetch=prefetch, limit=limit)
+
+    def iter_state(self, subtree=None, head=None, limit=None, prefetch=0):
+        """Stream the state entries under an address prefix, see iter_blocks.
+        Every page is read at the head of the first one.
+        """
+        return self._get_data(
+            "/state", prefetch=prefetch, address=subtree, head=head, limit=limit
+        )
+
     def get_block(self, block_id):
         return self._get("/blocks/" + block_id)["data"]
 
@@ -79,6 +173,11 @@ class RestClient:
     def get_leaf(self, address, head=None):
         return self._get("/state/" + address, head=head)
 
+    def get_head(self):
+        """Return the id of the chain head block, reading a single page"""
+        pages = self._get_pages(self._base_url + "/blocks", {"limit": 1})
+        return next(pages)["head"]
+
     def get_statuses(self, batch_ids, wait=None):
         """Fetches the committed status for a list of batch ids.
         Args:
@@ -109,10 +208,13 @@ class RestClient:
         )
 
         # concat any additional pages of data
+        data = None
         while code == 200 and "next" in json_result.get("paging", {}):
-            previous_data = json_result.get("data", [])
+            if data is None:
+                data = json_result.get("data", [])
             code, json_result = self._submit_request(json_result["paging"]["next"])
-            json_result["data"] = previous_data + json_result.get("data", [])
+            data.extend(json_result.get("data", []))
+            json_result["data"] = data
 
         if code == 200:
             return json_result
@@ -121,17 +223,23 @@ class RestClient:
 
         raise CliException("{}: {} {}".format(self._base_url, code, json_result))
 
-    def _get_data(self, path, **queries):
-        url = self._base_url + path
-        params = self._format_queries(queries)
+    def _get_data(self, path, prefetch=0, **queries):
+        pages = self._get_pages(self._base_url + path, self._format_queries(queries))
+        if prefetch:
+            pages = _prefetch(pages, prefetch)
+        for json_result in pages:
+            for item in json_result.get("data", []):
+                yield item
 
+    def _get_pages(self, url, params):
+        """Yield the pages of a resource, following the paging links"""
         while url:
             code, json_result = self._submit_request(url, params=params)
 
             if code == 404:
                 raise CliException(
                     '{}: There is no resource with the identifier "{}"'.format(
-                        self._base_url, path.split("/")[-1]
+                        self._base_url, url.split("?")[0].split("/")[-1]
                     )
                 )
             elif code != 200:
@@ -139,10 +247,11 @@ class RestClient:
                     "{}: {} {}".format(self._base_url, code, json_result)
                 )
 
-            for item in json_result.get("data", []):
-                yield item
+            yield json_result
 
-            url = json_result["paging"].get("next", None)
+            # the next link carries the queries, and the head of the first page
+            url = json_result.get("paging", {}).get("next", None)
+            params = None
 
     def _post(self, path, data, **queries):
         if isinstance(data, bytes):
@@ -158,6 +267,7 @@ class RestClient:
             data=data,
             headers=headers,
             method="POST",
+            wait=queries.get("wait"),
         )
 
         if code in (200, 201, 202):
@@ -165,7 +275,9 @@ class RestClient:
 
         raise CliException("({}): {}".format(code, json_result))
 
-    def _submit_request(self, url, params=None, data=None, headers=None, method="GET"):
+    def _submit_request(
+        self, url, params=None, data=None, headers=None, method="GET", wait=None
+    ):
         """Submits the given request, and handles the errors appropriately.
         Args:
             url (str): the request to send.
@@ -173,6 +285,7 @@ class RestClient:
             data (bytes): the data to include in the request.
             headers (dict): the headers to include in the request.
             method (str): the method to use for the request, "POST" or "GET".
+            wait (int): seconds the REST API is asked to wait before responding
         Returns:
             tuple of (int, str): The response status code and the json parsed
                 body, or the error message.
@@ -185,11 +298,16 @@ class RestClient:
         if self._auth_header is not None:
             headers["Authorization"] = self._auth_header
 
+        timeout = (self._connect_timeout, self._read_timeout + (wait or 0))
         try:
             if method == "POST":
-                result = requests.post(url, params=params, data=data, headers=headers)
+                result = self._session.post(
+                    url, params=params, data=data, headers=headers, timeout=timeout
+                )
             elif method == "GET":
-                result = requests.get(url, params=params, data=data, headers=headers)
+                result = self._session.get(
+                    url, params=params, data=data, headers=headers, timeout=timeout
+                )
             result.raise_for_status()
             return (result.status_code, result.json())
         except requests.exceptions.HTTPError as e:
@@ -204,6 +322,10 @@ class RestClient:
                     self._base_url
                 )
             )
+        except requests.exceptions.Timeout as e:
+            raise CliException(
+                'Timed out waiting for "{}": {}'.format(self._base_url, e)
+            )
 
     def get(self, *args, **kwargs):
         return self._get(*args, **kwargs)
@@ -218,3 +340,44 @@ class RestClient:
     def _format_queries(queries):
         queries = {k: v for k, v in queries.items() if v is not None}
         return queries if queries else ""
+
+
+def _prefetch(pages, count):
+    """Iterate pages fetched up to count pages ahead on a thread. The thread
+    stops when the iteration ends or is abandoned.
+    """
+    fetched = queue.Queue(maxsize=count)
+    stopped = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                fetched.put(item, timeout=PREFETCH_POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+        except Exception as err:  # pylint: disable=broad-except
+            put(err)
+            return
+        put(end)
+
+    thread = threading.Thread(target=fetch, name="rest-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            page = fetched.get()
+            if page is end:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stopped.set()
@@ -14,15 +14,21 @@
 # -----------------------------------------------------------------------------
 """ Handle state changes
 """
+import sys
+from collections import Counter
+
 import rethinkdb as r
-from rbac.common import addresser
 from rbac.common.logs import get_default_logger
-from rbac.ledger_sync.deltas.decoding import data_to_dicts
-from rbac.ledger_sync.deltas.updating import get_updater
-from rbac.ledger_sync.deltas.removing import get_remover
+from rbac.ledger_sync.deltas.bulk import bulk_update_database
+from rbac.ledger_sync.deltas.decoding import TABLE_NAMES
 
 LOGGER = get_default_logger(__name__)
 
+# the state tables, whose rows carry the block numbers they were valid for
+FORK_TABLES = sorted(set(TABLE_NAMES.values()))
+# end_block_num of rows that have not been ended
+OPEN_BLOCK_NUM = int(sys.maxsize)
+
 
 def get_delta_handler(conn):
     """Returns a delta handler with a reference to a specific Database object.
@@ -36,15 +42,7 @@ def update_database(conn, state_change):
     parses the change in the delta,
     and writes the changes to the database.
     """
-    update = get_updater(conn, state_change.block_num)
-    remove = get_remover(conn)
-    for change in state_change.state_changes:
-        if addresser.family.is_family(change.address):
-            if not change.value:
-                remove(change.address)
-            else:
-                resource = data_to_dicts(change.address, change.value)[0]
-                update(change.address, resource)
+    bulk_update_database(conn, state_change)
 
 
 def _handle_state_changes(conn, state_change):
@@ -92,29 +90,41 @@ def _handle_state_changes(conn, state_change):
 
 
 def drop_fork(conn, block_num):
-    """Deletes all resources from a particular block_num
+    """Deletes all resources from a particular block_num. Each state table
+    is rolled back with one query over its block number indexes.
     """
-    block_results = (
-        r.table("blocks")
-        .filter(lambda rsc: rsc["block_num"].ge(block_num))
-        .delete()
-        .run(conn)
-    )
+    results = [drop_blocks_query(block_num).run(conn)]
+    for table in FORK_TABLES:
+        results.extend(rollback_query(table, block_num).run(conn))
+    return sum_write_results(results)
 
-    resource_results = (
-        r.table_list()
-        .for_each(
-            lambda table_name: r.branch(
-                r.eq(table_name, "blocks"),
-                [],
-                r.eq(table_name, "auth"),
-                [],
-                r.table(table_name)
-                .filter(lambda rsc: rsc["start_block_num"].ge(block_num))
-                .delete(),
-            )
-        )
-        .run(conn)
+
+def drop_blocks_query(block_num):
+    """ReQL: delete the blocks from block_num on."""
+    return r.table("blocks").between(block_num, r.maxval).delete()
+
+
+def rollback_query(table, block_num):
+    """ReQL: delete the rows of a state table started at or after block_num
+    and reopen the rows ended at or after it, returning both write results.
+    """
+    return r.expr(
+        [
+            r.table(table)
+            .between(block_num, r.maxval, index="start_block_num")
+            .delete(),
+            r.table(table)
+            .between(block_num, OPEN_BLOCK_NUM, index="end_block_num")
+            .update({"end_block_num": OPEN_BLOCK_NUM}),
+        ]
     )
 
-    return {k: v + resource_results[k] for k, v in block_results.items()}
+
+def sum_write_results(results):
+    """Add up the counts of RethinkDB write results."""
+    total = Counter()
+    for result in results:
+        total.update(
+            {key: value for key, value in result.items() if isinstance(value, int)}
+        )
+    return dict(total)
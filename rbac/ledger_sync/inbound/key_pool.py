@@ -0,0 +1,143 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+""" Pool of generated key pairs for the inbound listener.
+
+Every inbound record is signed with a new key pair whose private key is
+stored AES-encrypted. A background thread keeps up to size pairs generated
+and encrypted ahead of time, mostly while the listener waits on the
+database and the validator. When the pool is empty a pair is generated
+inline, as it was before the pool.
+"""
+import collections
+import os
+import queue
+import threading
+
+from rbac.common.config import get_config
+from rbac.common.crypto.keys import Key
+from rbac.common.crypto.secrets import encrypt_private_key
+from rbac.common.logs import get_default_logger
+
+LOGGER = get_default_logger(__name__)
+
+AES_KEY = os.getenv("AES_KEY")
+KEY_POOL_SIZE = int(get_config("KEY_POOL_SIZE"))
+STOP_CHECK_INTERVAL = 1
+
+KeyPair = collections.namedtuple("KeyPair", ["key", "encrypted_private_key"])
+
+_POOL = None
+
+
+def make_key_pair(aes_key=None):
+    """Generate a key pair and encrypt its private key."""
+    key = Key()
+    encrypted_private_key = encrypt_private_key(
+        aes_key or AES_KEY, key.public_key, key.private_key_bytes
+    )
+    return KeyPair(key, encrypted_private_key)
+
+
+class KeyPool:
+    """ Key pairs generated ahead of time by a refill thread.
+
+    Args:
+        size:
+            int: number of key pairs kept ready
+        aes_key:
+            str: hex AES key the private keys are encrypted with
+    """
+
+    def __init__(self, size=KEY_POOL_SIZE, aes_key=None):
+        self.size = size
+        self.aes_key = aes_key or AES_KEY
+        self._pairs = queue.Queue(maxsize=max(size, 1))
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = collections.Counter()
+
+    def start(self):
+        """Start the refill thread."""
+        if self._thread is None and self.size > 0:
+            self._thread = threading.Thread(
+                target=self._refill, name="key-pool", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def take(self):
+        """Return a pooled key pair, or one generated inline if none is ready."""
+        try:
+            pair = self._pairs.get_nowait()
+            self._stats["hits"] += 1
+            return pair
+        except queue.Empty:
+            self._stats["misses"] += 1
+            return make_key_pair(self.aes_key)
+
+    def close(self):
+        """Stop the refill thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def metrics(self):
+        """Return a snapshot of pool counters."""
+        return {
+            "depth": self._pairs.qsize(),
+            "size": self.size,
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+        }
+
+    def _refill(self):
+        pair = None
+        while not self._stop.is_set():
+            if pair is None:
+                pair = make_key_pair(self.aes_key)
+            try:
+                self._pairs.put(pair, timeout=STOP_CHECK_INTERVAL)
+                pair = None
+            except queue.Full:
+                pass
+
+
+def open_pool(**kwargs):
+    """Create and start the key pool of this process, closing any earlier one."""
+    global _POOL  # pylint: disable=global-statement
+    close_pool()
+    _POOL = KeyPool(**kwargs).start()
+    return _POOL
+
+
+def close_pool():
+    """Stop the key pool of this process."""
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        _POOL.close()
+        _POOL = None
+
+
+def take_key_pair():
+    """Return a key pair from the pool, or a new one if no pool is open."""
+    if _POOL is None:
+        return make_key_pair()
+    return _POOL.take()
+
+
+def get_pool():
+    """Return the key pool of this process, or None if not opened."""
+    return _POOL
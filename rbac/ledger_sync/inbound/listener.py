@@ -14,92 +14,293 @@
 # ------------------------------------------------------------------------------
 """ Sawtooth Inbound Transaction Queue Listener
 """
+import collections
+import time
+
 import rethinkdb as r
 
 from sawtooth_sdk.protobuf import batch_pb2
+from rbac.common.config import get_config
 from rbac.common.logs import get_default_logger
 from rbac.common.sawtooth.client_sync import ClientSync
-from rbac.common.sawtooth.batcher import batch_to_list
+from rbac.ledger_sync.inbound import key_pool
 from rbac.ledger_sync.inbound.rbac_transactions import add_transaction
+from rbac.ledger_sync.inbound.remote_ids import RemoteIdCache, resolve_remote_ids
 from rbac.providers.common.db_queries import connect_to_db
 
 LOGGER = get_default_logger(__name__)
 
+INBOUND_BATCH_SIZE = int(get_config("INBOUND_BATCH_SIZE"))
+INBOUND_MAX_IN_FLIGHT = int(get_config("INBOUND_MAX_IN_FLIGHT"))
+STATUS_WAIT = 10
+STATUS_RETRY_DELAY = 1
+FEED_IDLE_WAIT = 1
+
 
-def process(rec, conn):
-    """ Process inbound queue records
+def prepare(rec, conn, remote_ids=None):
+    """ Build the batch for an inbound queue record. Records that produce
+    no batch are moved to sync_errors.
+    Args:
+        rec:
+            dict: the inbound queue record
+        conn:
+            obj: RethinkDB connection object
+        remote_ids:
+            RemoteIdCache: remote id to next_id mappings of the sync run
+    Returns:
+        batch_pb2.Batch: the record's batch, or None
     """
-    try:
-        # Changes members from distinguished name to next_id for roles
-        if "members" in rec["data"]:
-            rec = translate_field_to_next(rec, "members")
-        if "owners" in rec["data"]:
-            rec = translate_field_to_next(rec, "owners")
-
-        add_transaction(rec)
-        if "batch" not in rec or not rec["batch"]:
-            r.table("inbound_queue").get(rec["id"]).delete().run(conn)
-            rec["sync_direction"] = "inbound"
-            r.table("sync_errors").insert(rec).run(conn)
-            return
+    # Changes members from distinguished name to next_id for roles
+    if "members" in rec["data"]:
+        rec = translate_field_to_next(rec, "members", conn, remote_ids)
+    if "owners" in rec["data"]:
+        rec = translate_field_to_next(rec, "owners", conn, remote_ids)
 
-        batch = batch_pb2.Batch()
-        batch.ParseFromString(rec["batch"])
-        batch_list = batch_to_list(batch=batch)
-        client = ClientSync()
-        status = client.send_batches_get_status(batch_list=batch_list)
-        while status[0]["status"] == "PENDING":
-            LOGGER.info("Batch status is %s", status)
-            status = client.status_recheck(batch_list)
-        if status[0]["status"] == "COMMITTED":
-            if rec["data_type"] == "user":
-                insert_to_user_mapping(rec)
-            if "metadata" in rec and rec["metadata"]:
-                data = {
-                    "address": rec["address"],
-                    "object_type": rec["object_type"],
-                    "object_id": rec["object_id"],
-                    "provider_id": rec["provider_id"],
-                    "created_at": r.now(),
-                    "updated_at": r.now(),
-                    **rec["metadata"],
-                }
-
-                query = (
-                    r.table("metadata")
-                    .get(rec["address"])
-                    .replace(
-                        lambda doc: r.branch(
-                            # pylint: disable=singleton-comparison
-                            (doc == None),  # noqa
-                            r.expr(data),
-                            doc.merge(
-                                {"metadata": rec["metadata"], "updated_at": r.now()}
-                            ),
-                        )
+    add_transaction(rec)
+    if "batch" not in rec or not rec["batch"]:
+        r.table("inbound_queue").get(rec["id"]).delete().run(conn)
+        rec["sync_direction"] = "inbound"
+        r.table("sync_errors").insert(rec).run(conn)
+        return None
+
+    batch = batch_pb2.Batch()
+    batch.ParseFromString(rec["batch"])
+    return batch
+
+
+def record_status(rec, status, conn):
+    """ Record the final status of an inbound record's batch in changelog
+    or sync_errors and remove the record from the inbound queue.
+    Args:
+        rec:
+            dict: the inbound queue record
+        status:
+            dict: the batch status returned by the REST API
+        conn:
+            obj: RethinkDB connection object
+    """
+    if status["status"] == "COMMITTED":
+        if rec["data_type"] == "user":
+            insert_to_user_mapping(rec)
+        if "metadata" in rec and rec["metadata"]:
+            data = {
+                "address": rec["address"],
+                "object_type": rec["object_type"],
+                "object_id": rec["object_id"],
+                "provider_id": rec["provider_id"],
+                "created_at": r.now(),
+                "updated_at": r.now(),
+                **rec["metadata"],
+            }
+
+            query = (
+                r.table("metadata")
+                .get(rec["address"])
+                .replace(
+                    lambda doc: r.branch(
+                        # pylint: disable=singleton-comparison
+                        (doc == None),  # noqa
+                        r.expr(data),
+                        doc.merge({"metadata": rec["metadata"], "updated_at": r.now()}),
                     )
                 )
-                result = query.run(conn)
-                if (not result["inserted"] and not result["replaced"]) or result[
-                    "errors"
-                ] > 0:
-                    LOGGER.warning(
-                        "error updating metadata record:\n%s\n%s", result, query
-                    )
-            rec["sync_direction"] = "inbound"
-            r.table("changelog").insert(rec).run(conn)
-            r.table("inbound_queue").get(rec["id"]).delete().run(conn)
-        else:
-            rec["error"] = get_status_error(status)
-            rec["sync_direction"] = "inbound"
-            r.table("sync_errors").insert(rec).run(conn)
-            r.table("inbound_queue").get(rec["id"]).delete().run(conn)
+            )
+            result = query.run(conn)
+            if (not result["inserted"] and not result["replaced"]) or result[
+                "errors"
+            ] > 0:
+                LOGGER.warning("error updating metadata record:\n%s\n%s", result, query)
+        rec["sync_direction"] = "inbound"
+        r.table("changelog").insert(rec).run(conn)
+        r.table("inbound_queue").get(rec["id"]).delete().run(conn)
+    else:
+        record_error(rec, get_status_error([status]), conn)
 
-    except Exception as err:  # pylint: disable=broad-except
-        LOGGER.exception(
-            "%s exception processing inbound record:\n%s", type(err).__name__, rec
+
+def record_error(rec, error, conn):
+    """ Move an inbound record that could not be committed to sync_errors.
+    """
+    rec["error"] = error
+    rec["sync_direction"] = "inbound"
+    r.table("sync_errors").insert(rec).run(conn)
+    r.table("inbound_queue").get(rec["id"]).delete().run(conn)
+
+
+class InboundPipeline:
+    """ Packs the batches of inbound queue records into multi-batch
+    BatchLists of up to batch_size batches, and keeps up to max_in_flight
+    BatchLists submitted at once. Each record is written to changelog or
+    sync_errors and removed from the queue as its own batch status arrives.
+
+    A record that reads a user or group still in flight (the same remote_id,
+    or a group member or owner) waits for it to resolve first, so users are
+    committed and mapped before the groups that reference them are built.
+    """
+
+    def __init__(
+        self,
+        conn,
+        batch_size=INBOUND_BATCH_SIZE,
+        max_in_flight=INBOUND_MAX_IN_FLIGHT,
+        client=None,
+        remote_id_cache=None,
+    ):
+        self._conn = conn
+        self._batch_size = max(batch_size, 1)
+        self._max_in_flight = max(max_in_flight, 1)
+        self._client = client or ClientSync()
+        self._queued = []
+        self._in_flight = collections.OrderedDict()
+        self._batch_lists = collections.deque()
+        self._remote_ids = collections.Counter()
+        self.remote_id_cache = (
+            remote_id_cache if remote_id_cache is not None else RemoteIdCache()
         )
-        LOGGER.exception(err)
+
+    @property
+    def pending(self):
+        """Number of records queued or in flight."""
+        return len(self._queued) + len(self._in_flight)
+
+    def submit(self, rec):
+        """ Add an inbound queue record to the pipeline.
+        """
+        try:
+            if any(self._remote_ids[key] for key in get_dependencies(rec)):
+                self.flush()
+            if rec["data_type"] == "user_deleted":
+                self.remote_id_cache.discard(rec["data"].get("remote_id"))
+            batch = prepare(rec, self._conn, remote_ids=self.remote_id_cache)
+            if batch is None:
+                return
+            self._queued.append((rec, batch))
+            self._remote_ids[get_remote_key(rec)] += 1
+            if len(self._queued) >= self._batch_size:
+                self.send()
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.exception(
+                "%s exception processing inbound record:\n%s", type(err).__name__, rec
+            )
+            LOGGER.exception(err)
+
+    def send(self):
+        """ Submit the queued batches as one BatchList, first waiting for
+        an earlier BatchList to resolve if max_in_flight are outstanding.
+        """
+        if not self._queued:
+            return
+        while len(self._batch_lists) >= self._max_in_flight:
+            self.poll(wait=STATUS_WAIT)
+        queued, self._queued = self._queued, []
+        try:
+            self._client.send_batches(
+                batch_pb2.BatchList(batches=[batch for _, batch in queued])
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            if len(queued) == 1:
+                self._resolve_error(
+                    queued[0][0], "Unable to submit batch: {}".format(err)
+                )
+                return
+            # Retry one batch at a time so an invalid batch can't fail the rest
+            LOGGER.warning("Unable to submit batch list, retrying batches: %s", err)
+            for entry in queued:
+                self._queued = [entry]
+                self.send()
+            return
+        for rec, batch in queued:
+            self._in_flight[batch.header_signature] = rec
+        self._batch_lists.append(tuple(batch.header_signature for _, batch in queued))
+
+    def poll(self, wait=None):
+        """ Fetch the statuses of the batches in flight and resolve every
+        record whose batch is no longer pending.
+        Args:
+            wait:
+                int: seconds to wait for the oldest BatchList to commit
+        """
+        if not self._in_flight:
+            return
+        if wait:
+            batch_ids = list(self._batch_lists[0])
+        else:
+            batch_ids = list(self._in_flight)
+        try:
+            statuses = self._client.get_statuses(batch_ids, wait=wait)
+        except Exception as err:  # pylint: disable=broad-except
+            # The batches stay in flight and are polled again
+            LOGGER.warning("Unable to fetch inbound batch statuses: %s", err)
+            if wait:
+                time.sleep(STATUS_RETRY_DELAY)
+            return
+        for status in statuses:
+            if status["status"] == "PENDING":
+                continue
+            rec = self._in_flight.pop(status["id"], None)
+            if rec is None:
+                continue
+            try:
+                record_status(rec, status, self._conn)
+                if status["status"] == "COMMITTED" and rec["data_type"] == "user":
+                    # later groups of the run find the user without a query
+                    self._remember_user(rec)
+            except Exception as err:  # pylint: disable=broad-except
+                LOGGER.exception(
+                    "%s exception recording inbound record:\n%s",
+                    type(err).__name__,
+                    rec,
+                )
+                LOGGER.exception(err)
+            self._release(rec)
+        self._batch_lists = collections.deque(
+            batch_ids
+            for batch_ids in self._batch_lists
+            if any(batch_id in self._in_flight for batch_id in batch_ids)
+        )
+
+    def flush(self):
+        """ Submit the queued batches and wait for every batch in flight.
+        """
+        self.send()
+        while self._in_flight:
+            self.poll(wait=STATUS_WAIT)
+
+    def _resolve_error(self, rec, error):
+        try:
+            record_error(rec, error, self._conn)
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.exception(err)
+        self._release(rec)
+
+    def _remember_user(self, rec):
+        remote_id = rec["data"].get("remote_id")
+        if remote_id and rec.get("next_id"):
+            self.remote_id_cache.put(remote_id, rec["next_id"])
+
+    def _release(self, rec):
+        key = get_remote_key(rec)
+        self._remote_ids[key] -= 1
+        if self._remote_ids[key] <= 0:
+            del self._remote_ids[key]
+
+
+def get_remote_key(rec):
+    """ The provider object an inbound record creates or changes.
+    """
+    kind = "group" if rec["data_type"].startswith("group") else "user"
+    return (kind, rec["data"].get("remote_id"))
+
+
+def get_dependencies(rec):
+    """ The provider objects an inbound record reads while it is prepared.
+    """
+    dependencies = {get_remote_key(rec)}
+    for field in ("members", "owners"):
+        remote_ids = rec["data"].get(field) or []
+        if not isinstance(remote_ids, list):
+            remote_ids = [remote_ids]
+        dependencies.update(("user", remote_id) for remote_id in remote_ids)
+    return dependencies
 
 
 def get_status_error(status):
@@ -146,26 +347,31 @@ def insert_to_user_mapping(user_record):
     conn.close()
 
 
-def translate_field_to_next(resource, field):
+def translate_field_to_next(resource, field, conn=None, remote_ids=None):
     """ Takes in a resource dict that contains a list  at a specified field and switches
         their remote_ids with the next_id of the same user.
+    Args:
+        resource:
+            dict: the inbound queue record
+        field:
+            str: the field of the record's data holding remote ids
+        conn:
+            obj: RethinkDB connection object, one is opened if not given
+        remote_ids:
+            RemoteIdCache: remote id to next_id mappings of the sync run
     """
     resource_list = resource["data"][field]
-    new_list = []
-    conn = connect_to_db()
     if not isinstance(resource_list, list):
         resource_list = [resource_list]
-    for user in resource_list:
-        user_in_db = (
-            r.table("users").filter({"remote_id": user}).coerce_to("array").run(conn)
-        )
-        if user_in_db:
-            user_next_id = user_in_db[0].get("next_id")
-            new_list.append(user_next_id)
-        else:
-            new_list.append(user)
-    resource["data"][field] = new_list
-    conn.close()
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_to_db()
+    try:
+        next_ids = resolve_remote_ids(conn, resource_list, remote_ids)
+    finally:
+        if own_conn:
+            conn.close()
+    resource["data"][field] = [next_ids.get(user, user) for user in resource_list]
     return resource
 
 
@@ -174,6 +380,9 @@ def listener():
     """
     try:
         conn = connect_to_db()
+        keys = key_pool.open_pool()
+
+        pipeline = InboundPipeline(conn)
 
         LOGGER.info("Reading queued Sawtooth transactions")
         while True:
@@ -182,24 +391,43 @@ def listener():
             for rec in feed:
                 LOGGER.debug("Processing inbound_queue record")
                 LOGGER.debug(rec)
-                process(rec, conn)
+                pipeline.submit(rec)
                 count = count + 1
+            pipeline.flush()
             if count == 0:
                 break
             LOGGER.info("Processed %s records in the inbound queue", count)
+            LOGGER.info("Key pool metrics: %s", keys.metrics())
         LOGGER.info("Listening for incoming Sawtooth transactions")
         feed = r.table("inbound_queue").changes().run(conn)
-        for rec in feed:
+        while True:
+            try:
+                rec = feed.next(wait=FEED_IDLE_WAIT if pipeline.pending else True)
+            except r.ReqlTimeoutError:
+                # The feed is idle, so send what is queued and check on
+                # the batches in flight
+                try:
+                    pipeline.send()
+                    pipeline.poll()
+                except Exception as err:  # pylint: disable=broad-except
+                    LOGGER.exception(
+                        "%s exception sending inbound batches", type(err).__name__
+                    )
+                    LOGGER.exception(err)
+                continue
             if rec["new_val"] and not rec["old_val"]:  # only insertions
                 LOGGER.debug("Processing inbound_queue record")
                 LOGGER.debug(rec["new_val"])
-                process(rec["new_val"], conn)
+                pipeline.submit(rec["new_val"])
 
     except Exception as err:  # pylint: disable=broad-except
         LOGGER.exception("Inbound listener %s exception", type(err).__name__)
         LOGGER.exception(err)
 
     finally:
+        if key_pool.get_pool() is not None:
+            LOGGER.info("Key pool metrics: %s", key_pool.get_pool().metrics())
+        key_pool.close_pool()
         try:
             conn.close()
         except UnboundLocalError:
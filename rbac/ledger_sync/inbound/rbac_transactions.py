@@ -14,14 +14,11 @@
 # ------------------------------------------------------------------------------
 """ Inbound Provider Sawtooth Transaction Creation
 """
-import os
 from uuid import uuid4
 
 import rethinkdb as r
 
 from rbac.common import addresser
-from rbac.common.crypto.keys import Key
-from rbac.common.crypto.secrets import encrypt_private_key
 from rbac.common.logs import get_default_logger
 from rbac.common.role import Role
 from rbac.common.role.delete_role import DeleteRole
@@ -32,6 +29,7 @@ from rbac.common.user import User
 from rbac.common.user.delete_user import DeleteUser
 from rbac.common.util import bytes_from_hex
 from rbac.common.sawtooth import batcher
+from rbac.ledger_sync.inbound.key_pool import take_key_pair
 from rbac.providers.common.db_queries import connect_to_db
 from rbac.server.api.proposals import PROPOSAL_TRANSACTION
 from rbac.server.db.proposals_query import (
@@ -58,8 +56,6 @@ META_DATA_PROHIBITED = {
     "related_id",
 }
 
-AES_KEY = os.getenv("AES_KEY")
-
 
 def add_transaction(inbound_entry):
     """ Adds transactional entries onto inbound_entry
@@ -67,10 +63,7 @@ def add_transaction(inbound_entry):
     try:
         set_metadata_flag = {}
         data = inbound_entry["data"]
-        key_pair = Key()
-        encrypted_private_key = encrypt_private_key(
-            AES_KEY, key_pair.public_key, key_pair.private_key_bytes
-        )
+        key_pair, encrypted_private_key = take_key_pair()
         inbound_entry["public_key"] = key_pair.public_key
         inbound_entry["private_key"] = encrypted_private_key
         set_metadata_flag["sync_direction"] = "INBOUND"
@@ -0,0 +1,132 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+""" Bulk translation of provider remote ids to NEXT user ids.
+
+The remote ids of a record are resolved with one indexed get_all on the
+users table, and the ones not found there with one on the user_mapping
+table, which holds the users committed by the inbound listener before the
+ledger sync writes them to users. Resolved ids are kept in an LRU for the
+rest of the sync run so later groups reuse them.
+"""
+import collections
+
+import rethinkdb as r
+
+from rbac.common.config import get_config
+from rbac.common.logs import get_default_logger
+
+LOGGER = get_default_logger(__name__)
+
+REMOTE_ID_CACHE_SIZE = int(get_config("REMOTE_ID_CACHE_SIZE"))
+
+
+class RemoteIdCache:
+    """ Bounded LRU of remote id to next_id mappings.
+
+    Args:
+        max_size:
+            int: maximum number of cached remote ids
+    """
+
+    def __init__(self, max_size=REMOTE_ID_CACHE_SIZE):
+        self.max_size = max_size
+        self._next_ids = collections.OrderedDict()
+        self._stats = collections.Counter()
+
+    def __len__(self):
+        return len(self._next_ids)
+
+    def get(self, remote_id):
+        """Return the cached next_id of a remote id, or None."""
+        next_id = self._next_ids.get(remote_id)
+        if next_id is None:
+            self._stats["misses"] += 1
+            return None
+        self._next_ids.move_to_end(remote_id)
+        self._stats["hits"] += 1
+        return next_id
+
+    def put(self, remote_id, next_id):
+        """Cache the next_id of a remote id."""
+        self._next_ids[remote_id] = next_id
+        self._next_ids.move_to_end(remote_id)
+        while len(self._next_ids) > self.max_size:
+            self._next_ids.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def discard(self, remote_id):
+        """Forget a remote id, e.g. when its user is deleted."""
+        self._next_ids.pop(remote_id, None)
+
+    def metrics(self):
+        """Return a snapshot of cache counters."""
+        return {
+            "size": len(self._next_ids),
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "evictions": self._stats["evictions"],
+        }
+
+
+def fetch_next_ids(conn, table, remote_ids):
+    """ Find the next_ids of remote ids in a table with one indexed query.
+    Returns:
+        dict: remote id -> next_id, for the remote ids found
+    """
+    rows = (
+        r.table(table)
+        .get_all(r.args(list(remote_ids)), index="remote_id")
+        .pluck("remote_id", "next_id")
+        .coerce_to("array")
+        .run(conn)
+    )
+    next_ids = {}
+    for row in rows:
+        if row.get("next_id"):
+            next_ids.setdefault(row["remote_id"], row["next_id"])
+    return next_ids
+
+
+def resolve_remote_ids(conn, remote_ids, cache=None):
+    """ Map remote ids to next_ids, from the cache where possible and with
+    at most one query per table for the rest.
+    Args:
+        conn:
+            obj: RethinkDB connection object
+        remote_ids:
+            list: of remote ids
+        cache:
+            RemoteIdCache: the sync run's cache, filled with what is found
+    Returns:
+        dict: remote id -> next_id, for the remote ids found
+    """
+    next_ids = {}
+    missing = set()
+    for remote_id in remote_ids:
+        next_id = cache.get(remote_id) if cache is not None else None
+        if next_id is None:
+            missing.add(remote_id)
+        else:
+            next_ids[remote_id] = next_id
+    for table in ("users", "user_mapping"):
+        if not missing:
+            break
+        found = fetch_next_ids(conn, table, missing)
+        missing.difference_update(found)
+        next_ids.update(found)
+        if cache is not None:
+            for remote_id, next_id in found.items():
+                cache.put(remote_id, next_id)
+    return next_ids
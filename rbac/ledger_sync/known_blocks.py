@@ -0,0 +1,74 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+""" Ids of the most recent blocks, sent by the subscriber to catch up.
+
+The ids are read from the blocks table once at start up, newest first by
+the primary index, and kept current from the block-commit events the
+subscriber receives, so it resubscribes after a validator restart without
+reading the database.
+"""
+import collections
+
+import rethinkdb as r
+
+# State Delta catches up based on the first valid ID it finds, which is
+# likely genesis, defeating the purpose. Rewind just 15 blocks to handle forks.
+KNOWN_COUNT = 15
+
+
+def last_blocks_query(count):
+    """ReQL: the ids of the count most recent blocks, newest first."""
+    return (
+        r.table("blocks")
+        .order_by(index=r.desc("block_num"))
+        .limit(count)
+        .get_field("block_id")
+    )
+
+
+def last_known_blocks(conn, count):
+    """Fetches the ids of the specified number of most recent blocks,
+    oldest first
+    """
+    return list(reversed(list(last_blocks_query(count).run(conn))))
+
+
+class KnownBlocks:
+    """ Ring buffer of the ids of the most recent blocks, oldest first.
+
+    Args:
+        count:
+            int: number of block ids kept
+    """
+
+    def __init__(self, count=KNOWN_COUNT):
+        self._ids = collections.deque(maxlen=count)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, block_id):
+        """Record a committed block."""
+        if not self._ids or self._ids[-1] != block_id:
+            self._ids.append(block_id)
+
+    def extend(self, block_ids):
+        """Record committed blocks, oldest first."""
+        for block_id in block_ids:
+            self.add(block_id)
+
+    def ids(self):
+        """Return the known block ids, oldest first."""
+        return list(self._ids)
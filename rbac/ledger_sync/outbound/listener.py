@@ -15,30 +15,27 @@
 """ Sawtooth Outbound State Sync
 """
 import time
-import rethinkdb as r
 from rbac.common.config import get_config
 from rbac.common.logs import get_default_logger
 from rbac.ledger_sync.deltas.handlers import get_delta_handler
+from rbac.ledger_sync.known_blocks import KNOWN_COUNT, KnownBlocks, last_known_blocks
 from rbac.ledger_sync.subscriber import Subscriber
 from rbac.providers.common.db_queries import connect_to_db
 
 LOGGER = get_default_logger(__name__)
 VALIDATOR = get_config("VALIDATOR")
 
-# State Delta catches up based on the first valid ID it finds, which is
-# likely genesis, defeating the purpose. Rewind just 15 blocks to handle forks.
-KNOWN_COUNT = 15
-
 
 def listener():
     """ Listener for Sawtooth State changes
     """
     try:
         conn = connect_to_db()
-        subscriber = Subscriber(VALIDATOR)
+        known_blocks = KnownBlocks()
+        subscriber = Subscriber(VALIDATOR, known_blocks)
         subscriber.add_handler(get_delta_handler(conn))
-        known_blocks = get_last_known_blocks(conn)
-        subscriber.start(known_blocks)
+        known_blocks.extend(get_last_known_blocks(conn))
+        subscriber.start()
         LOGGER.info("Listening for Sawtooth state changes")
 
     except Exception as err:  # pylint: disable=broad-except
@@ -56,15 +53,6 @@ def listener():
             pass
 
 
-def last_known_blocks(conn, count):
-    """Fetches the ids of the specified number of most recent blocks
-    """
-
-    cursor = r.table("blocks").order_by("block_num").get_field("block_id").run(conn)
-
-    return list(cursor)[-count:]
-
-
 def get_last_known_blocks(conn):
     """ Get the last known blocks
     """
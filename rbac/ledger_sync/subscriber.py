@@ -15,7 +15,7 @@
 """Subscriber class that can subscribe to state delta events using the
     Sawtooth SDK's Stream class."""
 
-from sawtooth_sdk.messaging.stream import Stream
+from sawtooth_sdk.messaging.stream import RECONNECT_EVENT, Stream
 from sawtooth_sdk.protobuf import client_event_pb2
 from sawtooth_sdk.protobuf import events_pb2
 from sawtooth_sdk.protobuf import transaction_receipt_pb2
@@ -33,9 +33,10 @@ class Subscriber(object):
     subscribing, and each will be called on each delta event received.
     """
 
-    def __init__(self, validator_url):
+    def __init__(self, validator_url, known_blocks=None):
         LOGGER.info("Connecting to validator: %s", validator_url)
         self._stream = Stream(validator_url)
+        self._known_blocks = known_blocks
         self._delta_handlers = []
         self._is_active = False
 
@@ -52,8 +53,42 @@ class Subscriber(object):
 
     def start(self, known_ids=None):
         """Subscribes to state delta events, and then waits to receive deltas.
-        Sends any events received to delta handlers.
+        Sends any events received to delta handlers. Without known_ids, the
+        ids of the subscriber's known blocks are sent. The subscription is
+        renewed from the known blocks when the validator reconnects.
         """
+        if known_ids is None and self._known_blocks is not None:
+            known_ids = self._known_blocks.ids()
+        self._subscribe(known_ids)
+
+        self._is_active = True
+
+        LOGGER.debug("Successfully subscribed to state delta events")
+        while self._is_active:
+            message_future = self._stream.receive()
+            msg = message_future.result()
+
+            if msg == RECONNECT_EVENT:
+                LOGGER.info("Reconnected to validator, renewing subscription")
+                self._subscribe(
+                    self._known_blocks.ids() if self._known_blocks is not None else None
+                )
+                continue
+
+            if msg.message_type == Message.CLIENT_EVENTS:
+                event_list = events_pb2.EventList()
+                event_list.ParseFromString(msg.content)
+                events = list(event_list.events)
+                event = StateDeltaEvent(events)
+
+                delta_count = len(event.state_changes)
+                if delta_count > 0:
+                    for handler in self._delta_handlers:
+                        handler(event)
+                if self._known_blocks is not None:
+                    self._known_blocks.add(event.block_id)
+
+    def _subscribe(self, known_ids):
         self._stream.wait_for_ready()
 
         LOGGER.debug("Subscribing to client state events")
@@ -86,7 +121,7 @@ class Subscriber(object):
             and response.status
             == client_event_pb2.ClientEventsSubscribeResponse.UNKNOWN_BLOCK
         ):
-            return self.start()
+            return self._subscribe(None)
 
         if response.status != client_event_pb2.ClientEventsSubscribeResponse.OK:
             raise RuntimeError(
@@ -96,24 +131,7 @@ class Subscriber(object):
                     )
                 )
             )
-
-        self._is_active = True
-
-        LOGGER.debug("Successfully subscribed to state delta events")
-        while self._is_active:
-            message_future = self._stream.receive()
-            msg = message_future.result()
-
-            if msg.message_type == Message.CLIENT_EVENTS:
-                event_list = events_pb2.EventList()
-                event_list.ParseFromString(msg.content)
-                events = list(event_list.events)
-                event = StateDeltaEvent(events)
-
-                delta_count = len(event.state_changes)
-                if delta_count > 0:
-                    for handler in self._delta_handlers:
-                        handler(event)
+        return response
 
     def stop(self):
         """Stops the Subscriber, unsubscribing from state delta events and
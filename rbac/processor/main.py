@@ -15,6 +15,7 @@
 """Starts the sawtooth transaction processor with args."""
 
 import argparse
+import signal
 import sys
 import os
 
@@ -22,12 +23,16 @@ from sawtooth_sdk.processor.core import TransactionProcessor
 from sawtooth_sdk.processor.log import init_console_logging
 
 from rbac.processor.event_handler import RBACTransactionHandler
+from rbac.processor.supervisor import Supervisor
+from rbac.common.config import get_config
 from rbac.common.logs import get_default_logger
 
 LOGGER = get_default_logger(__name__)
 
 VALIDATOR_HOST = os.getenv("VALIDATOR_HOST", "validator")
 VALIDATOR_PORT = os.getenv("VALIDATOR_PORT", "4004")
+PROCESSOR_WORKERS = int(get_config("PROCESSOR_WORKERS"))
+PROCESSOR_RESTART_DELAY = int(get_config("PROCESSOR_RESTART_DELAY")) / 1000
 
 
 def parse_args(args):
@@ -35,21 +40,49 @@ def parse_args(args):
     parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
 
     parser.add_argument("-v", "--verbosity", action="count", help="The logging level.")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=PROCESSOR_WORKERS,
+        help="The number of transaction processor processes.",
+    )
 
     return parser.parse_args(args)
 
 
 def main(args=None):
-    """Starts sawtooth transaction processor with options set per args."""
+    """Starts sawtooth transaction processor workers with options set per
+    args, restarting any worker that exits."""
     if args is None:
         args = sys.argv[1:]
     opts = parse_args(args)
+    init_console_logging(verbose_level=opts.verbosity)
+    supervisor = Supervisor(
+        run_processor,
+        args=(opts.verbosity,),
+        workers=opts.workers,
+        restart_delay=PROCESSOR_RESTART_DELAY,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: supervisor.shutdown())
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        LOGGER.info("Processor workers: %s", supervisor.metrics())
+
+
+def run_processor(verbosity=None):
+    """Runs a transaction processor in a worker process of the supervisor."""
+    # the supervisor's handler is inherited, workers just exit on SIGTERM
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
     processor = None
     try:
         processor = TransactionProcessor(
             url="tcp://" + VALIDATOR_HOST + ":" + VALIDATOR_PORT
         )
-        init_console_logging(verbose_level=opts.verbosity)
+        init_console_logging(verbose_level=verbosity)
         processor.add_handler(RBACTransactionHandler())
         processor.start()
 
@@ -58,6 +91,7 @@ def main(args=None):
     except Exception as err:  # pylint: disable=broad-except
         LOGGER.exception("Fatal processor %s exception", type(err))
         LOGGER.exception(err)
+        sys.exit(1)
     finally:
         if processor is not None:
             processor.stop()
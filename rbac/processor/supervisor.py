@@ -0,0 +1,121 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Runs the transaction processor in several worker processes.
+
+Each worker registers its own handler with the validator, which spreads the
+transactions of the family across them, so payload parsing and state
+(de)serialization use more than one core. Workers that exit are restarted.
+"""
+import collections
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+
+from rbac.common.logs import get_default_logger
+
+LOGGER = get_default_logger(__name__)
+
+# seconds between checks of whether the supervisor was asked to stop
+POLL_INTERVAL = 1
+
+
+class Supervisor:
+    """Runs a target in worker processes, restarting those that exit
+    until stopped.
+
+    Args:
+        target:
+            callable: run by each worker process
+        args:
+            tuple: arguments of the target
+        workers:
+            int: number of worker processes
+        restart_delay:
+            float: seconds to wait before restarting a worker that exited
+    """
+
+    def __init__(self, target, args=(), workers=1, restart_delay=1):
+        self._target = target
+        self._args = args
+        self._workers = workers
+        self._restart_delay = restart_delay
+        self._processes = {}
+        self._stopping = False
+        self._stats = collections.Counter()
+
+    def _start(self, index):
+        process = multiprocessing.Process(
+            target=self._target, args=self._args, name="rbac-tp-{}".format(index)
+        )
+        process.start()
+        self._processes[index] = process
+        self._stats["started"] += 1
+        LOGGER.info("Started processor worker %s (pid %s)", process.name, process.pid)
+
+    def run(self):
+        """Start the workers and restart any that exit, until shutdown is
+        called or the supervisor is interrupted. Stops the workers on return.
+        """
+        try:
+            for index in range(self._workers):
+                self._start(index)
+            while not self._stopping:
+                sentinels = {
+                    process.sentinel: index
+                    for index, process in self._processes.items()
+                }
+                for sentinel in wait(list(sentinels), timeout=POLL_INTERVAL):
+                    if self._stopping:
+                        break
+                    index = sentinels[sentinel]
+                    process = self._processes[index]
+                    process.join()
+                    self._stats["exited"] += 1
+                    LOGGER.warning(
+                        "Processor worker %s exited with code %s, restarting",
+                        process.name,
+                        process.exitcode,
+                    )
+                    time.sleep(self._restart_delay)
+                    self._start(index)
+        finally:
+            self.stop()
+
+    def shutdown(self):
+        """Ask the supervisor to stop its workers and return from run.
+        Safe to call from a signal handler.
+        """
+        self._stopping = True
+
+    def stop(self):
+        """Terminate the workers and wait for them to exit"""
+        self._stopping = True
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes.values():
+            process.join()
+
+    def pids(self):
+        """The process ids of the workers"""
+        return [process.pid for process in self._processes.values()]
+
+    def metrics(self):
+        """Workers started and exited"""
+        return {
+            "workers": self._workers,
+            "started": self._stats["started"],
+            "exited": self._stats["exited"],
+        }
@@ -30,7 +30,7 @@ from sanic.response import json as sanic_json
 from sanic_openapi import doc
 
 from rbac.app.config import ADAPI_REST_ENDPOINT
-from rbac.common.crypto.secrets import deserialize_api_key, generate_api_key
+from rbac.common.crypto.secrets import generate_api_key
 from rbac.common.logs import get_default_logger
 from rbac.providers.common.common import escape_user_input
 from rbac.server.api import utils
@@ -70,10 +70,7 @@ def authorized():
         @wraps(func)
         async def decorated_function(request, *args, **kwargs):
             try:
-                id_dict = deserialize_api_key(
-                    request.app.config.SECRET_KEY, utils.extract_request_token(request)
-                )
-                await get_auth_by_next_id(id_dict.get("id"))
+                await utils.get_request_auth(request)
             except (ApiNotFound, BadSignature):
                 raise ApiUnauthorized("Unauthorized: Invalid bearer token")
             response = await func(request, *args, **kwargs)
@@ -0,0 +1,210 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""In-process cache of verified bearer tokens and decrypted transactor keys.
+
+Entries are keyed by a hash of the bearer token and expire after a TTL, or
+when the token itself expires, whichever comes first. A changefeed on the
+auth table evicts a user's entries as soon as their auth record changes, so
+password changes and deletes take effect immediately. While the changefeed
+is down the cache is bypassed.
+"""
+import collections
+import hashlib
+import time
+
+import rethinkdb as r
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.changefeeds import follow_changefeed
+from rbac.server.db.db_utils import create_connection
+
+LOGGER = get_default_logger(__name__)
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_TTL = 300
+DEFAULT_KEY_TTL = 30
+
+AuthEntry = collections.namedtuple("AuthEntry", ["next_id", "auth", "expires"])
+
+_CACHE = None
+
+
+def hash_token(token):
+    """Hash a bearer token so raw tokens are never held in memory."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class AuthCache:
+    """Bounded LRU + TTL cache of authenticated users.
+
+    Args:
+        max_size:
+            int: maximum number of cached tokens
+        ttl:
+            int: seconds a verified token is trusted without a DB lookup
+        key_ttl:
+            int: seconds a decrypted transactor Key is kept, 0 to disable
+    """
+
+    def __init__(
+        self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL, key_ttl=DEFAULT_KEY_TTL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.key_ttl = key_ttl
+        self.watching = False
+        self._entries = collections.OrderedDict()
+        self._tokens_by_user = collections.defaultdict(set)
+        self._keys = {}
+        self._stats = collections.Counter()
+
+    def get(self, token):
+        """Return the cached AuthEntry for a token, or None."""
+        if not self.watching:
+            return None
+        token_hash = hash_token(token)
+        entry = self._entries.get(token_hash)
+        if entry is None or entry.expires <= time.monotonic():
+            if entry is not None:
+                self._discard(token_hash)
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(token_hash)
+        self._stats["hits"] += 1
+        return entry
+
+    def put(self, token, next_id, auth, token_expires=None):
+        """Cache a verified token.
+        Args:
+            token:
+                str: the bearer token
+            next_id:
+                str: the user id the token was issued to
+            auth:
+                dict: the user's auth table row
+            token_expires:
+                float: unix time the token expires at, if any
+        """
+        if not self.watching:
+            return
+        expires = time.monotonic() + self.ttl
+        if token_expires is not None:
+            expires = min(expires, time.monotonic() + token_expires - time.time())
+        token_hash = hash_token(token)
+        self._discard(token_hash)
+        self._entries[token_hash] = AuthEntry(next_id, auth, expires)
+        self._tokens_by_user[next_id].add(token_hash)
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def get_key(self, next_id):
+        """Return a cached decrypted Key for a user, or None."""
+        if not self.watching or not self.key_ttl:
+            return None
+        cached = self._keys.get(next_id)
+        if cached is None or cached[1] <= time.monotonic():
+            self._keys.pop(next_id, None)
+            self._stats["key_misses"] += 1
+            return None
+        self._stats["key_hits"] += 1
+        return cached[0]
+
+    def put_key(self, next_id, key):
+        """Cache a decrypted Key for key_ttl seconds."""
+        if not self.watching or not self.key_ttl:
+            return
+        if next_id not in self._tokens_by_user:
+            return
+        self._keys[next_id] = (key, time.monotonic() + self.key_ttl)
+
+    def invalidate(self, next_id):
+        """Evict every cached token and key of a user."""
+        for token_hash in list(self._tokens_by_user.get(next_id, ())):
+            self._discard(token_hash)
+        self._keys.pop(next_id, None)
+        self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Evict everything."""
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        self._keys.clear()
+
+    def metrics(self):
+        """Return a snapshot of cache counters."""
+        return {
+            "size": len(self._entries),
+            "keys": len(self._keys),
+            "watching": self.watching,
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "key_hits": self._stats["key_hits"],
+            "key_misses": self._stats["key_misses"],
+            "evictions": self._stats["evictions"],
+            "invalidations": self._stats["invalidations"],
+            "errors": self._stats["errors"],
+        }
+
+    async def watch(self, connect=create_connection):
+        """Invalidate entries from the auth table changefeed until cancelled.
+        The cache is disabled and emptied whenever the changefeed is down.
+        """
+        await follow_changefeed(
+            lambda conn: r.table("auth").changes().run(conn),
+            self._apply_change,
+            on_up=self._set_watching,
+            on_down=self._set_not_watching,
+            connect=connect,
+            name="auth cache",
+            stats=self._stats,
+        )
+
+    def _apply_change(self, change):
+        record = change.get("old_val") or change.get("new_val") or {}
+        self.invalidate(record.get("next_id"))
+
+    def _set_watching(self):
+        self.watching = True
+
+    def _set_not_watching(self):
+        self.watching = False
+        self.clear()
+
+    def _discard(self, token_hash):
+        entry = self._entries.pop(token_hash, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry.next_id)
+        if tokens is not None:
+            tokens.discard(token_hash)
+            if not tokens:
+                del self._tokens_by_user[entry.next_id]
+                self._keys.pop(entry.next_id, None)
+
+
+def open_cache(**kwargs):
+    """Create the auth cache for this worker."""
+    global _CACHE  # pylint: disable=global-statement
+    _CACHE = AuthCache(**kwargs)
+    return _CACHE
+
+
+def get_cache():
+    """Return the worker's auth cache, creating a default one if needed."""
+    global _CACHE  # pylint: disable=global-statement
+    if _CACHE is None:
+        _CACHE = AuthCache()
+    return _CACHE
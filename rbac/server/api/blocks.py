@@ -23,12 +23,13 @@ from rbac.server.api.errors import ApiBadRequest
 from rbac.server.api.auth import authorized
 from rbac.server.api.utils import (
     create_response,
+    get_head_block,
     get_request_block,
     get_request_paging_info,
     log_request,
 )
 from rbac.server.db import blocks_query
-from rbac.server.db.db_utils import create_connection
+from rbac.server.db.connection_pool import acquire
 
 BLOCKS_BP = Blueprint("blocks")
 
@@ -68,18 +69,16 @@ BLOCKS_BP = Blueprint("blocks")
 @authorized()
 async def get_all_blocks(request):
     """Get all blocks."""
-    conn = await create_connection()
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    block_resources = await blocks_query.fetch_all_blocks(
-        conn, head_block.get("num"), start, limit
-    )
-    conn.close()
-
-    return await create_response(
-        conn, request.url, block_resources, head_block, start=start, limit=limit
-    )
+    async with acquire() as conn:
+        block_resources = await blocks_query.fetch_all_blocks(
+            conn, head_block.get("num"), start, limit
+        )
+        return await create_response(
+            conn, request.url, block_resources, head_block, start=start, limit=limit
+        )
 
 
 @BLOCKS_BP.get("api/blocks/latest")
@@ -111,9 +110,7 @@ async def get_latest_block(request):
     if "?head=" in request.url:
         raise ApiBadRequest("Bad Request: 'head' parameter should not be specified")
 
-    conn = await create_connection()
-    block_resource = await blocks_query.fetch_latest_block_with_retry(conn)
-    conn.close()
+    block_resource = await get_head_block()
 
     url = request.url.replace("latest", block_resource.get("id"))
     return json({"data": block_resource, "link": url})
@@ -148,8 +145,7 @@ async def get_block(request, block_id):
         raise ApiBadRequest("Bad Request: 'head' parameter should not be specified")
 
     block_id = escape_user_input(block_id)
-    conn = await create_connection()
-    block_resource = await blocks_query.fetch_block_by_id(conn, block_id)
-    conn.close()
+    async with acquire() as conn:
+        block_resource = await blocks_query.fetch_block_by_id(conn, block_id)
 
     return json({"data": block_resource, "link": request.url})
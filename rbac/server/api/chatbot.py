@@ -21,7 +21,7 @@ from rbac.common.logs import get_default_logger
 from rbac.providers.common.common import escape_user_input
 from rbac.server.api import utils
 from rbac.server.db import users_query
-from rbac.server.db.db_utils import create_connection
+from rbac.server.db.connection_pool import acquire
 
 LOGGER = get_default_logger(__name__)
 
@@ -49,10 +49,10 @@ async def update_tracker(request, recv):
     next_id = escape_user_input(recv.get("next_id"))
 
     if recv.get("approver_id"):
-        conn = await create_connection()
-        owner_resource = await users_query.fetch_user_resource_summary(
-            conn, escape_user_input(recv.get("approver_id"))
-        )
+        async with acquire() as conn:
+            owner_resource = await users_query.fetch_user_resource_summary(
+                conn, escape_user_input(recv.get("approver_id"))
+            )
         await create_event(
             request, next_id, "approver_name", owner_resource.get("name")
         )
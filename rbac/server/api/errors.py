@@ -150,9 +150,12 @@ async def handle_errors(request, exception):
 
 @ERRORS_BP.exception(ReqlDriverError)
 async def handle_reql_error(request, exception):
-    """Re-establish connection on driver error """
+    """Return database driver errors as json. The broken connection has
+    already been discarded by the connection pool."""
+    if not request:
+        LOGGER.debug(request)
     LOGGER.exception(exception)
-    request.app.config.DB_CONN.reconnect(noreply_wait=False)
+    return json({"code": 503, "message": DEFAULT_MSGS[503]}, status=503)
 
 
 @ERRORS_BP.exception(Exception)
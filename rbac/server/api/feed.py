@@ -12,7 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ------------------------------------------------------------------------------
-"""Socket feed enabling real-time notifications of proposals."""
+"""Socket feed enabling real-time notifications of proposals.
+
+Each worker follows the proposals table with a single changefeed and emits
+each change only to the socketio rooms of the users it concerns. A socket
+subscribing to the feed joins its user's room, so connecting and
+disconnecting sockets never opens or leaks a changefeed cursor.
+"""
+import collections
 import json
 
 from rbac.common.logs import get_default_logger
@@ -20,36 +27,143 @@ from rbac.providers.common.common import escape_user_input
 from rbac.server.api.proposals import compile_proposal_resource
 from rbac.server.api import utils
 from rbac.server.db import proposals_query
+from rbac.server.db.changefeeds import follow_changefeed
+from rbac.server.db.connection_pool import acquire
 from rbac.server.db.db_utils import create_connection
 
 LOGGER = get_default_logger(__name__)
 
+_FEED = None
+
+
+def user_room(next_id):
+    """Name of the socketio room of a user's proposal feed."""
+    return "feed:{}".format(next_id)
+
+
+def feed_messages(proposal_resource):
+    """Work out the messages a proposal change sends to each user.
+    Returns:
+        list: of (next_id, message) tuples
+    """
+    messages = []
+    if proposal_resource["status"] == "OPEN":
+        approvers = collections.OrderedDict.fromkeys(
+            proposal_resource.get("approvers", [])
+            + proposal_resource.get("assigned_approver", [])
+        )
+        message = json.dumps({"open_proposal": proposal_resource})
+        messages.extend((next_id, message) for next_id in approvers)
+    if proposal_resource.get("opener"):
+        messages.append(
+            (
+                proposal_resource["opener"],
+                json.dumps({"user_proposal": proposal_resource}),
+            )
+        )
+    return messages
+
+
+class ProposalFeed:
+    """Fans a single proposals changefeed out to the rooms of subscribed users.
+
+    Args:
+        sio:
+            obj: the socketio AsyncServer
+    """
+
+    def __init__(self, sio):
+        self.sio = sio
+        self.watching = False
+        self._subscriptions = {}
+        self._subscribers = collections.Counter()
+        self._stats = collections.Counter()
+
+    def subscribe(self, sid, next_id):
+        """Move a socket into the room of the user it follows."""
+        self.unsubscribe(sid)
+        self.sio.enter_room(sid, user_room(next_id))
+        self._subscriptions[sid] = next_id
+        self._subscribers[next_id] += 1
+
+    def unsubscribe(self, sid):
+        """Take a socket out of its user's room, if it is in one."""
+        next_id = self._subscriptions.pop(sid, None)
+        if next_id is None:
+            return
+        self.sio.leave_room(sid, user_room(next_id))
+        self._subscribers[next_id] -= 1
+        if self._subscribers[next_id] <= 0:
+            del self._subscribers[next_id]
+
+    def metrics(self):
+        """Return a snapshot of feed counters."""
+        return {
+            "watching": self.watching,
+            "sockets": len(self._subscriptions),
+            "users": len(self._subscribers),
+            "changes": self._stats["changes"],
+            "emits": self._stats["emits"],
+            "errors": self._stats["errors"],
+        }
 
-async def handle_feed_socket(sio, data):
+    async def watch(self, connect=create_connection):
+        """Follow the proposals changefeed until cancelled, reconnecting
+        when it fails.
+        """
+        await follow_changefeed(
+            proposals_query.subscribe_to_proposals,
+            lambda change: self.dispatch(change.get("new_val")),
+            on_up=self._set_watching,
+            on_down=self._set_not_watching,
+            connect=connect,
+            name="proposal",
+            stats=self._stats,
+        )
+
+    def _set_watching(self):
+        self.watching = True
+
+    def _set_not_watching(self):
+        self.watching = False
+
+    async def dispatch(self, proposal):
+        """Emit a changed proposal to the subscribed users it concerns."""
+        if not proposal:
+            return
+        self._stats["changes"] += 1
+        if not self._subscribers:
+            return
+        async with acquire() as conn:
+            proposal_resource = await compile_proposal_resource(conn, proposal)
+        for next_id, message in feed_messages(proposal_resource):
+            if next_id in self._subscribers:
+                self._stats["emits"] += 1
+                await self.sio.emit("feed", message, room=user_room(next_id))
+
+
+def open_feed(sio):
+    """Create the proposal feed for this worker."""
+    global _FEED  # pylint: disable=global-statement
+    _FEED = ProposalFeed(sio)
+    return _FEED
+
+
+def get_feed():
+    """Return the worker's proposal feed."""
+    return _FEED
+
+
+async def handle_feed_socket(sid, data):
     """Socket feed enabling real-time notifications"""
     required_fields = ["next_id"]
     recv = json.loads(data)
     utils.validate_fields(required_fields, recv)
-    await proposal_feed(sio, recv)
-
-
-async def proposal_feed(sio, recv):
-    """Send open proposal updates to a given user"""
-    conn = await create_connection()
-    subscription = await proposals_query.subscribe_to_proposals(conn)
-    while await subscription.fetch_next():
-        proposal = await subscription.next()
-        proposal_resource = await compile_proposal_resource(
-            conn, proposal.get("new_val")
-        )
+    get_feed().subscribe(sid, escape_user_input(recv.get("next_id")))
 
-        conn.close()
 
-        next_id = escape_user_input(recv.get("next_id"))
-        if (
-            proposal_resource["status"] == "OPEN"
-            and next_id in proposal_resource["approvers"]
-        ):
-            await sio.emit("feed", json.dumps({"open_proposal": proposal_resource}))
-        if next_id == proposal_resource["opener"]:
-            await sio.emit("feed", json.dumps({"user_proposal": proposal_resource}))
+def handle_feed_disconnect(sid):
+    """Drop the subscription of a disconnected socket"""
+    feed = get_feed()
+    if feed is not None:
+        feed.unsubscribe(sid)
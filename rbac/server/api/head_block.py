@@ -0,0 +1,206 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""In-process tracker of the head block, and cache of blocks by id.
+
+The head only changes once per block, so each worker follows it with a
+changefeed on the blocks table instead of querying it on every request.
+While the changefeed is down the head is polled every poll_interval; a head
+older than twice that is not trusted and callers query the database.
+"""
+import asyncio
+import collections
+import time
+
+import rethinkdb as r
+from rethinkdb import ReqlError
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.blocks_query import latest_block_query
+from rbac.server.db.changefeeds import follow_changefeed
+from rbac.server.db.connection_pool import acquire
+from rbac.server.db.db_utils import create_connection
+
+LOGGER = get_default_logger(__name__)
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_MAX_BLOCKS = 256
+
+_TRACKER = None
+
+
+def format_block(block):
+    """Format a blocks table row the way the blocks queries return it."""
+    formatted = {
+        key: value
+        for key, value in block.items()
+        if key not in ("block_id", "block_num")
+    }
+    formatted["id"] = block["block_id"]
+    formatted["num"] = block["block_num"]
+    return formatted
+
+
+class HeadBlockTracker:
+    """Latest block of the chain plus a bounded LRU of blocks by id.
+
+    Args:
+        poll_interval:
+            float: seconds between polls while the changefeed is down
+        max_blocks:
+            int: maximum number of blocks cached by id
+    """
+
+    def __init__(
+        self, poll_interval=DEFAULT_POLL_INTERVAL, max_blocks=DEFAULT_MAX_BLOCKS
+    ):
+        self.poll_interval = poll_interval
+        self.max_blocks = max_blocks
+        self.watching = False
+        self._head = None
+        self._updated = 0
+        self._blocks = collections.OrderedDict()
+        self._stats = collections.Counter()
+
+    def get_head(self):
+        """Return the head block, or None if it is not known to be current."""
+        if self._head is None or not (
+            self.watching or time.monotonic() - self._updated < 2 * self.poll_interval
+        ):
+            self._stats["head_misses"] += 1
+            return None
+        self._stats["head_hits"] += 1
+        return dict(self._head)
+
+    def set_head(self, block):
+        """Record the current head block, formatted as by format_block."""
+        self._head = block
+        self._updated = time.monotonic()
+        self.put_block(block)
+
+    def get_block(self, block_id):
+        """Return a cached block by its id, or None."""
+        block = self._blocks.get(block_id)
+        if block is None:
+            self._stats["block_misses"] += 1
+            return None
+        self._blocks.move_to_end(block_id)
+        self._stats["block_hits"] += 1
+        return dict(block)
+
+    def put_block(self, block):
+        """Cache a block, formatted as by format_block."""
+        self._blocks[block["id"]] = block
+        self._blocks.move_to_end(block["id"])
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def drop_block(self, block_id):
+        """Evict a block that was dropped from the chain by a fork."""
+        self._blocks.pop(block_id, None)
+
+    def drop_blocks_from(self, block_num):
+        """Evict every cached block at or above a height, which a fork
+        back to that height dropped from the chain."""
+        for block_id in [
+            block_id
+            for block_id, block in self._blocks.items()
+            if block["num"] >= block_num
+        ]:
+            del self._blocks[block_id]
+
+    def metrics(self):
+        """Return a snapshot of tracker counters."""
+        return {
+            "head": self._head and self._head["num"],
+            "watching": self.watching,
+            "blocks": len(self._blocks),
+            "head_hits": self._stats["head_hits"],
+            "head_misses": self._stats["head_misses"],
+            "block_hits": self._stats["block_hits"],
+            "block_misses": self._stats["block_misses"],
+            "polls": self._stats["polls"],
+            "errors": self._stats["errors"],
+        }
+
+    async def watch(self, connect=create_connection):
+        """Follow the head block with a changefeed until cancelled, polling
+        for it every poll_interval while the changefeed is down.
+        """
+        await follow_changefeed(
+            lambda conn: r.table("blocks")
+            .order_by(index=r.desc("block_num"))
+            .limit(1)
+            .changes(include_initial=True)
+            .run(conn),
+            self._apply_change,
+            on_up=self._set_watching,
+            on_down=self._set_not_watching,
+            wait=self._poll,
+            connect=connect,
+            name="head block",
+            stats=self._stats,
+        )
+
+    def _set_watching(self):
+        self.watching = True
+
+    def _set_not_watching(self):
+        self.watching = False
+
+    def _apply_change(self, change):
+        old_val = change.get("old_val")
+        new_val = change.get("new_val")
+        # a new top block that doesn't extend the old one replaced it, at
+        # the same or a lower height, or after changes squashed by the feed
+        if old_val and (
+            not new_val
+            or (
+                new_val["block_id"] != old_val["block_id"]
+                and new_val.get("previous_block_id") != old_val["block_id"]
+            )
+        ):
+            self.drop_block(old_val["block_id"])
+            if new_val:
+                self.drop_blocks_from(new_val["block_num"])
+        if new_val:
+            self.set_head(format_block(new_val))
+
+    async def _poll(self, duration):
+        stop_at = time.monotonic() + duration
+        while time.monotonic() < stop_at:
+            try:
+                async with acquire() as conn:
+                    self.set_head(await latest_block_query().run(conn))
+                self._stats["polls"] += 1
+            except ReqlError as err:
+                LOGGER.debug("Head block poll failed: %s", err)
+            await asyncio.sleep(self.poll_interval)
+
+
+def open_tracker(**kwargs):
+    """Create the head block tracker for this worker."""
+    global _TRACKER  # pylint: disable=global-statement
+    _TRACKER = HeadBlockTracker(**kwargs)
+    return _TRACKER
+
+
+def get_tracker():
+    """Return the worker's head block tracker, creating a default one if
+    needed. A tracker that is not watched never reports a head.
+    """
+    global _TRACKER  # pylint: disable=global-statement
+    if _TRACKER is None:
+        _TRACKER = HeadBlockTracker()
+    return _TRACKER
@@ -25,11 +25,16 @@ from rbac.common.config import get_config
 from rbac.common.crypto.keys import Key
 from rbac.common.logs import get_default_logger
 from rbac.common.sawtooth.messaging import Connection
+from rbac.server.api import auth_cache
+from rbac.server.api import head_block
+from rbac.server.api import notifications
+from rbac.server.api import search_index
+from rbac.server.api import table_counts
 from rbac.server.api.auth import AUTH_BP
 from rbac.server.api.blocks import BLOCKS_BP
 from rbac.server.api.chatbot import handle_chatbot_socket
 from rbac.server.api.errors import ERRORS_BP
-from rbac.server.api.feed import handle_feed_socket
+from rbac.server.api.feed import handle_feed_disconnect, handle_feed_socket, open_feed
 from rbac.server.api.packs import PACKS_BP
 from rbac.server.api.proposals import PROPOSALS_BP
 from rbac.server.api.roles import ROLES_BP
@@ -37,7 +42,10 @@ from rbac.server.api.search import SEARCH_BP
 from rbac.server.api.tasks import TASKS_BP
 from rbac.server.api.users import USERS_BP
 from rbac.server.api.webhooks import WEBHOOKS_BP
-from rbac.server.db.db_utils import create_connection
+from rbac.server.blockchain_transactions import signing
+from rbac.server.db import connection_pool
+from rbac.server.db.index_migrations import wait_for_indexes
+from rbac.server.db.retry import retry_metrics
 
 APP_BP = Blueprint("utils")
 LOGGER = get_default_logger(__name__)
@@ -67,17 +75,34 @@ def load_config(app):
             "description": "Paste your auth token.",
         }
     }
+    app.config.AUTH_CACHE_KEY_TTL = int(get_config("AUTH_CACHE_KEY_TTL"))
+    app.config.AUTH_CACHE_MAX_SIZE = int(get_config("AUTH_CACHE_MAX_SIZE"))
+    app.config.AUTH_CACHE_TTL = int(get_config("AUTH_CACHE_TTL"))
     app.config.BATCHER_KEY_PAIR = Key()
     app.config.CHATBOT_HOST = get_config("CHATBOT_HOST")
     app.config.CHATBOT_PORT = get_config("CHATBOT_PORT")
     app.config.CLIENT_HOST = get_config("CLIENT_HOST")
     app.config.CLIENT_PORT = int(get_config("CLIENT_PORT"))
     app.config.DB_HOST = get_config("DB_HOST")
+    app.config.DB_INDEX_WAIT_TIMEOUT = int(get_config("DB_INDEX_WAIT_TIMEOUT"))
     app.config.DB_NAME = get_config("DB_NAME")
+    app.config.DB_POOL_HEALTH_CHECK_INTERVAL = int(
+        get_config("DB_POOL_HEALTH_CHECK_INTERVAL")
+    )
+    app.config.DB_POOL_MAX_IDLE = int(get_config("DB_POOL_MAX_IDLE"))
+    app.config.DB_POOL_MAX_SIZE = int(get_config("DB_POOL_MAX_SIZE"))
     app.config.DB_PORT = int(get_config("DB_PORT"))
     app.config.DEBUG = bool(get_config("DEBUG"))
+    app.config.HEAD_BLOCK_CACHE_SIZE = int(get_config("HEAD_BLOCK_CACHE_SIZE"))
+    app.config.HEAD_BLOCK_POLL_INTERVAL = int(get_config("HEAD_BLOCK_POLL_INTERVAL"))
     app.config.LOGGING_LEVEL = get_config("LOGGING_LEVEL")
+    app.config.NOTIFICATION_BATCH_SIZE = int(get_config("NOTIFICATION_BATCH_SIZE"))
+    app.config.NOTIFICATION_FLUSH_INTERVAL = int(
+        get_config("NOTIFICATION_FLUSH_INTERVAL")
+    )
+    app.config.NOTIFICATION_QUEUE_SIZE = int(get_config("NOTIFICATION_QUEUE_SIZE"))
     app.config.SECRET_KEY = get_config("SECRET_KEY")
+    app.config.SIGNING_PROCESSES = int(get_config("SIGNING_PROCESSES"))
     app.config.PORT = int(get_config("SERVER_PORT"))
     app.config.TIMEOUT = int(get_config("TIMEOUT"))
     app.config.VALIDATOR = get_config("VALIDATOR")
@@ -90,7 +115,47 @@ def register_middleware(app, sio):
     @app.listener("before_server_start")
     async def init(app, loop):
         """Open database / validator connections and async HTTP session"""
-        app.config.DB_CONN = await create_connection()
+        app.config.DB_POOL = await connection_pool.open_pool(
+            max_size=app.config.DB_POOL_MAX_SIZE,
+            max_idle=app.config.DB_POOL_MAX_IDLE,
+            health_check_interval=app.config.DB_POOL_HEALTH_CHECK_INTERVAL,
+        )
+        async with connection_pool.acquire() as db_conn:
+            missing_indexes = await wait_for_indexes(
+                db_conn, app.config.DB_INDEX_WAIT_TIMEOUT / 1000
+            )
+        if missing_indexes:
+            LOGGER.warning(
+                "Missing database indexes %s, run bin/setup_db to apply "
+                "index migrations",
+                ", ".join(missing_indexes),
+            )
+        app.config.AUTH_CACHE = auth_cache.open_cache(
+            max_size=app.config.AUTH_CACHE_MAX_SIZE,
+            ttl=app.config.AUTH_CACHE_TTL,
+            key_ttl=app.config.AUTH_CACHE_KEY_TTL,
+        )
+        app.config.AUTH_CACHE_WATCHER = loop.create_task(app.config.AUTH_CACHE.watch())
+        app.config.HEAD_BLOCK = head_block.open_tracker(
+            poll_interval=app.config.HEAD_BLOCK_POLL_INTERVAL / 1000,
+            max_blocks=app.config.HEAD_BLOCK_CACHE_SIZE,
+        )
+        app.config.HEAD_BLOCK_WATCHER = loop.create_task(app.config.HEAD_BLOCK.watch())
+        app.config.NOTIFICATIONS = notifications.open_writer(
+            max_batch=app.config.NOTIFICATION_BATCH_SIZE,
+            flush_interval=app.config.NOTIFICATION_FLUSH_INTERVAL / 1000,
+            max_queue=app.config.NOTIFICATION_QUEUE_SIZE,
+        )
+        app.config.PROPOSAL_FEED = open_feed(sio)
+        app.config.PROPOSAL_FEED_WATCHER = loop.create_task(
+            app.config.PROPOSAL_FEED.watch()
+        )
+        app.config.TABLE_COUNTS = table_counts.open_counts()
+        app.config.SEARCH_INDEX = search_index.open_index()
+        app.config.SEARCH_INDEX_WATCHER = loop.create_task(
+            app.config.SEARCH_INDEX.watch()
+        )
+        signing.open_executor(app.config.SIGNING_PROCESSES)
         app.config.VAL_CONN = Connection(app.config.VALIDATOR)
         app.config.VAL_CONN.open()
         conn = aiohttp.TCPConnector(
@@ -102,7 +167,24 @@ def register_middleware(app, sio):
     @app.listener("after_server_stop")
     async def finish(app, loop):
         """Close connections"""
-        app.config.DB_CONN.close()
+        LOGGER.info("Database pool metrics: %s", app.config.DB_POOL.metrics())
+        LOGGER.info("Auth cache metrics: %s", app.config.AUTH_CACHE.metrics())
+        LOGGER.info("Head block metrics: %s", app.config.HEAD_BLOCK.metrics())
+        LOGGER.info("Proposal feed metrics: %s", app.config.PROPOSAL_FEED.metrics())
+        LOGGER.info("Search index metrics: %s", app.config.SEARCH_INDEX.metrics())
+        LOGGER.info("Table count metrics: %s", app.config.TABLE_COUNTS.metrics())
+        LOGGER.info("Retry metrics: %s", retry_metrics())
+        app.config.AUTH_CACHE_WATCHER.cancel()
+        app.config.HEAD_BLOCK_WATCHER.cancel()
+        app.config.PROPOSAL_FEED_WATCHER.cancel()
+        app.config.SEARCH_INDEX_WATCHER.cancel()
+        app.config.TABLE_COUNTS.close()
+        await app.config.NOTIFICATIONS.close()
+        LOGGER.info(
+            "Notification writer metrics: %s", app.config.NOTIFICATIONS.metrics()
+        )
+        await connection_pool.close_pool()
+        signing.close_executor()
         app.config.VAL_CONN.close()
         LOGGER.info(loop)
         await app.config.HTTP_SESSION.close()
@@ -113,9 +195,14 @@ def register_middleware(app, sio):
         await handle_chatbot_socket(sio, sid, data)
 
     @sio.event
-    async def feed(_sid, data):
+    async def feed(sid, data):
         """Route feed WebSocket events to handler"""
-        await handle_feed_socket(sio, data)
+        await handle_feed_socket(sid, data)
+
+    @sio.event
+    async def disconnect(sid):
+        """Drop the feed subscription of a disconnected socket"""
+        handle_feed_disconnect(sid)
 
 
 def main():
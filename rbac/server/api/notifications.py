@@ -0,0 +1,181 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Per-worker queue of notifications rows, written with bulk inserts.
+
+Requests only enqueue notifications. A background flusher inserts the
+queued rows max_batch at a time, or whatever is queued once flush_interval
+has passed since the first of them was queued. The queue holds at most
+max_queue rows; when it is full, enqueuing waits for the flusher to catch
+up. Closing the writer flushes every queued row before it returns.
+"""
+import asyncio
+import collections
+import datetime
+
+import rethinkdb as r
+from rethinkdb import ReqlDriverError
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.connection_pool import acquire
+from rbac.server.db.retry import retry
+
+LOGGER = get_default_logger(__name__)
+
+DEFAULT_MAX_BATCH = 500
+DEFAULT_FLUSH_INTERVAL = 0.1
+DEFAULT_MAX_QUEUE = 10000
+
+_WRITER = None
+
+
+def notification_row(next_id, proposal_id, frequency=0):
+    """Make a notifications row, timestamped when it is made."""
+    return {
+        "next_id": next_id,
+        "proposal_id": proposal_id,
+        "frequency": frequency,
+        "timestamp": datetime.datetime.now(r.make_timezone("00:00")),
+    }
+
+
+async def insert_notifications(rows):
+    """Insert notifications rows with one query, retrying connection errors."""
+
+    async def insert():
+        async with acquire() as conn:
+            return await r.table("notifications").insert(rows).run(conn)
+
+    return await retry(insert, retry_on=(ReqlDriverError,), name="insert_notifications")
+
+
+class NotificationWriter:
+    """Queue of notifications rows and the task that flushes it.
+
+    Args:
+        max_batch:
+            int: most rows written by one insert
+        flush_interval:
+            float: most seconds a row waits for its batch to fill
+        max_queue:
+            int: most rows queued before enqueuing waits
+        insert:
+            coroutine function: writes a list of rows
+    """
+
+    def __init__(
+        self,
+        max_batch=DEFAULT_MAX_BATCH,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        max_queue=DEFAULT_MAX_QUEUE,
+        insert=insert_notifications,
+    ):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._insert = insert
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._batch_full = asyncio.Event()
+        self._flusher = None
+        self._closing = False
+        self._stats = collections.Counter()
+
+    @property
+    def running(self):
+        """Whether the writer accepts rows."""
+        return (
+            self._flusher is not None and not self._flusher.done() and not self._closing
+        )
+
+    def start(self):
+        """Start the flusher task."""
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_forever())
+        return self._flusher
+
+    async def put(self, row):
+        """Queue a row, waiting while the queue is full."""
+        if not self.running:
+            raise RuntimeError("Notification writer is not running")
+        if self._queue.full():
+            self._stats["waits"] += 1
+        await self._queue.put(row)
+        self._stats["queued"] += 1
+        if self._queue.qsize() >= self.max_batch:
+            self._batch_full.set()
+
+    async def close(self):
+        """Stop accepting rows and write every row still queued."""
+        self._closing = True
+        self._batch_full.set()
+        if self._flusher is not None:
+            # a flusher that died can't drain the queue, don't wait on it
+            drained = asyncio.ensure_future(self._queue.join())
+            await asyncio.wait(
+                [drained, self._flusher], return_when=asyncio.FIRST_COMPLETED
+            )
+            drained.cancel()
+            self._flusher.cancel()
+            self._flusher = None
+
+    def metrics(self):
+        """Return a snapshot of writer counters."""
+        return {
+            "queue": self._queue.qsize(),
+            "queued": self._stats["queued"],
+            "written": self._stats["written"],
+            "dropped": self._stats["dropped"],
+            "batches": self._stats["batches"],
+            "waits": self._stats["waits"],
+        }
+
+    async def _flush_forever(self):
+        while True:
+            rows = [await self._queue.get()]
+            if not self._closing and self._queue.qsize() + 1 < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            if not self._closing:
+                self._batch_full.clear()
+            while len(rows) < self.max_batch and not self._queue.empty():
+                rows.append(self._queue.get_nowait())
+            await self._write(rows)
+
+    async def _write(self, rows):
+        try:
+            await self._insert(rows)
+            self._stats["written"] += len(rows)
+            self._stats["batches"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            self._stats["dropped"] += len(rows)
+            LOGGER.error("Dropped %s notifications: %s", len(rows), err)
+        finally:
+            for _ in rows:
+                self._queue.task_done()
+
+
+def open_writer(**kwargs):
+    """Create and start the notification writer for this worker."""
+    global _WRITER  # pylint: disable=global-statement
+    _WRITER = NotificationWriter(**kwargs)
+    _WRITER.start()
+    return _WRITER
+
+
+def get_writer():
+    """Return the worker's notification writer, or None if not opened."""
+    return _WRITER
@@ -13,9 +13,13 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 """Proposals APIs."""
+import collections
+
 from sanic import Blueprint
 from sanic.response import json
 from sanic_openapi import doc
+from sawtooth_sdk.protobuf.batch_pb2 import BatchList
+from sawtooth_sdk.protobuf.client_batch_submit_pb2 import ClientBatchStatus
 
 from rbac.common.logs import get_default_logger
 from rbac.common.role import Role
@@ -26,18 +30,21 @@ from rbac.server.api.auth import authorized
 from rbac.server.api.errors import ApiBadRequest, ApiUnauthorized
 from rbac.server.api.utils import (
     create_response,
+    get_batch_status_error,
     get_request_block,
     get_request_paging_info,
     get_transactor_key,
     log_request,
     send,
+    send_batches,
     send_notification,
     validate_fields,
 )
+from rbac.server.blockchain_transactions.signing import make_batches, sign_transactions
 from rbac.server.db import proposals_query
-from rbac.server.db.relationships_query import fetch_relationships
-from rbac.server.db.db_utils import create_connection
-from rbac.server.db.users_query import fetch_manager_chain, get_next_admins
+from rbac.server.db.relationships_query import fetch_relationships_bulk
+from rbac.server.db.connection_pool import acquire
+from rbac.server.db.users_query import fetch_manager_chains, get_next_admins
 
 LOGGER = get_default_logger(__name__)
 
@@ -144,16 +151,14 @@ async def get_all_proposals(request):
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    conn = await create_connection()
-    proposals = await proposals_query.fetch_all_proposal_resources(conn, start, limit)
-    proposal_resources = []
-    for proposal in proposals:
-        proposal_resource = await compile_proposal_resource(conn, proposal)
-        proposal_resources.append(proposal_resource)
-    conn.close()
-    return await create_response(
-        conn, request.url, proposal_resources, head_block, start=start, limit=limit
-    )
+    async with acquire() as conn:
+        proposals = await proposals_query.fetch_all_proposal_resources(
+            conn, start, limit
+        )
+        proposal_resources = await compile_proposal_resources(conn, proposals)
+        return await create_response(
+            conn, request.url, proposal_resources, head_block, start=start, limit=limit
+        )
 
 
 @PROPOSALS_BP.get("api/proposals/<proposal_id>")
@@ -197,11 +202,10 @@ async def get_proposal(request, proposal_id):
     log_request(request)
     proposal_id = escape_user_input(proposal_id)
     head_block = await get_request_block(request)
-    conn = await create_connection()
-    proposal = await proposals_query.fetch_proposal_resource(conn, proposal_id)
-    proposal_resource = await compile_proposal_resource(conn, proposal)
-    conn.close()
-    return await create_response(conn, request.url, proposal_resource, head_block)
+    async with acquire() as conn:
+        proposal = await proposals_query.fetch_proposal_resource(conn, proposal_id)
+        proposal_resource = await compile_proposal_resource(conn, proposal)
+        return await create_response(conn, request.url, proposal_resource, head_block)
 
 
 @PROPOSALS_BP.patch("api/proposals")
@@ -217,8 +221,9 @@ async def get_proposal(request, proposal_id):
     content_type="application/json",
 )
 @doc.produces(
-    {"proposal_ids": [str]},
-    description="List of proposals that were successfully updated",
+    {"proposal_ids": [str], "errors": [{"id": str, "message": str}]},
+    description="List of proposals that were successfully updated, and the "
+    "reason each of the others failed",
     content_type="application/json",
 )
 @doc.response(
@@ -235,14 +240,126 @@ async def get_proposal(request, proposal_id):
 @doc.operation("update_proposals")
 @authorized()
 async def batch_update_proposals(request):
-    """Update multiple proposals"""
+    """Update multiple proposals with a single batch list submission"""
     log_request(request)
-    required_fields = ["ids"]
+    required_fields = ["ids", "reason", "status"]
     validate_fields(required_fields, request.json)
-    proposal_ids_list = escape_user_input(request.json["ids"])
-    for proposal_id in proposal_ids_list:
-        await update_proposal(request, proposal_id)
-    return json({"proposal_ids": proposal_ids_list})
+    # a proposal listed twice would be submitted in two batches
+    proposal_ids_list = list(
+        collections.OrderedDict.fromkeys(escape_user_input(request.json["ids"]))
+    )
+    proposal_status = escape_user_input(request.json.get("status"))
+    if proposal_status not in ("REJECTED", "APPROVED"):
+        raise ApiBadRequest(
+            "Bad Request: status must be either 'REJECTED' or 'APPROVED'"
+        )
+    txn_key, txn_user_id = await get_transactor_key(request=request)
+
+    async with acquire() as conn:
+        proposals = await proposals_query.fetch_proposal_resources(
+            conn, proposal_ids_list
+        )
+        approved, errors = await authorize_proposal_updates(
+            conn, proposal_ids_list, proposals, txn_user_id
+        )
+    batch_list, batch_proposal_ids, make_errors = await make_proposal_updates(
+        approved,
+        proposal_status,
+        escape_user_input(request.json.get("reason")),
+        txn_key,
+        txn_user_id,
+    )
+    errors.extend(make_errors)
+
+    updated = []
+    if batch_list.batches:
+        statuses = await send_batches(
+            request.app.config.VAL_CONN, batch_list, request.app.config.TIMEOUT
+        )
+        for batch_status in statuses:
+            proposal_id = batch_proposal_ids[batch_status.batch_id]
+            if batch_status.status == ClientBatchStatus.COMMITTED:
+                updated.append(proposal_id)
+                await send_notification(
+                    proposals[proposal_id].get("target"), proposal_id
+                )
+            else:
+                errors.append(
+                    {"id": proposal_id, "message": get_batch_status_error(batch_status)}
+                )
+    return json({"proposal_ids": updated, "errors": errors})
+
+
+async def authorize_proposal_updates(conn, proposal_ids, proposals, txn_user_id):
+    """Check the user is an approver of each proposal. The approvers of all
+    the proposals are fetched together.
+    Returns:
+        tuple: list of authorized proposal resources, list of errors
+    """
+    approved = []
+    errors = []
+    found = [proposals[pid] for pid in proposal_ids if pid in proposals]
+    compiled = await compile_proposal_resources(
+        conn, [dict(proposal) for proposal in found]
+    )
+    approvers = {proposal["id"]: proposal["approvers"] for proposal in compiled}
+    for proposal_id in proposal_ids:
+        if proposal_id not in proposals:
+            errors.append(
+                {
+                    "id": proposal_id,
+                    "message": "Not Found: No proposal with the id {} exists".format(
+                        proposal_id
+                    ),
+                }
+            )
+        elif txn_user_id not in approvers[proposal_id]:
+            errors.append(
+                {
+                    "id": proposal_id,
+                    "message": "Bad Request: You don't have the authorization to "
+                    "APPROVE or REJECT the proposal",
+                }
+            )
+        else:
+            approved.append(proposals[proposal_id])
+    return approved, errors
+
+
+async def make_proposal_updates(proposals, status, reason, txn_key, txn_user_id):
+    """Build a batch list with a batch for each proposal update, so each
+    proposal is committed or rejected on its own.
+    Returns:
+        tuple: the batch list, dict of proposal_id by batch id, list of errors
+    """
+    payloads = []
+    proposal_ids = []
+    errors = []
+    for proposal in proposals:
+        transaction = PROPOSAL_TRANSACTION[proposal["type"]][status]
+        try:
+            message = transaction.make(
+                proposal_id=proposal["id"],
+                object_id=proposal.get("object"),
+                related_id=proposal.get("target"),
+                reason=reason,
+            )
+            payloads.append(
+                transaction.make_payload(
+                    message=message, signer_keypair=txn_key, signer_user_id=txn_user_id
+                )
+            )
+            proposal_ids.append(proposal["id"])
+        except (TypeError, ValueError) as err:
+            errors.append({"id": proposal["id"], "message": str(err)})
+
+    transactions = await sign_transactions(payloads, txn_key)
+    batches = await make_batches(transactions, txn_key)
+    batch_proposal_ids = {
+        batch.header_signature: proposal_id
+        for batch, proposal_id in zip(batches, proposal_ids)
+    }
+    return BatchList(batches=batches), batch_proposal_ids, errors
 
 
 @PROPOSALS_BP.patch("api/proposals/<proposal_id>")
@@ -288,12 +405,11 @@ async def update_proposal(request, proposal_id):
         )
     txn_key, txn_user_id = await get_transactor_key(request=request)
 
-    conn = await create_connection()
-    proposal_resource = await proposals_query.fetch_proposal_resource(
-        conn, proposal_id=proposal_id
-    )
-    approvers_list = await compile_proposal_resource(conn, proposal_resource)
-    conn.close()
+    async with acquire() as conn:
+        proposal_resource = await proposals_query.fetch_proposal_resource(
+            conn, proposal_id=proposal_id
+        )
+        approvers_list = await compile_proposal_resource(conn, proposal_resource)
     if txn_user_id not in approvers_list["approvers"]:
         raise ApiUnauthorized(
             "Bad Request: You don't have the authorization to APPROVE or REJECT the proposal"
@@ -315,42 +431,51 @@ async def update_proposal(request, proposal_id):
 
 async def compile_proposal_resource(conn, proposal_resource):
     """ Prepare proposal resource to be returned."""
-    conn.reconnect(noreply_wait=False)
-    table = TABLES[proposal_resource["type"]]
-    if "role" in table:
-        proposal_resource["approvers"] = await fetch_relationships(
-            table, "role_id", proposal_resource.get("object")
-        ).run(conn)
-
-    elif "task" in table:
-        proposal_resource["approvers"] = await fetch_relationships(
-            table, "task_id", proposal_resource.get("object")
-        ).run(conn)
-    elif "users" in table:
-        proposal_resource["approvers"] = await get_next_admins(conn)
-        return proposal_resource
-
-    # Fetch manager chain for each user in approvers list for proposals
-    # that are not UpdateUserManager proposals
-    i = 0
-    approvers_count = len(proposal_resource["approvers"])
-    final_list_of_manager_ids = []
-    while i < approvers_count:
-        list_of_manager_ids = await fetch_manager_chain(
-            conn, proposal_resource["approvers"][i]
+    compiled = await compile_proposal_resources(conn, [proposal_resource])
+    return compiled[0]
+
+
+async def compile_proposal_resources(conn, proposal_resources):
+    """ Prepare a page of proposal resources to be returned. The approvers
+    of every proposal, and their manager chains, are fetched together.
+    """
+    objects = collections.defaultdict(set)
+    for proposal_resource in proposal_resources:
+        table = TABLES[proposal_resource["type"]]
+        if table != "users":
+            objects[table].add(proposal_resource.get("object"))
+
+    relationships = {}
+    for table, object_ids in objects.items():
+        index = "role_id" if "role" in table else "task_id"
+        rows = await fetch_relationships_bulk(table, index, object_ids).run(conn)
+        for row in rows:
+            relationships.setdefault((table, row[index]), []).extend(row["identifiers"])
+
+    approver_ids = {
+        approver for approvers in relationships.values() for approver in approvers
+    }
+    manager_chains = await fetch_manager_chains(conn, approver_ids)
+    next_admins = None
+
+    for proposal_resource in proposal_resources:
+        table = TABLES[proposal_resource["type"]]
+        if table == "users":
+            if next_admins is None:
+                next_admins = await get_next_admins(conn)
+            proposal_resource["approvers"] = list(next_admins)
+            continue
+        approvers = relationships.get((table, proposal_resource.get("object")), [])
+        # Managers of each approver come first, followed by the approvers
+        # themselves, keeping the first occurrence of each id
+        proposal_resource["approvers"] = list(
+            collections.OrderedDict.fromkeys(
+                [
+                    manager_id
+                    for approver in approvers
+                    for manager_id in manager_chains[approver]
+                ]
+                + approvers
+            )
         )
-        final_list_of_manager_ids = final_list_of_manager_ids + list_of_manager_ids
-        i += 1
-    proposal_resource["approvers"] = (
-        final_list_of_manager_ids + proposal_resource["approvers"]
-    )
-    i = 0
-    duplicate_approvers_count = len(proposal_resource["approvers"])
-    unique_approver_ids = []
-    while i < duplicate_approvers_count:
-        if proposal_resource["approvers"][i] not in unique_approver_ids:
-            unique_approver_ids.append(proposal_resource["approvers"][i])
-        i += 1
-    proposal_resource["approvers"] = unique_approver_ids
-    conn.close()
-    return proposal_resource
+    return proposal_resources
@@ -36,6 +36,7 @@ from rbac.server.api.errors import (
     handle_errors,
 )
 from rbac.server.api.auth import authorized
+from rbac.server.blockchain_transactions.signing import make_batch
 from rbac.server.blockchain_transactions.role_transaction import (
     create_del_role_txns,
     create_del_ownr_by_role_txns,
@@ -49,7 +50,9 @@ from rbac.server.api.utils import (
     check_role_owner_status,
     create_response,
     create_tracker_response,
+    encode_cursor,
     get_request_block,
+    get_request_cursor,
     get_request_paging_info,
     get_transactor_key,
     log_request,
@@ -59,7 +62,7 @@ from rbac.server.api.utils import (
 )
 from rbac.server.db import proposals_query
 from rbac.server.db import roles_query
-from rbac.server.db.db_utils import create_connection
+from rbac.server.db.connection_pool import acquire
 from rbac.server.db.relationships_query import fetch_relationships
 
 GROUP_BASE_DN = os.getenv("GROUP_BASE_DN")
@@ -74,6 +77,7 @@ ROLES_BP = Blueprint("roles")
 @doc.consumes({"head": str}, location="query")
 @doc.consumes({"start": int}, location="query")
 @doc.consumes({"limit": int}, location="query")
+@doc.consumes({"cursor": str}, location="query")
 @doc.produces(
     {
         "data": [
@@ -120,12 +124,30 @@ async def get_all_roles(request):
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    conn = await create_connection()
-    role_resources = await roles_query.fetch_all_role_resources(conn, start, limit)
-    conn.close()
-    return await create_response(
-        conn, request.url, role_resources, head_block, start=start, limit=limit
-    )
+    keyset, after = get_request_cursor(request, roles_query.ROLE_CURSOR_LENGTH)
+    async with acquire() as conn:
+        if keyset:
+            role_resources = await roles_query.fetch_role_resources_after(
+                conn, after, limit
+            )
+            next_cursor = None
+            if len(role_resources) == limit:
+                next_cursor = encode_cursor(
+                    roles_query.role_cursor_key(role_resources[-1])
+                )
+            return await create_response(
+                conn,
+                request.url,
+                role_resources,
+                head_block,
+                limit=limit,
+                keyset=True,
+                next_cursor=next_cursor,
+            )
+        role_resources = await roles_query.fetch_all_role_resources(conn, start, limit)
+        return await create_response(
+            conn, request.url, role_resources, head_block, start=start, limit=limit
+        )
 
 
 @ROLES_BP.post("api/roles")
@@ -197,9 +219,8 @@ async def create_new_role(request):
     validate_fields(required_fields, request.json)
 
     role_title = " ".join(escape_user_input(request.json.get("name")).split())
-    conn = await create_connection()
-    response = await roles_query.roles_search_duplicate(conn, role_title)
-    conn.close()
+    async with acquire() as conn:
+        response = await roles_query.roles_search_duplicate(conn, role_title)
     if not response:
         txn_key, txn_user_id = await get_transactor_key(request)
         role_id = str(uuid4())
@@ -281,12 +302,11 @@ async def get_role(request, role_id):
     """Get a specific role by role_id."""
     log_request(request)
     head_block = await get_request_block(request)
-    conn = await create_connection()
-    role_resource = await roles_query.fetch_role_resource(
-        conn, escape_user_input(role_id)
-    )
-    conn.close()
-    return await create_response(conn, request.url, role_resource, head_block)
+    async with acquire() as conn:
+        role_resource = await roles_query.fetch_role_resource(
+            conn, escape_user_input(role_id)
+        )
+        return await create_response(conn, request.url, role_resource, head_block)
 
 
 @ROLES_BP.get("api/roles/check")
@@ -307,11 +327,10 @@ async def get_role(request, role_id):
 async def check_role_name(request):
     """Check if a role exists with provided name."""
     log_request(request)
-    conn = await create_connection()
-    response = await roles_query.roles_search_duplicate(
-        conn, escape_user_input(request.args.get("name"))
-    )
-    conn.close()
+    async with acquire() as conn:
+        response = await roles_query.roles_search_duplicate(
+            conn, escape_user_input(request.args.get("name"))
+        )
     return json({"exists": bool(response)})
 
 
@@ -430,17 +449,16 @@ async def delete_role(request, role_id):
     txn_key, txn_user_id = await get_transactor_key(request)
 
     # does the role exist?
-    conn = await create_connection()
-    if not await roles_query.does_role_exist(conn, role_id):
-        LOGGER.warning(
-            "Nonexistent Role – User %s is attempting to delete the nonexistent role %s",
-            txn_user_id,
-            role_id,
-        )
-        return await handle_not_found(
-            request, ApiNotFound("The targeted role does not exist.")
-        )
-    conn.close()
+    async with acquire() as conn:
+        if not await roles_query.does_role_exist(conn, role_id):
+            LOGGER.warning(
+                "Nonexistent Role – User %s is attempting to delete the nonexistent role %s",
+                txn_user_id,
+                role_id,
+            )
+            return await handle_not_found(
+                request, ApiNotFound("The targeted role does not exist.")
+            )
     is_role_owner = await check_role_owner_status(txn_user_id, role_id)
     if not is_role_owner:
         is_admin = await check_admin_status(txn_user_id)
@@ -474,7 +492,7 @@ async def delete_role(request, role_id):
             ApiInternalError("Internal Error: Oops! Something broke on our end."),
         )
 
-    batch = batcher.make_batch_from_txns(transactions=txn_list, signer_keypair=txn_key)
+    batch = await make_batch(txn_list, txn_key)
     batch_list = batcher.batch_to_list(batch=batch)
     await send(request.app.config.VAL_CONN, batch_list, request.app.config.TIMEOUT)
     return json(
@@ -531,9 +549,10 @@ async def add_role_admin(request, role_id):
     role_id = escape_user_input(role_id)
     txn_key, txn_user_id = await get_transactor_key(request)
     proposal_id = str(uuid4())
-    conn = await create_connection()
-    approver = await fetch_relationships("role_admins", "role_id", role_id).run(conn)
-    conn.close()
+    async with acquire() as conn:
+        approver = await fetch_relationships("role_admins", "role_id", role_id).run(
+            conn
+        )
     batch_list = Role().admin.propose.batch_list(
         signer_keypair=txn_key,
         signer_user_id=txn_user_id,
@@ -604,10 +623,11 @@ async def add_role_member(request, role_id):
     txn_key, txn_user_id = await get_transactor_key(request)
     proposal_id = str(uuid4())
 
-    conn = await create_connection()
-    approver = await fetch_relationships("role_owners", "role_id", role_id).run(conn)
-    role_resource = await roles_query.fetch_role_resource(conn, role_id)
-    conn.close()
+    async with acquire() as conn:
+        approver = await fetch_relationships("role_owners", "role_id", role_id).run(
+            conn
+        )
+        role_resource = await roles_query.fetch_role_resource(conn, role_id)
 
     owners = role_resource.get("owners")
 
@@ -724,9 +744,10 @@ async def add_role_owner(request, role_id):
     role_id = escape_user_input(role_id)
     txn_key, txn_user_id = await get_transactor_key(request)
     proposal_id = str(uuid4())
-    conn = await create_connection()
-    approver = await fetch_relationships("role_admins", "role_id", role_id).run(conn)
-    conn.close()
+    async with acquire() as conn:
+        approver = await fetch_relationships("role_admins", "role_id", role_id).run(
+            conn
+        )
     batch_list = Role().owner.propose.batch_list(
         signer_keypair=txn_key,
         signer_user_id=txn_user_id,
@@ -781,9 +802,10 @@ async def add_role_task(request, role_id):
     task_id = escape_user_input(request.json.get("id"))
     txn_key, txn_user_id = await get_transactor_key(request)
     proposal_id = str(uuid4())
-    conn = await create_connection()
-    approver = await fetch_relationships("task_owners", "task_id", task_id).run(conn)
-    conn.close()
+    async with acquire() as conn:
+        approver = await fetch_relationships("task_owners", "task_id", task_id).run(
+            conn
+        )
     batch_list = Role().task.propose.batch_list(
         signer_keypair=txn_key,
         signer_user_id=txn_user_id,
@@ -807,9 +829,10 @@ async def reject_roles_proposals(role_id, request):
             obj: a request object
     """
     # Get all open proposals associated with the role
-    conn = await create_connection()
-    role_proposals = await proposals_query.fetch_open_proposals_by_role(conn, role_id)
-    conn.close()
+    async with acquire() as conn:
+        role_proposals = await proposals_query.fetch_open_proposals_by_role(
+            conn, role_id
+        )
 
     # Update to rejected:
     txn_key, txn_user_id = await get_transactor_key(request=request)
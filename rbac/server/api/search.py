@@ -13,6 +13,7 @@
 # limitations under the License.
 # ------------------------------------------------------------------------------
 """APIs and functions utilized to search."""
+import asyncio
 import math
 from re import escape
 
@@ -24,15 +25,51 @@ from rbac.common.logs import get_default_logger
 from rbac.providers.common.common import escape_user_input
 from rbac.server.api.auth import authorized
 from rbac.server.api.errors import ApiBadRequest
+from rbac.server.api.search_index import get_index
 from rbac.server.api.utils import log_request, validate_fields
-from rbac.server.db.db_utils import create_connection
-from rbac.server.db.packs_query import search_packs, search_packs_count
-from rbac.server.db.roles_query import search_roles, search_roles_count
-from rbac.server.db.users_query import search_users, search_users_count
+from rbac.server.db.connection_pool import acquire
+from rbac.server.db.packs_query import (
+    fetch_pack_search_relationships,
+    search_packs,
+    search_packs_count,
+)
+from rbac.server.db.roles_query import (
+    fetch_role_search_relationships,
+    search_roles,
+    search_roles_count,
+)
+from rbac.server.db.users_query import (
+    fetch_user_search_relationships,
+    search_users,
+    search_users_count,
+)
 
 LOGGER = get_default_logger(__name__)
 SEARCH_BP = Blueprint("search")
 
+# object type -> (key of the response data, database search, database count,
+# relationships of search index results)
+SEARCH_QUERIES = {
+    "pack": (
+        "packs",
+        search_packs,
+        search_packs_count,
+        fetch_pack_search_relationships,
+    ),
+    "role": (
+        "roles",
+        search_roles,
+        search_roles_count,
+        fetch_role_search_relationships,
+    ),
+    "user": (
+        "users",
+        search_users,
+        search_users_count,
+        fetch_user_search_relationships,
+    ),
+}
+
 
 @SEARCH_BP.post("api/search")
 @doc.summary("API Endpoint to get all roles, packs, or users containing a string.")
@@ -45,9 +82,11 @@ SEARCH_BP = Blueprint("search")
                 "page": int,
                 "search_object_types": [str],
                 "search_input": str,
+                "sort": str,
             }
         },
-        description="For search_object_types, you may include: role, pack, and/or user.",
+        description="For search_object_types, you may include: role, pack, and/or "
+        "user. Results are sorted by name, or by relevance if sort is relevance.",
     ),
     location="body",
     content_type="application/json",
@@ -91,29 +130,23 @@ async def search_all(request):
     except KeyError:
         paging = (0, 50)
 
+    # Run the search of each object type concurrently
+    rank = search_query.get("sort") == "relevance"
+    object_types = [
+        object_type
+        for object_type in sorted(SEARCH_QUERIES)
+        if object_type in search_query["search_object_types"]
+    ]
+    results = await asyncio.gather(
+        *[
+            search_object_type(object_type, search_query, paging, rank)
+            for object_type in object_types
+        ]
+    )
     object_counts = []
-
-    # Run search queries
-    conn = await create_connection()
-    if "pack" in search_query["search_object_types"]:
-        # Fetch packs with search input string
-
-        pack_results = await search_packs(conn, search_query, paging)
-        data["packs"] = pack_results
-        object_counts.append(await search_packs_count(conn, search_query))
-
-    if "role" in search_query["search_object_types"]:
-        # Fetch roles with search input string
-        role_results = await search_roles(conn, search_query, paging)
-        data["roles"] = role_results
-        object_counts.append(await search_roles_count(conn, search_query))
-
-    if "user" in search_query["search_object_types"]:
-        # Fetch users with search input string
-        user_results = await search_users(conn, search_query, paging)
-        data["users"] = user_results
-        object_counts.append(await search_users_count(conn, search_query))
-    conn.close()
+    for object_type, (object_results, object_count) in zip(object_types, results):
+        data[SEARCH_QUERIES[object_type][0]] = object_results
+        object_counts.append(object_count)
 
     total_pages = get_total_pages(object_counts, search_query["page_size"])
 
@@ -122,6 +155,28 @@ async def search_all(request):
     )
 
 
+async def search_object_type(object_type, search_query, paging, rank=False):
+    """Search one object type with the search index if it is ready, or else
+    with the database queries, which always order by name.
+    Returns:
+        tuple: list of the page of results, total number of results
+    """
+    _, search, search_count, fetch_relationships = SEARCH_QUERIES[object_type]
+    index = get_index()
+    if index.ready(object_type):
+        object_results, object_count = index.search(
+            object_type, search_query["search_input"], paging, rank=rank
+        )
+        async with acquire() as conn:
+            object_results = await fetch_relationships(conn, object_results)
+        return object_results, object_count
+    async with acquire() as conn:
+        return (
+            await search(conn, search_query, paging),
+            await search_count(conn, search_query),
+        )
+
+
 def search_paginate(page_size=50, page_num=1):
     """Paginate the results for the frontend."""
     page_size = int(page_size)
@@ -0,0 +1,299 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""In-process n-gram index of packs, roles and users for the search API.
+
+Each worker loads the searchable fields of the packs, roles and users tables
+into a trigram index and keeps it current with a changefeed per table. A
+search intersects the posting sets of the input's trigrams, checks the
+candidates for the input as a case-insensitive substring, which is what the
+regex queries match, and returns one page and the total count in one pass.
+Until a table's changefeed has delivered its initial rows, searches of that
+object type fall back to the database queries.
+"""
+import asyncio
+import bisect
+import collections
+import heapq
+import re
+
+from environs import Env
+import rethinkdb as r
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.changefeeds import follow_changefeed
+from rbac.server.db.db_utils import create_connection, sanitize_query
+
+LOGGER = get_default_logger(__name__)
+
+NGRAM_SIZE = 3
+FIELD_SEPARATOR = "\x00"
+# stop intersecting trigrams at FEW_CANDIDATES, or after MAX_MISSES
+# intersections in a row kept more than MIN_NARROWING of the candidates
+FEW_CANDIDATES = 64
+MIN_NARROWING = 0.9
+MAX_MISSES = 2
+# walk documents in name order instead of sorting when more than
+# 1 / SCAN_ORDER_RATIO of them match
+SCAN_ORDER_RATIO = 16
+
+# object type -> (table, object id field, searched fields)
+SEARCH_TABLES = {
+    "pack": ("packs", "pack_id", ("name", "description")),
+    "role": ("roles", "role_id", ("name", "description")),
+    "user": ("users", "next_id", ("name", "email")),
+}
+
+_INDEX = None
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    """Return the set of substrings of length size of a text."""
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class TextIndex:
+    """Trigram index of the searched fields of one table.
+
+    Args:
+        id_field:
+            str: field holding the id returned for a document
+        fields:
+            tuple: of the fields searched, the first is sorted on
+    """
+
+    def __init__(self, id_field, fields):
+        self.id_field = id_field
+        self.fields = fields
+        # key -> (lowered fields joined by FIELD_SEPARATOR, sort key, result)
+        self._docs = {}
+        self._postings = collections.defaultdict(set)
+        # sort keys of every document, in order
+        self._order = []
+
+    def __len__(self):
+        return len(self._docs)
+
+    def put(self, key, doc):
+        """Index a document under its row key, replacing any earlier one."""
+        self.remove(key)
+        values = [str(doc.get(field) or "").lower() for field in self.fields]
+        result = {field: doc.get(field) for field in self.fields}
+        result["id"] = doc.get(self.id_field)
+        sort_key = (str(result[self.fields[0]] or ""), key)
+        self._docs[key] = (FIELD_SEPARATOR.join(values), sort_key, result)
+        bisect.insort(self._order, sort_key)
+        for gram in set().union(*(ngrams(value) for value in values)):
+            self._postings[gram].add(key)
+
+    def remove(self, key):
+        """Drop a document from the index."""
+        entry = self._docs.pop(key, None)
+        if entry is None:
+            return
+        joined, sort_key, _ = entry
+        del self._order[bisect.bisect_left(self._order, sort_key)]
+        for gram in set().union(
+            *(ngrams(value) for value in joined.split(FIELD_SEPARATOR))
+        ):
+            postings = self._postings[gram]
+            postings.discard(key)
+            if not postings:
+                del self._postings[gram]
+
+    def candidates(self, text):
+        """Keys of the documents that may contain text. Trigrams are
+        intersected, rarest first, while that still rules out candidates.
+        """
+        grams = ngrams(text)
+        if not grams:
+            return self._docs.keys()
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        found = postings[0]
+        misses = 0
+        for posting in postings[1:]:
+            if len(found) <= FEW_CANDIDATES or misses == MAX_MISSES:
+                break
+            narrowed = found & posting
+            if len(narrowed) > MIN_NARROWING * len(found):
+                misses += 1
+            else:
+                misses = 0
+            found = narrowed
+        return found
+
+    def search(self, text, start, end, rank=False):
+        """Find the documents with a field containing text, ignoring case.
+        Args:
+            text:
+                str: the text to find
+            start:
+                int: index of the first result of the page
+            end:
+                int: index after the last result of the page
+            rank:
+                bool: order by relevance instead of by name
+        Returns:
+            tuple: list of the page of results, total number of results
+        """
+        text = text.lower().replace(FIELD_SEPARATOR, "")
+        docs = self._docs
+        matches = [key for key in self.candidates(text) if text in docs[key][0]]
+        if rank:
+            page = heapq.nsmallest(
+                end,
+                matches,
+                key=lambda key: (relevance(text, docs[key][0]), docs[key][1]),
+            )
+        elif len(matches) * SCAN_ORDER_RATIO > len(docs):
+            # walk the documents in name order rather than sort many matches
+            matched = set(matches)
+            page = []
+            for _, key in self._order:
+                if key in matched:
+                    page.append(key)
+                    if len(page) == end:
+                        break
+        else:
+            page = sorted(matches, key=lambda key: docs[key][1])[:end]
+        return [dict(docs[key][2]) for key in page[start:end]], len(matches)
+
+
+def relevance(text, joined):
+    """Score how well text matches the fields of a document, lower is better:
+    the whole name, the start of the name, the start of a word of the name,
+    anywhere in the name, then anywhere in the other fields.
+    """
+    name = joined.split(FIELD_SEPARATOR, 1)[0]
+    if name == text:
+        return 0
+    if name.startswith(text):
+        return 1
+    if " " + text in name:
+        return 2
+    if text in name:
+        return 3
+    return 4
+
+
+class SearchIndex:
+    """Trigram indexes of packs, roles and users, followed by changefeeds."""
+
+    def __init__(self):
+        self.indexes = {
+            object_type: TextIndex(id_field, fields)
+            for object_type, (_, id_field, fields) in SEARCH_TABLES.items()
+        }
+        self._ready = set()
+        self._blacklist = re.compile(Env()("BLACKLISTED_USER_REGEX", "^$"))
+        self._stats = collections.Counter()
+
+    def ready(self, object_type):
+        """Whether the index of an object type is loaded and being followed."""
+        return object_type in self._ready
+
+    def search(self, object_type, search_input, paging, rank=False):
+        """Search one object type, as search_all sends search_input.
+        Returns:
+            tuple: list of the page of results, total number of results
+        """
+        if object_type != "user":
+            # the pack and role queries match the input with its special
+            # characters replaced by spaces
+            search_input = sanitize_query(search_input)
+        else:
+            search_input = re.sub(r"\\(.)", r"\1", search_input)
+        self._stats["searches"] += 1
+        return self.indexes[object_type].search(
+            search_input, paging[0], paging[1], rank=rank
+        )
+
+    def apply_change(self, object_type, change):
+        """Apply a changefeed change to the index of an object type."""
+        if "state" in change:
+            if change["state"] == "ready":
+                self._ready.add(object_type)
+            return
+        index = self.indexes[object_type]
+        old_val = change.get("old_val")
+        new_val = change.get("new_val")
+        if old_val:
+            index.remove(old_val["id"])
+        if new_val and self._searchable(object_type, new_val):
+            index.put(new_val["id"], new_val)
+        self._stats["changes"] += 1
+
+    def _searchable(self, object_type, doc):
+        if object_type != "user":
+            return True
+        username = doc.get("username")
+        return username is not None and not self._blacklist.search(username)
+
+    def metrics(self):
+        """Return a snapshot of index counters."""
+        metrics = {
+            "ready": sorted(self._ready),
+            "searches": self._stats["searches"],
+            "changes": self._stats["changes"],
+            "errors": self._stats["errors"],
+        }
+        for object_type, index in self.indexes.items():
+            metrics[object_type + "s"] = len(index)
+        return metrics
+
+    async def watch(self, connect=create_connection):
+        """Follow the changefeeds of all the searched tables until cancelled."""
+        await asyncio.gather(
+            *[
+                self._follow(object_type, connect)
+                for object_type in sorted(SEARCH_TABLES)
+            ]
+        )
+
+    async def _follow(self, object_type, connect):
+        table, id_field, fields = SEARCH_TABLES[object_type]
+        pluck = ("id", id_field, "username") + fields
+
+        def on_down():
+            self._ready.discard(object_type)
+            self.indexes[object_type] = TextIndex(id_field, fields)
+
+        await follow_changefeed(
+            lambda conn: r.table(table)
+            .pluck(*pluck)
+            .changes(include_initial=True, include_states=True)
+            .run(conn),
+            lambda change: self.apply_change(object_type, change),
+            on_down=on_down,
+            connect=connect,
+            name="search index " + table,
+            stats=self._stats,
+        )
+
+
+def open_index():
+    """Create the search index for this worker."""
+    global _INDEX  # pylint: disable=global-statement
+    _INDEX = SearchIndex()
+    return _INDEX
+
+
+def get_index():
+    """Return the worker's search index, creating an empty one if needed.
+    An index that is not watched is never ready.
+    """
+    global _INDEX  # pylint: disable=global-statement
+    if _INDEX is None:
+        _INDEX = SearchIndex()
+    return _INDEX
@@ -0,0 +1,120 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""In-process row counts of the tables behind the paged list endpoints.
+
+The first time a table's count is asked for, the worker counts it once and
+then follows the table with a changefeed, adding one for every insert and
+subtracting one for every delete. Counts are approximate: changes made
+while the count runs may be counted twice. While a table's changefeed is
+down its count is not trusted and callers count the table instead.
+"""
+import asyncio
+import collections
+
+import rethinkdb as r
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.changefeeds import follow_changefeed
+from rbac.server.db.connection_pool import acquire
+from rbac.server.db.db_utils import create_connection
+
+LOGGER = get_default_logger(__name__)
+
+_COUNTS = None
+
+
+def count_delta(change):
+    """ReQL: the change a changefeed change makes to the table's count."""
+    return r.branch(change["old_val"].eq(None), 1, change["new_val"].eq(None), -1, 0)
+
+
+class TableCounts:
+    """Row counts of tables, kept current by a changefeed per table."""
+
+    def __init__(self):
+        self._counts = {}
+        self._live = set()
+        self._watchers = {}
+        self._stats = collections.Counter()
+
+    def get(self, table):
+        """Return the count of a table, or None if it is not being followed."""
+        if table not in self._live:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return self._counts[table]
+
+    def apply_delta(self, table, delta):
+        """Apply the count_delta of a change to the count of a table."""
+        self._counts[table] += delta
+
+    def follow(self, table, connect=create_connection):
+        """Start following a table's count, unless it is already followed."""
+        if table not in self._watchers:
+            self._watchers[table] = asyncio.ensure_future(self._follow(table, connect))
+
+    def close(self):
+        """Stop following all tables."""
+        for watcher in self._watchers.values():
+            watcher.cancel()
+        self._watchers.clear()
+        self._live.clear()
+
+    def metrics(self):
+        """Return a snapshot of count counters."""
+        return {
+            "tables": sorted(self._live),
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "recounts": self._stats["recounts"],
+            "errors": self._stats["errors"],
+        }
+
+    async def _follow(self, table, connect):
+        async def recount():
+            async with acquire() as count_conn:
+                self._counts[table] = await r.table(table).count().run(count_conn)
+            self._stats["recounts"] += 1
+            self._live.add(table)
+
+        await follow_changefeed(
+            lambda conn: r.table(table)
+            .changes()
+            .map(count_delta)
+            .filter(lambda delta: delta.ne(0))
+            .run(conn),
+            lambda delta: self.apply_delta(table, delta),
+            on_up=recount,
+            on_down=lambda: self._live.discard(table),
+            connect=connect,
+            name="count " + table,
+            stats=self._stats,
+        )
+
+
+def open_counts():
+    """Create the table counts for this worker."""
+    global _COUNTS  # pylint: disable=global-statement
+    _COUNTS = TableCounts()
+    return _COUNTS
+
+
+def get_counts():
+    """Return the worker's table counts, creating them if needed."""
+    global _COUNTS  # pylint: disable=global-statement
+    if _COUNTS is None:
+        _COUNTS = TableCounts()
+    return _COUNTS
@@ -39,11 +39,13 @@ from rbac.server.api.errors import (
     ApiUnauthorized,
     handle_errors,
 )
-from rbac.server.api.proposals import compile_proposal_resource, PROPOSAL_TRANSACTION
+from rbac.server.api.proposals import compile_proposal_resources, PROPOSAL_TRANSACTION
 from rbac.server.api.utils import (
     check_admin_status,
     create_response,
+    encode_cursor,
     get_request_block,
+    get_request_cursor,
     get_request_paging_info,
     get_transactor_key,
     log_request,
@@ -55,7 +57,8 @@ from rbac.server.db import auth_query
 from rbac.server.db import proposals_query
 from rbac.server.db import roles_query
 from rbac.server.db import users_query
-from rbac.server.db.db_utils import create_connection
+from rbac.server.db.connection_pool import acquire
+from rbac.server.blockchain_transactions.signing import make_batch
 from rbac.server.blockchain_transactions.user_transaction import create_delete_user_txns
 from rbac.server.blockchain_transactions.role_transaction import (
     create_del_ownr_by_user_txns,
@@ -75,6 +78,7 @@ USERS_BP = Blueprint("users")
 @doc.consumes({"head": str}, location="query")
 @doc.consumes({"start": int}, location="query")
 @doc.consumes({"limit": int}, location="query")
+@doc.consumes({"cursor": str}, location="query")
 @doc.produces(
     {
         "data": [
@@ -125,13 +129,30 @@ async def fetch_all_users(request):
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    conn = await create_connection()
-    user_resources = await users_query.fetch_all_user_resources(conn, start, limit)
-    conn.close()
-
-    return await create_response(
-        conn, request.url, user_resources, head_block, start=start, limit=limit
-    )
+    keyset, after = get_request_cursor(request, users_query.USER_CURSOR_LENGTH)
+    async with acquire() as conn:
+        if keyset:
+            user_resources = await users_query.fetch_user_resources_after(
+                conn, after, limit
+            )
+            next_cursor = None
+            if len(user_resources) == limit:
+                next_cursor = encode_cursor(
+                    users_query.user_cursor_key(user_resources[-1])
+                )
+            return await create_response(
+                conn,
+                request.url,
+                user_resources,
+                head_block,
+                limit=limit,
+                keyset=True,
+                next_cursor=next_cursor,
+            )
+        user_resources = await users_query.fetch_all_user_resources(conn, start, limit)
+        return await create_response(
+            conn, request.url, user_resources, head_block, start=start, limit=limit
+        )
 
 
 @USERS_BP.post("api/users")
@@ -189,16 +210,14 @@ async def create_new_user(request):
     required_fields = ["name", "username", "password", "email"]
     validate_fields(required_fields, request.json)
     # Check if username already exists
-    conn = await create_connection()
-
     username = escape_user_input(request.json.get("username"))
     email = escape_user_input(request.json.get("email"))
-    if await users_query.fetch_username_match_count(conn, username) > 0:
-        # Throw Error response to Next_UI
-        return await handle_errors(
-            request, ApiTargetConflict("Username already exists.")
-        )
-    conn.close()
+    async with acquire() as conn:
+        if await users_query.fetch_username_match_count(conn, username) > 0:
+            # Throw Error response to Next_UI
+            return await handle_errors(
+                request, ApiTargetConflict("Username already exists.")
+            )
 
     # Check to see if they are trying to create the NEXT admin
     env = Env()
@@ -272,9 +291,8 @@ async def create_new_user(request):
 
     # Insert to user_mapping and close
     await auth_query.create_auth_entry(auth_entry)
-    conn = await create_connection()
-    await users_query.create_user_map_entry(conn, mapping_data)
-    conn.close()
+    async with acquire() as conn:
+        await users_query.create_user_map_entry(conn, mapping_data)
 
     # Send back success response
     return json({"data": {"user": {"id": next_id}}})
@@ -392,21 +410,19 @@ async def update_user_details(request):
     is_admin = await check_admin_status(txn_user_id)
     if not is_admin:
         raise ApiForbidden("You are not a NEXT Administrator.")
-    conn = await create_connection()
-    user = await users_query.users_search_duplicate(conn, username)
-    if user and user[0]["next_id"] != next_id:
-        conn.close()
-        raise ApiBadRequest(
-            "Username already exists. Please give a different Username."
-        )
+    async with acquire() as conn:
+        user = await users_query.users_search_duplicate(conn, username)
+        if user and user[0]["next_id"] != next_id:
+            raise ApiBadRequest(
+                "Username already exists. Please give a different Username."
+            )
 
-    # Get resources for update
-    user_info = await users_query.fetch_user_resource(conn, next_id)
+        # Get resources for update
+        user_info = await users_query.fetch_user_resource(conn, next_id)
     if "manager_id" in user_info:
         manager = user_info["manager_id"]
     else:
         manager = ""
-    conn.close()
     if request.json.get("metadata") is None or request.json.get("metadata") == {}:
         set_metadata = {}
     else:
@@ -464,13 +480,11 @@ async def get_user(request, next_id):
     """Get a specific user by next_id."""
     log_request(request)
     head_block = await get_request_block(request)
-    conn = await create_connection()
-    user_resource = await users_query.fetch_user_resource(
-        conn, escape_user_input(next_id)
-    )
-    conn.close()
-
-    return await create_response(conn, request.url, user_resource, head_block)
+    async with acquire() as conn:
+        user_resource = await users_query.fetch_user_resource(
+            conn, escape_user_input(next_id)
+        )
+        return await create_response(conn, request.url, user_resource, head_block)
 
 
 @USERS_BP.delete("api/users/<next_id>")
@@ -509,9 +523,7 @@ async def delete_user(request, next_id):
     txn_list = create_delete_user_txns(txn_key, next_id, txn_list)
 
     if txn_list:
-        batch = batcher.make_batch_from_txns(
-            transactions=txn_list, signer_keypair=txn_key
-        )
+        batch = await make_batch(txn_list, txn_key)
     batch_list = batcher.batch_to_list(batch=batch)
     await send(request.app.config.VAL_CONN, batch_list, request.app.config.TIMEOUT)
 
@@ -560,13 +572,11 @@ async def get_user_summary(request, next_id):
     """This endpoint is for returning summary data for a user, just it's next_id,name, email."""
     log_request(request)
     head_block = await get_request_block(request)
-    conn = await create_connection()
-    user_resource = await users_query.fetch_user_resource_summary(
-        conn, escape_user_input(next_id)
-    )
-    conn.close()
-
-    return await create_response(conn, request.url, user_resource, head_block)
+    async with acquire() as conn:
+        user_resource = await users_query.fetch_user_resource_summary(
+            conn, escape_user_input(next_id)
+        )
+        return await create_response(conn, request.url, user_resource, head_block)
 
 
 @USERS_BP.get("api/users/<next_id>/relationships")
@@ -604,13 +614,11 @@ async def get_user_relationships(request, next_id):
     """Get relationships for a specific user, by next_id."""
     log_request(request)
     head_block = await get_request_block(request)
-    conn = await create_connection()
-    user_resource = await users_query.fetch_user_relationships(
-        conn, escape_user_input(next_id)
-    )
-    conn.close()
-
-    return await create_response(conn, request.url, user_resource, head_block)
+    async with acquire() as conn:
+        user_resource = await users_query.fetch_user_relationships(
+            conn, escape_user_input(next_id)
+        )
+        return await create_response(conn, request.url, user_resource, head_block)
 
 
 @USERS_BP.put("api/users/<next_id>/manager")
@@ -659,9 +667,8 @@ async def update_manager(request, next_id):
     txn_key, txn_user_id = await get_transactor_key(request)
     proposal_id = str(uuid4())
     if await check_admin_status(txn_user_id):
-        conn = await create_connection()
-        next_admins_list = await users_query.get_next_admins(conn)
-        conn.close()
+        async with acquire() as conn:
+            next_admins_list = await users_query.get_next_admins(conn)
         batch_list = User().manager.propose.batch_list(
             signer_keypair=txn_key,
             signer_user_id=txn_user_id,
@@ -738,14 +745,13 @@ async def update_password(request):
     password = escape_user_input(request.json.get("password")).encode("utf-8")
     hashed_password = hashlib.pbkdf2_hmac("sha256", password, salt, 100000).hex()
 
-    conn = await create_connection()
-    await users_query.update_user_password(
-        conn,
-        escape_user_input(request.json.get("next_id")),
-        hashed_password=hashed_password,
-        salt=salt,
-    )
-    conn.close()
+    async with acquire() as conn:
+        await users_query.update_user_password(
+            conn,
+            escape_user_input(request.json.get("next_id")),
+            hashed_password=hashed_password,
+            salt=salt,
+        )
     return json({"message": "Password successfully updated"})
 
 
@@ -807,13 +813,11 @@ async def fetch_open_proposals(request, next_id):
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    conn = await create_connection()
-    proposals = await proposals_query.fetch_all_proposal_resources(conn, start, limit)
-    proposal_resources = []
-    for proposal in proposals:
-        proposal_resource = await compile_proposal_resource(conn, proposal)
-        proposal_resources.append(proposal_resource)
-    conn.close()
+    async with acquire() as conn:
+        proposals = await proposals_query.fetch_all_proposal_resources(
+            conn, start, limit
+        )
+        proposal_resources = await compile_proposal_resources(conn, proposals)
     open_proposals = []
     for proposal_resource in proposal_resources:
         if (
@@ -880,13 +884,11 @@ async def fetch_confirmed_proposals(request, next_id):
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    conn = await create_connection()
-    proposals = await proposals_query.fetch_all_proposal_resources(conn, start, limit)
-    proposal_resources = []
-    for proposal in proposals:
-        proposal_resource = await compile_proposal_resource(conn, proposal)
-        proposal_resources.append(proposal_resource)
-    conn.close()
+    async with acquire() as conn:
+        proposals = await proposals_query.fetch_all_proposal_resources(
+            conn, start, limit
+        )
+        proposal_resources = await compile_proposal_resources(conn, proposals)
 
     confirmed_proposals = []
     for proposal_resource in proposal_resources:
@@ -954,13 +956,11 @@ async def fetch_rejected_proposals(request, next_id):
     log_request(request)
     head_block = await get_request_block(request)
     start, limit = get_request_paging_info(request)
-    conn = await create_connection()
-    proposals = await proposals_query.fetch_all_proposal_resources(conn, start, limit)
-    proposal_resources = []
-    for proposal in proposals:
-        proposal_resource = await compile_proposal_resource(conn, proposal)
-        proposal_resources.append(proposal_resource)
-    conn.close()
+    async with acquire() as conn:
+        proposals = await proposals_query.fetch_all_proposal_resources(
+            conn, start, limit
+        )
+        proposal_resources = await compile_proposal_resources(conn, proposals)
 
     rejected_proposals = []
     for proposal_resource in proposal_resources:
@@ -1005,9 +1005,8 @@ async def update_expired_roles(request, next_id):
     validate_fields(required_fields, request.json)
 
     role_id = escape_user_input(request.json.get("id"))
-    conn = await create_connection()
-    await roles_query.expire_role_member(conn, role_id, escape_user_input(next_id))
-    conn.close()
+    async with acquire() as conn:
+        await roles_query.expire_role_member(conn, role_id, escape_user_input(next_id))
     return json({"role_id": role_id})
 
 
@@ -1020,9 +1019,8 @@ async def reject_users_proposals(next_id, request):
             obj: a request object
     """
     # Get all open proposals associated with the user
-    conn = await create_connection()
-    proposals = await proposals_query.fetch_open_proposals_by_user(conn, next_id)
-    conn.close()
+    async with acquire() as conn:
+        proposals = await proposals_query.fetch_open_proposals_by_user(conn, next_id)
 
     # Update to rejected:
     txn_key, txn_user_id = await get_transactor_key(request=request)
@@ -1057,9 +1055,8 @@ async def reject_users_proposals(next_id, request):
 async def check_user_name(request):
     """Check if a user exists with provided username."""
     log_request(request)
-    conn = await create_connection()
-    response = await users_query.users_search_duplicate(
-        conn, request.args.get("username")
-    )
-    conn.close()
+    async with acquire() as conn:
+        response = await users_query.users_search_duplicate(
+            conn, request.args.get("username")
+        )
     return json({"exists": bool(response)})
@@ -13,8 +13,10 @@
 # limitations under the License.
 # -----------------------------------------------------------------------------
 """Utility functions to support APIs."""
+import base64
 import binascii
 import datetime as dt
+from json import dumps, loads
 
 import rethinkdb as r
 
@@ -23,13 +25,24 @@ from sawtooth_sdk.protobuf import client_batch_submit_pb2
 from sawtooth_sdk.protobuf import validator_pb2
 
 from rbac.common.crypto.keys import Key
-from rbac.common.crypto.secrets import decrypt_private_key, deserialize_api_key
+from rbac.common.crypto.secrets import (
+    decrypt_private_key,
+    deserialize_api_key_with_expiry,
+)
 from rbac.common.logs import get_default_logger
 from rbac.providers.common.common import escape_user_input
+from rbac.server.api.auth_cache import get_cache as get_auth_cache
 from rbac.server.api.errors import ApiBadRequest, ApiInternalError, ApiUnauthorized
+from rbac.server.api.head_block import get_tracker as get_head_tracker
+from rbac.server.api.notifications import (
+    get_writer as get_notification_writer,
+    insert_notifications,
+    notification_row,
+)
+from rbac.server.api.table_counts import get_counts as get_table_counts
 from rbac.server.db import blocks_query
 from rbac.server.db.auth_query import get_auth_by_next_id
-from rbac.server.db.db_utils import create_connection
+from rbac.server.db.connection_pool import acquire
 from rbac.server.db.roles_query import (
     get_role_by_name,
     get_role_membership,
@@ -71,10 +84,19 @@ def extract_request_token(request):
     raise ApiUnauthorized("Unauthorized: No authentication token provided")
 
 
-async def create_response(conn, request_url, data, head_block, start=None, limit=None):
-    """Creates json response."""
-    conn.reconnect(noreply_wait=False)
-
+async def create_response(
+    conn,
+    request_url,
+    data,
+    head_block,
+    start=None,
+    limit=None,
+    keyset=False,
+    next_cursor=None,
+):
+    """Creates json response. Keyset paged responses pass the next_cursor
+    of the page, which is None on the last page.
+    """
     base_url = request_url.split("?")[0]
     table = base_url.split("/")[4]
     url = "{}?head={}".format(base_url, head_block.get("id"))
@@ -83,11 +105,15 @@ async def create_response(conn, request_url, data, head_block, start=None, limit
         "head": head_block.get("id"),
         "link": "{}&start={}&limit={}".format(url, start, limit),
     }
-    if start is not None and limit is not None:
+    if keyset:
+        response["link"] = request_url
+        response["paging"] = await get_response_cursor_info(
+            conn, table, url, limit, next_cursor, head_block.get("num")
+        )
+    elif start is not None and limit is not None:
         response["paging"] = await get_response_paging_info(
             conn, table, url, start, limit, head_block.get("num")
         )
-    conn.close()
     return json(response)
 
 
@@ -101,8 +127,6 @@ def create_tracker_response(events):
 
 async def get_response_paging_info(conn, table, url, start, limit, head_block_num):
     """Get paging info for paged responses."""
-    conn.reconnect(noreply_wait=False)
-
     total = await get_table_count(conn, table, head_block_num)
 
     prev_start = start - limit
@@ -113,8 +137,6 @@ async def get_response_paging_info(conn, table, url, start, limit, head_block_nu
     if next_start > last_start:
         next_start = last_start
 
-    conn.close()
-
     return {
         "start": start,
         "limit": limit,
@@ -126,22 +148,81 @@ async def get_response_paging_info(conn, table, url, start, limit, head_block_nu
     }
 
 
-async def get_table_count(conn, table, head_block_num):
-    """Get count of items in table."""
-    conn.reconnect(noreply_wait=False)
+async def get_response_cursor_info(
+    conn, table, url, limit, next_cursor, head_block_num
+):
+    """Get paging info for keyset paged responses."""
+    return {
+        "limit": limit,
+        "total": await get_table_count(conn, table, head_block_num),
+        "first": "{}&cursor=&limit={}".format(url, limit),
+        "next": "{}&cursor={}&limit={}".format(url, next_cursor, limit)
+        if next_cursor
+        else None,
+    }
+
 
+async def get_table_count(conn, table, head_block_num):
+    """Get count of items in table, from the worker's table counts once it
+    is following the table.
+    """
     if table == "blocks":
-        table_count = await (
+        return await (
             r.table(table)
             .between(r.minval, head_block_num, right_bound="closed")
             .count()
             .run(conn)
         )
-        conn.close()
-        return table_count
-    table_count = await r.table(table).count().run(conn)
-    conn.close()
-    return table_count
+    counts = get_table_counts()
+    count = counts.get(table)
+    if count is not None:
+        return count
+    counts.follow(table)
+    return await r.table(table).count().run(conn)
+
+
+def encode_cursor(key):
+    """Make the opaque cursor of a page from the sort key of its last row."""
+    return base64.urlsafe_b64encode(dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor, length=None):
+    """Get the sort key from a cursor, or None for the first page.
+    Args:
+        cursor:
+            str: the cursor of the request
+        length:
+            int: number of strings in the sort key, not checked if None
+    """
+    if not cursor:
+        return None
+    try:
+        key = loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiBadRequest("Bad Request: invalid paging cursor")
+    if (
+        not isinstance(key, list)
+        or (length is not None and len(key) != length)
+        or not all(isinstance(value, str) for value in key)
+    ):
+        raise ApiBadRequest("Bad Request: invalid paging cursor")
+    return key
+
+
+def get_request_cursor(request, length=None):
+    """Get the sort key of the cursor out of a keyset paged request.
+    Args:
+        request:
+            obj: the request
+        length:
+            int: number of strings in the sort key, not checked if None
+    Returns:
+        tuple: bool, whether the request is keyset paged, and the sort key
+            to page after, None for the first page
+    """
+    if "cursor" not in request.args:
+        return False, None
+    return True, decode_cursor(request.args["cursor"][0], length)
 
 
 def get_request_paging_info(request):
@@ -161,34 +242,74 @@ def get_request_paging_info(request):
 
 async def get_request_block(request):
     """Get headblock from request or newest."""
-    conn = await create_connection()
     try:
         head_block_id = escape_user_input(request.args["head"][0])
-        head_block = await blocks_query.fetch_block_by_id(conn, head_block_id)
     except KeyError:
-        head_block = await blocks_query.fetch_latest_block_with_retry(conn, 5)
-    conn.close()
+        return await get_head_block()
+    tracker = get_head_tracker()
+    head_block = tracker.get_block(head_block_id)
+    if head_block is None:
+        async with acquire() as conn:
+            head_block = await blocks_query.fetch_block_by_id(conn, head_block_id)
+        tracker.put_block(head_block)
     return head_block
 
 
-async def get_transactor_key(request):
-    """Get transactor key out of request."""
-    id_dict = deserialize_api_key(
-        request.app.config.SECRET_KEY, extract_request_token(request)
+async def get_head_block():
+    """Get the newest block, from the worker's head block tracker if it is
+    current."""
+    head_block = get_head_tracker().get_head()
+    if head_block is None:
+        async with acquire() as conn:
+            head_block = await blocks_query.fetch_latest_block_with_retry(conn, 5)
+    return head_block
+
+
+async def get_request_auth(request):
+    """Verify the request's bearer token.
+    Returns:
+        tuple: the user's next_id and auth table record
+    Raises:
+        BadSignature: if the token is invalid or expired
+        ApiNotFound: if the token's user has no auth record
+    """
+    token = extract_request_token(request)
+    auth_cache = get_auth_cache()
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached.next_id, cached.auth
+
+    id_dict, expires = deserialize_api_key_with_expiry(
+        request.app.config.SECRET_KEY, token
     )
     next_id = id_dict.get("id")
-
     auth_data = await get_auth_by_next_id(next_id)
-    encrypted_private_key = auth_data.get("encrypted_private_key")
-    private_key = decrypt_private_key(
-        request.app.config.AES_KEY, next_id, encrypted_private_key
-    )
-    hex_private_key = binascii.hexlify(private_key)
-    return Key(hex_private_key), next_id
+    auth_cache.put(token, next_id, auth_data, expires)
+    return next_id, auth_data
 
 
-async def send(conn, batch_list, timeout, webhook=False):
-    """Send batch_list to sawtooth."""
+async def get_transactor_key(request):
+    """Get transactor key out of request."""
+    next_id, auth_data = await get_request_auth(request)
+    auth_cache = get_auth_cache()
+    key = auth_cache.get_key(next_id)
+    if key is None:
+        encrypted_private_key = auth_data.get("encrypted_private_key")
+        private_key = decrypt_private_key(
+            request.app.config.AES_KEY, next_id, encrypted_private_key
+        )
+        key = Key(binascii.hexlify(private_key))
+        auth_cache.put_key(next_id, key)
+    return key, next_id
+
+
+async def submit_batch_list(conn, batch_list, timeout):
+    """Submit batch_list to sawtooth and wait up to timeout for the status
+    of its batches.
+    Returns:
+        tuple: the ClientBatchSubmitResponse status, and the
+            ClientBatchStatusResponse, or None if the submission was not OK
+    """
     batch_request = client_batch_submit_pb2.ClientBatchSubmitRequest()
     batch_request.batches.extend(list(batch_list.batches))
     validator_response = await conn.send(
@@ -198,18 +319,8 @@ async def send(conn, batch_list, timeout, webhook=False):
     )
     client_response = client_batch_submit_pb2.ClientBatchSubmitResponse()
     client_response.ParseFromString(validator_response.content)
-    status = client_response.status
-
-    if not webhook:
-        if status == client_batch_submit_pb2.ClientBatchSubmitResponse.INTERNAL_ERROR:
-            raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
-        elif status == client_batch_submit_pb2.ClientBatchSubmitResponse.INVALID_BATCH:
-            raise ApiBadRequest("Invalid Batch")
-        elif status == client_batch_submit_pb2.ClientBatchSubmitResponse.QUEUE_FULL:
-            # Queue is full
-            raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
-    elif status != client_batch_submit_pb2.ClientBatchSubmitResponse.OK:
-        return None
+    if client_response.status != client_batch_submit_pb2.ClientBatchSubmitResponse.OK:
+        return client_response.status, None
 
     status_request = client_batch_submit_pb2.ClientBatchStatusRequest()
     status_request.batch_ids.extend(
@@ -224,6 +335,49 @@ async def send(conn, batch_list, timeout, webhook=False):
     )
     status_response = client_batch_submit_pb2.ClientBatchStatusResponse()
     status_response.ParseFromString(validator_response.content)
+    return client_response.status, status_response
+
+
+async def send_batches(conn, batch_list, timeout):
+    """Send a batch_list of independent batches to sawtooth, and wait for
+    the status of each.
+    Returns:
+        list: of ClientBatchStatus, one per batch
+    """
+    status, status_response = await submit_batch_list(conn, batch_list, timeout)
+    if status == client_batch_submit_pb2.ClientBatchSubmitResponse.INVALID_BATCH:
+        raise ApiBadRequest("Invalid Batch")
+    if status != client_batch_submit_pb2.ClientBatchSubmitResponse.OK:
+        raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
+    if status_response.status != client_batch_submit_pb2.ClientBatchStatusResponse.OK:
+        raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
+    return list(status_response.batch_statuses)
+
+
+def get_batch_status_error(batch_status):
+    """Describe why a batch status from send_batches was not committed."""
+    if batch_status.status == client_batch_submit_pb2.ClientBatchStatus.INVALID:
+        return "Bad Request: {}".format(
+            batch_status.invalid_transactions[0].message
+            if batch_status.invalid_transactions
+            else "Invalid Batch"
+        )
+    return "Internal Error: Oops! Something broke on our end."
+
+
+async def send(conn, batch_list, timeout, webhook=False):
+    """Send batch_list to sawtooth."""
+    status, status_response = await submit_batch_list(conn, batch_list, timeout)
+
+    if not webhook:
+        if status == client_batch_submit_pb2.ClientBatchSubmitResponse.INVALID_BATCH:
+            raise ApiBadRequest("Invalid Batch")
+        elif status != client_batch_submit_pb2.ClientBatchSubmitResponse.OK:
+            # internal error or queue full
+            raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
+    elif status != client_batch_submit_pb2.ClientBatchSubmitResponse.OK:
+        return None
+
     status = status_response.status
 
     if not webhook:
@@ -255,15 +409,14 @@ async def check_admin_status(next_id):
         next_id:
             str: user's next_id
     """
-    conn = await create_connection()
-    admin_role = await get_role_by_name(conn, "NextAdmins")
-    if not admin_role:
-        # NEXT administrator group has not been created
-        raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
-    admin_membership = await get_role_membership(
-        conn, next_id, admin_role[0]["role_id"]
-    )
-    conn.close()
+    async with acquire() as conn:
+        admin_role = await get_role_by_name(conn, "NextAdmins")
+        if not admin_role:
+            # NEXT administrator group has not been created
+            raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
+        admin_membership = await get_role_membership(
+            conn, next_id, admin_role[0]["role_id"]
+        )
     if admin_membership:
         return True
     return False
@@ -281,13 +434,15 @@ async def check_role_owner_status(next_id, role_id):
             bool: Returns True if the next_id is in the role's owner list.
                 Returns False if the next_id is NOT in the role's owner list.
     """
-    with await create_connection() as conn:
+    async with acquire() as conn:
         role_owners = await fetch_role_owners(conn, role_id)
         return bool(next_id in role_owners)
 
 
 async def send_notification(next_id, proposal_id, frequency=0):
-    """Send an entry to the notifications table for notification queue
+    """Send an entry to the notifications table for notification queue.
+    The entry is queued on the worker's notification writer when it is
+    running, and inserted directly otherwise.
 
     Args:
         next_id:
@@ -296,21 +451,12 @@ async def send_notification(next_id, proposal_id, frequency=0):
             str: id of a proposal user is to be notified about
         frequency:
             int: number representing time """
-    conn = await create_connection()
-    notification = (
-        await r.table("notifications")
-        .insert(
-            {
-                "next_id": next_id,
-                "proposal_id": proposal_id,
-                "frequency": frequency,
-                "timestamp": r.now(),
-            }
-        )
-        .run(conn)
-    )
-    conn.close()
-    return notification
+    row = notification_row(next_id, proposal_id, frequency)
+    writer = get_notification_writer()
+    if writer is not None and writer.running:
+        await writer.put(row)
+        return None
+    return await insert_notifications([row])
 
 
 def log_request(request, sensitive=False):
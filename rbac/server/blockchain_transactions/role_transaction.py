@@ -16,7 +16,8 @@
 """
 import rethinkdb as r
 from rbac.server.api.proposals import PROPOSAL_TRANSACTION
-from rbac.server.db.db_utils import create_connection
+from rbac.server.blockchain_transactions.signing import sign_transactions
+from rbac.server.db.connection_pool import acquire
 from rbac.server.db.proposals_query import fetch_open_proposals_by_role
 from rbac.common.logs import get_default_logger
 from rbac.common.role.delete_role import DeleteRole
@@ -65,10 +66,10 @@ async def create_rjct_ppsls_role_txns(key_pair, role_id, txn_user_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    proposals = await fetch_open_proposals_by_role(conn, role_id)
-    conn.close()
+    async with acquire() as conn:
+        proposals = await fetch_open_proposals_by_role(conn, role_id)
     if proposals:
+        payloads = []
         for proposal in proposals:
             reason = "Target Role was deleted."
             reject_proposal = PROPOSAL_TRANSACTION[proposal["proposal_type"]][
@@ -87,10 +88,8 @@ async def create_rjct_ppsls_role_txns(key_pair, role_id, txn_user_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.warning("No proposals found for role: %s", role_id)
     return txn_list
@@ -109,16 +108,16 @@ async def create_del_mmbr_by_role_txns(key_pair, role_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    role_members = (
-        await r.table("role_members")
-        .filter({"role_id": role_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        role_members = (
+            await r.table("role_members")
+            .filter({"role_id": role_id})
+            .coerce_to("array")
+            .run(conn)
+        )
     if role_members:
         member_delete = DeleteRoleMember()
+        payloads = []
         for member in role_members:
             admin_delete_message = member_delete.make(
                 signer_keypair=key_pair,
@@ -130,10 +129,8 @@ async def create_del_mmbr_by_role_txns(key_pair, role_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.info("No role_members found for role: %s", role_id)
     return txn_list
@@ -153,16 +150,16 @@ async def create_del_mmbr_by_user_txns(key_pair, next_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    roles = (
-        await r.table("role_members")
-        .filter({"related_id": next_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        roles = (
+            await r.table("role_members")
+            .filter({"related_id": next_id})
+            .coerce_to("array")
+            .run(conn)
+        )
     if roles:
         member_delete = DeleteRoleMember()
+        payloads = []
         for role in roles:
             admin_delete_message = member_delete.make(
                 signer_keypair=key_pair, related_id=next_id, role_id=role["role_id"]
@@ -172,10 +169,8 @@ async def create_del_mmbr_by_user_txns(key_pair, next_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.info("No role_members found for user: %s", next_id)
     return txn_list
@@ -195,16 +190,16 @@ async def create_del_ownr_by_role_txns(key_pair, role_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    role_owners = (
-        await r.table("role_owners")
-        .filter({"role_id": role_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        role_owners = (
+            await r.table("role_owners")
+            .filter({"role_id": role_id})
+            .coerce_to("array")
+            .run(conn)
+        )
     if role_owners:
         owner_delete = DeleteRoleOwner()
+        payloads = []
         for owner in role_owners:
             owner_delete_message = owner_delete.make(
                 signer_keypair=key_pair,
@@ -216,10 +211,8 @@ async def create_del_ownr_by_role_txns(key_pair, role_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.info("No role_owners found for role: %s", role_id)
     return txn_list
@@ -238,16 +231,16 @@ async def create_del_ownr_by_user_txns(key_pair, next_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    roles = (
-        await r.table("role_owners")
-        .filter({"related_id": next_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        roles = (
+            await r.table("role_owners")
+            .filter({"related_id": next_id})
+            .coerce_to("array")
+            .run(conn)
+        )
     if roles:
         owner_delete = DeleteRoleOwner()
+        payloads = []
         for role in roles:
             owner_delete_message = owner_delete.make(
                 signer_keypair=key_pair, related_id=next_id, role_id=role["role_id"]
@@ -257,10 +250,8 @@ async def create_del_ownr_by_user_txns(key_pair, next_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.info("No role_owners found for user: %s", next_id)
     return txn_list
@@ -279,16 +270,16 @@ async def create_del_admin_by_role_txns(key_pair, role_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    role_admins = (
-        await r.table("role_admins")
-        .filter({"role_id": role_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        role_admins = (
+            await r.table("role_admins")
+            .filter({"role_id": role_id})
+            .coerce_to("array")
+            .run(conn)
+        )
     if role_admins:
         admin_delete = DeleteRoleAdmin()
+        payloads = []
         for admin in role_admins:
             admin_delete_message = admin_delete.make(
                 signer_keypair=key_pair,
@@ -300,10 +291,8 @@ async def create_del_admin_by_role_txns(key_pair, role_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.info("No role_admins found for role: %s", role_id)
     return txn_list
@@ -322,16 +311,16 @@ async def create_del_admin_by_user_txns(key_pair, next_id, txn_list):
         txn_list:
             list: extended list of transactions for batch submission
     """
-    conn = await create_connection()
-    role_admins = (
-        await r.table("role_admins")
-        .filter({"related_id": next_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        role_admins = (
+            await r.table("role_admins")
+            .filter({"related_id": next_id})
+            .coerce_to("array")
+            .run(conn)
+        )
     if role_admins:
         admin_delete = DeleteRoleAdmin()
+        payloads = []
         for admin in role_admins:
             admin_delete_message = admin_delete.make(
                 signer_keypair=key_pair, related_id=next_id, role_id=admin["role_id"]
@@ -341,10 +330,8 @@ async def create_del_admin_by_user_txns(key_pair, next_id, txn_list):
                 signer_keypair=key_pair,
                 signer_user_id=key_pair.public_key,
             )
-            transaction = batcher.make_transaction(
-                payload=payload, signer_keypair=key_pair
-            )
-            txn_list.extend([transaction])
+            payloads.append(payload)
+        txn_list.extend(await sign_transactions(payloads, key_pair))
     else:
         LOGGER.info("No role_admins found for user: %s", next_id)
     return txn_list
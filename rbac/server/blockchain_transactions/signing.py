@@ -0,0 +1,116 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Builds and signs transactions and batches off the API server's event loop.
+
+Transactions and batches are built on the loop's default thread executor so
+a request that signs hundreds of transactions never blocks other requests.
+The headers of large transaction lists are signed on a per-worker process
+pool, see batcher.make_transactions_parallel.
+"""
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from rbac.common.logs import get_default_logger
+from rbac.common.sawtooth import batcher
+
+LOGGER = get_default_logger(__name__)
+
+_EXECUTOR = None
+
+
+def open_executor(processes):
+    """Create the signing process pool for this worker, replacing any
+    existing one. With 0 processes transactions are signed on a thread.
+    """
+    global _EXECUTOR  # pylint: disable=global-statement
+    close_executor()
+    if processes > 0:
+        _EXECUTOR = ProcessPoolExecutor(max_workers=processes)
+    return _EXECUTOR
+
+
+def close_executor():
+    """Shut down the signing process pool for this worker."""
+    global _EXECUTOR  # pylint: disable=global-statement
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+        _EXECUTOR = None
+
+
+async def sign_transactions(payloads, key_pair):
+    """Make signed transactions from payloads without blocking the loop.
+    Args:
+        payloads:
+            list: of RBACPayload
+        key_pair:
+            obj: public and private keys of the transactor
+    Returns:
+        list: of transactions, in the order of the payloads
+    """
+    if not payloads:
+        return []
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(
+            batcher.make_transactions_parallel,
+            payloads=payloads,
+            signer_keypair=key_pair,
+            executor=_EXECUTOR,
+        ),
+    )
+
+
+async def make_batch(transactions, key_pair):
+    """Make a signed batch of transactions without blocking the loop.
+    Args:
+        transactions:
+            list: transactions for batch submission
+        key_pair:
+            obj: public and private keys of the transactor
+    Returns:
+        obj: the batch
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(
+            batcher.make_batch_from_txns,
+            transactions=transactions,
+            signer_keypair=key_pair,
+        ),
+    )
+
+
+async def make_batches(transactions, key_pair):
+    """Make a signed batch for each transaction without blocking the loop,
+    so each transaction commits or fails on its own.
+    Args:
+        transactions:
+            list: of transactions
+        key_pair:
+            obj: public and private keys of the transactor
+    Returns:
+        list: of batches, in the order of the transactions
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None,
+        lambda: [
+            batcher.make_batch(transaction=transaction, signer_keypair=key_pair)
+            for transaction in transactions
+        ],
+    )
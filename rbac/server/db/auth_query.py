@@ -19,17 +19,15 @@ from rethinkdb import ReqlQueryLogicError
 from rbac.common.logs import get_default_logger
 from rbac.providers.common.common import escape_user_input
 from rbac.server.api.errors import ApiNotFound, ApiUnauthorized
-from rbac.server.db.db_utils import create_connection
+from rbac.server.db.connection_pool import acquire
 
 LOGGER = get_default_logger(__name__)
 
 
 async def create_auth_entry(auth_entry):
     """Add auth entry to the auth table."""
-    conn = await create_connection()
-    insert = await r.table("auth").insert(auth_entry).run(conn)
-    conn.close()
-    return insert
+    async with acquire() as conn:
+        return await r.table("auth").insert(auth_entry).run(conn)
 
 
 async def update_auth(next_id, auth_entry):
@@ -38,21 +36,14 @@ async def update_auth(next_id, auth_entry):
         auth_entry:
             dict: dictionary containing the fields to be updated
     """
-    conn = await create_connection()
-    resource = (
-        await r.table("auth").filter({"next_id": next_id}).update(auth_entry).run(conn)
-    )
-    conn.close()
-    return resource
+    async with acquire() as conn:
+        return await r.table("auth").get_all(next_id).update(auth_entry).run(conn)
 
 
 async def get_auth_by_next_id(next_id):
     """Get user record from auth table using next_id."""
-    conn = await create_connection()
-    user_auth = (
-        await r.table("auth").filter({"next_id": next_id}).coerce_to("array").run(conn)
-    )
-    conn.close()
+    async with acquire() as conn:
+        user_auth = await r.table("auth").get_all(next_id).coerce_to("array").run(conn)
     if not user_auth:
         raise ApiNotFound("No user with id '{}' exists".format(next_id))
     return user_auth[0]
@@ -66,37 +57,30 @@ async def get_user_by_username(request):
             obj:  a request object"""
     username = escape_user_input(request.json.get("id"))
     try:
-        conn = await create_connection()
-        user = (
-            await r.table("users")
-            .filter(lambda doc: (doc["username"].match("(?i)^" + username + "$")))
-            .coerce_to("array")
-            .run(conn)
-        )
-        conn.close()
+        async with acquire() as conn:
+            user = (
+                await r.table("users")
+                .filter(lambda doc: (doc["username"].match("(?i)^" + username + "$")))
+                .coerce_to("array")
+                .run(conn)
+            )
         if len(user) == 1:
             return user[0]
         if user:
             LOGGER.warning("User logged in with a duplicate username: %s", username)
             raise ApiNotFound("Login error. Contact an Administrator.")
     except ReqlQueryLogicError:
-        conn.close()
         raise ApiUnauthorized("Incorrect username or password.")
 
 
 async def get_user_map_by_next_id(next_id):
     """Fetch a user's map using the next_id."""
-    conn = await create_connection()
-    user_map = (
-        await r.table("user_mapping")
-        .filter({"next_id": next_id})
-        .coerce_to("array")
-        .run(conn)
-    )
-    conn.close()
-    return user_map
+    async with acquire() as conn:
+        return (
+            await r.table("user_mapping").get_all(next_id).coerce_to("array").run(conn)
+        )
 
 
 async def delete_auth_entry_by_next_id(conn, next_id):
     """Delete auth_entry from auth table."""
-    return await r.table("auth").filter({"next_id": next_id}).delete().run(conn)
+    return await r.table("auth").get_all(next_id).delete().run(conn)
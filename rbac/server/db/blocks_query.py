@@ -14,13 +14,12 @@
 # ------------------------------------------------------------------------------
 """Functions for querying the blocks table."""
 
-import time
-
 import rethinkdb as r
 from rethinkdb import ReqlNonExistenceError, ReqlQueryLogicError, ReqlRuntimeError
 
 from rbac.common.logs import get_default_logger
 from rbac.server.api.errors import ApiNotFound, ApiInternalError
+from rbac.server.db.retry import retry
 
 
 LOGGER = get_default_logger(__name__)
@@ -40,38 +39,38 @@ async def fetch_all_blocks(conn, head_block_num, start, limit):
     )
 
 
+def latest_block_query():
+    """Query for the newest block by highest block_num"""
+    return (
+        r.table("blocks")
+        .max(index="block_num")
+        .merge({"id": r.row["block_id"], "num": r.row["block_num"]})
+        .without("block_id", "block_num")
+    )
+
+
 async def fetch_latest_block(conn):
     """Get newest block by highest block_num"""
     try:
-        return (
-            await r.table("blocks")
-            .max(index="block_num")
-            .merge({"id": r.row["block_id"], "num": r.row["block_num"]})
-            .without("block_id", "block_num")
-            .run(conn)
-        )
+        return await latest_block_query().run(conn)
     except ReqlNonExistenceError:
         # no block data found
         raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
 
 
 async def fetch_latest_block_with_retry(conn, tries=5):
-    """Get newest block, with retries on exception."""
-    attempts = tries
-    while attempts > 0:
-        try:
-            return await fetch_latest_block(conn)
-        except ReqlQueryLogicError:
-            LOGGER.debug("Query attempt failed")
-
-        sleep_time = (tries - attempts + 1) * 2
-        LOGGER.debug("Retrying in %s secs", sleep_time)
-        time.sleep(sleep_time)
-
-        attempts -= 1
-
-    # no block data found in state
-    raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
+    """Get newest block, retrying with backoff while the blocks table is
+    empty or the query fails."""
+    try:
+        return await retry(
+            lambda: latest_block_query().run(conn),
+            retry_on=(ReqlQueryLogicError,),
+            tries=tries,
+            name="fetch_latest_block",
+        )
+    except ReqlQueryLogicError:
+        # no block data found in state
+        raise ApiInternalError("Internal Error: Oops! Something broke on our end.")
 
 
 async def fetch_block_by_id(conn, block_id):
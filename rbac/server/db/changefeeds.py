@@ -0,0 +1,108 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Follow a changefeed for the lifetime of a worker.
+
+The in-process caches of the server each keep themselves current with a
+changefeed. follow_changefeed reconnects whenever the changefeed fails, and
+logs and skips a change its handler fails on, so one bad change never stops
+a cache from following its table.
+"""
+import asyncio
+import inspect
+
+from rethinkdb import ReqlError
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.db_utils import create_connection
+
+LOGGER = get_default_logger(__name__)
+
+DEFAULT_RETRY_DELAY = 5
+
+
+async def _maybe_await(result):
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+async def follow_changefeed(
+    query_fn,
+    on_change,
+    on_up=None,
+    on_down=None,
+    wait=asyncio.sleep,
+    connect=create_connection,
+    retry_delay=DEFAULT_RETRY_DELAY,
+    name="changefeed",
+    stats=None,
+):
+    """Follow a changefeed until cancelled, reconnecting after retry_delay
+    when it fails.
+    Args:
+        query_fn:
+            callable: given a connection, returns the awaitable cursor of
+                the changefeed
+        on_change:
+            callable: given each change, may return an awaitable. A change
+                it raises on is logged, counted and skipped
+        on_up:
+            callable: called once the changefeed is open, may return an
+                awaitable
+        on_down:
+            callable: called whenever the changefeed closes, including when
+                following is cancelled
+        wait:
+            callable: given retry_delay, returns the awaitable waited on
+                before reconnecting
+        connect:
+            callable: returns the awaitable connection to follow it on
+        retry_delay:
+            float: seconds between reconnects
+        name:
+            str: what the changefeed is called in the log
+        stats:
+            collections.Counter: counts the changes failed on as "errors"
+    """
+    while True:
+        try:
+            conn = await connect()
+            try:
+                feed = await query_fn(conn)
+                if on_up is not None:
+                    await _maybe_await(on_up())
+                while await feed.fetch_next():
+                    change = await feed.next()
+                    try:
+                        await _maybe_await(on_change(change))
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as err:  # pylint: disable=broad-except
+                        if stats is not None:
+                            stats["errors"] += 1
+                        LOGGER.exception(
+                            "%s exception handling %s change", type(err).__name__, name
+                        )
+            finally:
+                if on_down is not None:
+                    on_down()
+                await conn.close(noreply_wait=False)
+        except asyncio.CancelledError:
+            raise
+        except ReqlError as err:
+            LOGGER.warning("%s changefeed failed: %s", name, err)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("%s changefeed failed", name)
+        await wait(retry_delay)
@@ -0,0 +1,220 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Bounded, per-worker pool of async RethinkDB connections.
+
+Usage:
+    from rbac.server.db.connection_pool import acquire
+
+    async with acquire() as conn:
+        user = await users_query.fetch_user_resource(conn, next_id)
+"""
+import asyncio
+import collections
+import time
+
+import rethinkdb as r
+from rethinkdb import ReqlDriverError
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.db_utils import create_connection
+
+LOGGER = get_default_logger(__name__)
+
+DEFAULT_MAX_SIZE = 10
+DEFAULT_MAX_IDLE = 300
+DEFAULT_HEALTH_CHECK_INTERVAL = 30
+
+_IdleConnection = collections.namedtuple("_IdleConnection", ["conn", "last_used"])
+
+_POOL = None
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of RethinkDB connections.
+
+    Connections are opened lazily up to max_size. Callers beyond that wait
+    for a connection to be released. Idle connections older than max_idle
+    seconds are closed, and connections idle longer than
+    health_check_interval seconds are pinged before being handed out.
+    """
+
+    def __init__(
+        self,
+        max_size=DEFAULT_MAX_SIZE,
+        max_idle=DEFAULT_MAX_IDLE,
+        health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL,
+        connect=create_connection,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1, got {}".format(max_size))
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._idle = collections.deque()
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._in_use = 0
+        self._closed = False
+        self._stats = collections.Counter()
+
+    @property
+    def size(self):
+        """Number of open connections owned by the pool."""
+        return self._in_use + len(self._idle)
+
+    def acquire(self):
+        """Return an async context manager yielding a pooled connection."""
+        return _PooledConnection(self)
+
+    def metrics(self):
+        """Return a snapshot of pool usage counters."""
+        return {
+            "max_size": self.max_size,
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "acquired": self._stats["acquired"],
+            "waited": self._stats["waited"],
+            "created": self._stats["created"],
+            "closed": self._stats["closed"],
+            "evicted": self._stats["evicted"],
+            "health_check_failures": self._stats["health_check_failures"],
+        }
+
+    async def get(self):
+        """Take a healthy connection out of the pool, opening one if needed."""
+        if self._closed:
+            raise ReqlDriverError("Connection pool is closed")
+        if self._semaphore.locked():
+            self._stats["waited"] += 1
+        await self._semaphore.acquire()
+        try:
+            await self.evict_idle()
+            conn = None
+            while self._idle and conn is None:
+                idle = self._idle.pop()
+                if await self._is_healthy(idle):
+                    conn = idle.conn
+                else:
+                    self._stats["health_check_failures"] += 1
+                    await self._close(idle.conn)
+            if conn is None:
+                conn = await self._connect()
+                self._stats["created"] += 1
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._in_use += 1
+        self._stats["acquired"] += 1
+        return conn
+
+    async def put(self, conn, discard=False):
+        """Return a connection to the pool, closing it if discarded."""
+        self._in_use -= 1
+        try:
+            if discard or self._closed or not conn.is_open():
+                await self._close(conn)
+            else:
+                self._idle.append(_IdleConnection(conn, time.monotonic()))
+        finally:
+            self._semaphore.release()
+
+    async def evict_idle(self):
+        """Close connections that have been idle longer than max_idle."""
+        cutoff = time.monotonic() - self.max_idle
+        while self._idle and self._idle[0].last_used < cutoff:
+            idle = self._idle.popleft()
+            self._stats["evicted"] += 1
+            await self._close(idle.conn)
+
+    async def close(self):
+        """Close all idle connections and refuse further acquires.
+        Connections still in use are closed when they are released.
+        """
+        self._closed = True
+        while self._idle:
+            await self._close(self._idle.pop().conn)
+
+    async def _is_healthy(self, idle):
+        if not idle.conn.is_open():
+            return False
+        if time.monotonic() - idle.last_used < self.health_check_interval:
+            return True
+        try:
+            await r.expr(1).run(idle.conn)
+            return True
+        except ReqlDriverError:
+            return False
+
+    async def _close(self, conn):
+        self._stats["closed"] += 1
+        try:
+            await conn.close(noreply_wait=False)
+        except ReqlDriverError as err:
+            LOGGER.debug("Error closing pooled connection: %s", err)
+
+
+class _PooledConnection:
+    """Async context manager returned by ConnectionPool.acquire()."""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+
+    async def __aenter__(self):
+        self._conn = await self._pool.get()
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        discard = exc_type is not None and issubclass(exc_type, ReqlDriverError)
+        await self._pool.put(self._conn, discard=discard)
+        self._conn = None
+
+
+async def open_pool(**kwargs):
+    """Create the connection pool for this worker, replacing any existing one."""
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        await _POOL.close()
+    _POOL = ConnectionPool(**kwargs)
+    return _POOL
+
+
+async def close_pool():
+    """Close the connection pool for this worker."""
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        await _POOL.close()
+        _POOL = None
+
+
+def get_pool():
+    """Return the worker's connection pool, creating a default one if the
+    pool was not opened by the server (e.g. in scripts and tests).
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is None:
+        _POOL = ConnectionPool()
+    return _POOL
+
+
+def acquire():
+    """Acquire a connection from the worker's pool.
+
+    Usage:
+        async with acquire() as conn:
+            ...
+    """
+    return get_pool().acquire()
@@ -14,11 +14,12 @@
 # ------------------------------------------------------------------------------
 """Utility functions for Rethink and Sanic."""
 import re
-import time
 
 from environs import Env
 import rethinkdb as r
 
+from rbac.server.db.retry import retry
+
 
 async def create_connection():
     """Create a new connection to RethinkDB for async interactions."""
@@ -47,7 +48,8 @@ async def wait_for_resource_in_db(table, index, identifier, max_attempts=10, del
                     giving up and returning False.
                         Default value: 10
         delay:
-            float:  The number of seconds to wait between query attempts.
+            float:  The number of seconds to wait before the first retry,
+                    backed off with jitter up to 4x between later attempts.
                         Default value: 0.5
     Returns:
         resource_removed:
@@ -58,18 +60,23 @@ async def wait_for_resource_in_db(table, index, identifier, max_attempts=10, del
                 False:  If the role is not found after the given number of
                         attempts.
     """
-    resource_found = False
-    count = 0
-    with await create_connection() as conn:
-        while not resource_found and count < max_attempts:
-            resource = (
-                r.table(table).filter({index: identifier}).coerce_to("array").run(conn)
-            )
-            if resource:
-                resource_found = True
-            count += 1
-            time.sleep(delay)
-    return resource_found
+    conn = await create_connection()
+    try:
+        resource = await retry(
+            lambda: r.table(table)
+            .filter({index: identifier})
+            .coerce_to("array")
+            .run(conn),
+            until=bool,
+            tries=max_attempts,
+            base_delay=delay,
+            max_delay=delay * 4,
+            deadline=max_attempts * delay * 4,
+            name="wait_for_resource_in_db",
+        )
+    finally:
+        await conn.close(noreply_wait=False)
+    return bool(resource)
 
 
 def sanitize_query(query):
@@ -0,0 +1,195 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Versioned secondary-index migrations for the rbac database.
+
+Migrations are applied by bin/setup_db and recorded in the
+schema_migrations table. The API server calls check_indexes() on startup
+and refuses to start if any index used by the query modules is missing.
+
+To add an index, append a new (version, indexes) entry to MIGRATIONS.
+Never edit a migration that has already been released.
+"""
+import collections
+import sys
+
+import rethinkdb as r
+from rethinkdb import ReqlOpFailedError
+
+from rbac.common.logs import get_default_logger
+from rbac.server.db.retry import retry
+
+LOGGER = get_default_logger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+INDEX_WAIT_DELAY = 2
+
+Index = collections.namedtuple("Index", ["table", "name", "fields", "multi"])
+Index.__new__.__defaults__ = (None, False)
+
+MIGRATIONS = (
+    (
+        1,
+        (
+            Index("users", "manager_id"),
+            Index("users", "remote_id"),
+            Index("role_members", "role_id_related_id", ["role_id", "related_id"]),
+            Index("proposals", "related_id"),
+            Index("proposals", "status_opener", ["status", "opener"]),
+            Index("proposals", "status_object_id", ["status", "object_id"]),
+            Index("proposals", "assigned_approver", multi=True),
+        ),
+    ),
+    (2, (Index("users", "name_next_id", ["name", "next_id"]),)),
+    (3, (Index("user_mapping", "remote_id"),)),
+    (
+        4,
+        tuple(
+            Index(table, field)
+            for table in (
+                "proposals",
+                "role_admins",
+                "role_members",
+                "role_owners",
+                "role_tasks",
+                "roles",
+                "task_admins",
+                "task_owners",
+                "tasks",
+                "users",
+            )
+            for field in ("start_block_num", "end_block_num")
+        ),
+    ),
+)
+
+# Indexes created by bin/setup_db before migrations were versioned.
+BASE_INDEXES = (
+    Index("auth", "username"),
+    Index("users", "next_id"),
+    Index("users", "username"),
+    Index("users", "email"),
+    Index("users", "name"),
+    Index("roles", "role_id"),
+    Index("roles", "name"),
+    Index("role_members", "role_id"),
+    Index("role_members", "identifiers", multi=True),
+    Index("role_owners", "role_id"),
+    Index("role_owners", "identifiers", multi=True),
+    Index("proposals", "proposal_id"),
+    Index("proposals", "opener"),
+    Index("packs", "pack_id"),
+    Index("pack_owners", "pack_id"),
+)
+
+REQUIRED_INDEXES = BASE_INDEXES + tuple(
+    index for _, indexes in MIGRATIONS for index in indexes
+)
+
+
+def create_index_query(db_name, index):
+    """Build the index_create query for an Index."""
+    table = r.db(db_name).table(index.table)
+    if index.fields:
+        return table.index_create(
+            index.name, [r.row[field] for field in index.fields], multi=index.multi
+        )
+    return table.index_create(index.name, multi=index.multi)
+
+
+def migrate(conn, db_name):
+    """Apply all pending index migrations. Expects a synchronous connection.
+    Args:
+        conn:
+            obj: RethinkDB connection object
+        db_name:
+            str: name of the rbac database
+    Returns:
+        int: the schema version after migrating
+    """
+    database = r.db(db_name)
+    if MIGRATIONS_TABLE not in database.table_list().run(conn):
+        database.table_create(MIGRATIONS_TABLE, primary_key="version").run(conn)
+    current = (
+        database.table(MIGRATIONS_TABLE)
+        .max("version")
+        .default({"version": 0})["version"]
+        .run(conn)
+    )
+
+    for version, indexes in MIGRATIONS:
+        if version <= current:
+            continue
+        LOGGER.info("Applying index migration %s", version)
+        for index in indexes:
+            existing = database.table(index.table).index_list().run(conn)
+            if index.name not in existing:
+                LOGGER.info("Creating index %s.%s", index.table, index.name)
+                create_index_query(db_name, index).run(conn)
+        for table in {index.table for index in indexes}:
+            database.table(table).index_wait().run(conn)
+        database.table(MIGRATIONS_TABLE).insert(
+            {"version": version, "applied": r.now()}
+        ).run(conn)
+        current = version
+    return current
+
+
+async def check_indexes(conn):
+    """Return the required indexes that are missing from the database.
+    The indexes of a table that does not exist yet are all missing.
+    Args:
+        conn:
+            obj: async RethinkDB connection object
+    Returns:
+        list: of "table.index" strings, empty if every index exists
+    """
+    tables = set(await r.table_list().run(conn))
+    existing = {}
+    for table in sorted({index.table for index in REQUIRED_INDEXES} & tables):
+        existing[table] = await r.table(table).index_list().run(conn)
+    return [
+        "{}.{}".format(index.table, index.name)
+        for index in REQUIRED_INDEXES
+        if index.name not in existing.get(index.table, ())
+    ]
+
+
+async def wait_for_indexes(conn, deadline, delay=INDEX_WAIT_DELAY):
+    """Wait for bin/setup_db to create the database and apply the index
+    migrations, which may still be running when the server starts.
+    Args:
+        conn:
+            obj: async RethinkDB connection object
+        deadline:
+            float: seconds to wait before giving up
+        delay:
+            float: maximum seconds between checks
+    Returns:
+        list: of "table.index" strings still missing at the deadline
+    """
+    try:
+        return await retry(
+            lambda: check_indexes(conn),
+            retry_on=(ReqlOpFailedError,),
+            until=lambda missing: not missing,
+            tries=sys.maxsize,
+            base_delay=delay,
+            max_delay=delay,
+            deadline=deadline,
+            name="wait_for_indexes",
+        )
+    except ReqlOpFailedError as err:
+        LOGGER.warning("Database is not ready: %s", err)
+        return ["{}.{}".format(index.table, index.name) for index in REQUIRED_INDEXES]
@@ -147,6 +147,24 @@ async def search_packs_count(conn, search_query):
         return 0
 
 
+async def fetch_pack_search_relationships(conn, packs):
+    """Add the roles of each pack in a page of search results from the
+    search index, in one query.
+    """
+    if not packs:
+        return []
+    return (
+        await r.expr(packs)
+        .map(
+            lambda doc: doc.merge(
+                {"roles": fetch_relationships_by_id("role_packs", doc["id"], "role_id")}
+            )
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+
+
 def packs_search_name(search_query):
     """Search for packs based a string in the name field."""
     query = sanitize_query(search_query["search_input"])
@@ -209,8 +227,11 @@ async def delete_pack_by_id(conn, pack_id):
             str: ID of pack to be deleted
     """
     resource = (
-        await r.table("packs").filter({"pack_id": pack_id}).delete().run(conn),
-        await r.table("pack_owners").filter({"pack_id": pack_id}).delete().run(conn),
+        await r.table("packs").get_all(pack_id, index="pack_id").delete().run(conn),
+        await r.table("pack_owners")
+        .get_all(pack_id, index="pack_id")
+        .delete()
+        .run(conn),
         await r.table("role_packs")
         .filter({"identifiers": [pack_id]})
         .delete()
@@ -228,7 +249,10 @@ async def get_pack_by_pack_id(conn, pack_id):
             str: ID of pack to be queried
     """
     pack = (
-        await r.table("packs").filter({"pack_id": pack_id}).coerce_to("array").run(conn)
+        await r.table("packs")
+        .get_all(pack_id, index="pack_id")
+        .coerce_to("array")
+        .run(conn)
     )
     return pack
 
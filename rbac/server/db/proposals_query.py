@@ -95,6 +95,50 @@ async def fetch_proposal_resource(conn, proposal_id):
         )
 
 
+async def fetch_proposal_resources(conn, proposal_ids):
+    """Get the proposal resources of many proposal_ids in one query.
+    Args:
+        conn:
+            obj: database connection object.
+        proposal_ids:
+            list: of proposal_id strings
+    Returns:
+        dict: of proposal resources by proposal_id, omitting ids not found
+    """
+    if not proposal_ids:
+        return {}
+    resources = (
+        await r.table("proposals")
+        .get_all(r.args(list(proposal_ids)), index="proposal_id")
+        .map(
+            lambda proposal: proposal.merge(
+                {
+                    "id": proposal["proposal_id"],
+                    "type": proposal["proposal_type"],
+                    "object": proposal["object_id"],
+                    "target": proposal["related_id"],
+                }
+            )
+        )
+        .map(
+            lambda proposal: (proposal["metadata"] == "").branch(
+                proposal.without("metadata"), proposal
+            )
+        )
+        .without(
+            "start_block_num",
+            "end_block_num",
+            "proposal_id",
+            "proposal_type",
+            "object_id",
+            "related_id",
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+    return {resource["id"]: resource for resource in resources}
+
+
 async def subscribe_to_proposals(conn):
     """Returns a RethinkDB changefeed of changes to proposals."""
     return (
@@ -184,7 +228,7 @@ def fetch_open_proposals_by_opener(next_id):
     """
     resource = (
         r.table("proposals")
-        .filter({"opener": next_id, "status": "OPEN"})
+        .get_all(["OPEN", next_id], index="status_opener")
         .coerce_to("array")
     )
 
@@ -199,7 +243,7 @@ def fetch_open_proposals_by_role(conn, role_id):
     """
     resource = (
         r.table("proposals")
-        .filter({"object_id": role_id, "status": "OPEN"})
+        .get_all(["OPEN", role_id], index="status_object_id")
         .coerce_to("array")
         .run(conn)
     )
@@ -215,7 +259,8 @@ def get_open_proposals_by_approver(next_id):
     """
     resource = (
         r.table("proposals")
-        .filter({"assigned_approver": [next_id], "status": "OPEN"})
+        .get_all(next_id, index="assigned_approver")
+        .filter({"status": "OPEN"})
         .coerce_to("array")
     )
 
@@ -0,0 +1,104 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Async retry with exponential backoff, jitter and a deadline.
+
+Waits with asyncio.sleep so a retrying request never blocks the worker's
+event loop. Each retry is counted in retry_metrics() under the name given
+by the caller.
+"""
+import asyncio
+import collections
+import random
+import time
+
+from rbac.common.logs import get_default_logger
+
+LOGGER = get_default_logger(__name__)
+
+DEFAULT_TRIES = 5
+DEFAULT_BASE_DELAY = 0.1
+DEFAULT_MAX_DELAY = 2
+DEFAULT_DEADLINE = 10
+
+_METRICS = collections.Counter()
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Seconds to wait before the given retry (1 for the first retry), with
+    full jitter: uniformly random up to the exponential backoff.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+async def retry(
+    func,
+    retry_on=(),
+    until=None,
+    tries=DEFAULT_TRIES,
+    base_delay=DEFAULT_BASE_DELAY,
+    max_delay=DEFAULT_MAX_DELAY,
+    deadline=DEFAULT_DEADLINE,
+    name="retry",
+):
+    """Await func() until it succeeds, retrying with backoff.
+    Args:
+        func:
+            callable: returns the awaitable to retry, called once per attempt
+        retry_on:
+            tuple: exception types that are retried
+        until:
+            callable: given the result, False if the attempt should be retried
+        tries:
+            int: maximum number of attempts
+        base_delay:
+            float: seconds of backoff before the first retry
+        max_delay:
+            float: maximum seconds of backoff between attempts
+        deadline:
+            float: seconds after which no further attempt is started
+        name:
+            str: name the retries are counted under in retry_metrics()
+    Returns:
+        the result of the last attempt
+    Raises:
+        the last retried exception, if every attempt raised one
+    """
+    give_up_at = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            result = await func()
+            if until is None or until(result):
+                return result
+            error = None
+        except retry_on as err:  # pylint: disable=catching-non-exception
+            result = None
+            error = err
+
+        delay = backoff_delay(attempt, base_delay, max_delay)
+        if attempt >= tries or time.monotonic() + delay > give_up_at:
+            _METRICS[name + "_exhausted"] += 1
+            if error is not None:
+                raise error
+            return result
+        _METRICS[name + "_retry_count"] += 1
+        LOGGER.debug("%s attempt %s failed, retrying in %.2fs", name, attempt, delay)
+        await asyncio.sleep(delay)
+
+
+def retry_metrics():
+    """Return a snapshot of retry counters."""
+    return dict(_METRICS)
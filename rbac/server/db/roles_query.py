@@ -27,43 +27,75 @@ from rbac.server.db.db_utils import sanitize_query
 
 LOGGER = get_default_logger(__name__)
 
+# the role_id of the last role of a keyset page
+ROLE_CURSOR_LENGTH = 1
+
 
 async def fetch_all_role_resources(conn, start, limit):
     """Get all role resources."""
     resources = (
-        await r.table("roles")
-        .order_by(index="role_id")
-        .slice(start, start + limit)
-        .map(
-            lambda role: role.merge(
-                {
-                    "id": role["role_id"],
-                    "owners": fetch_relationships(
-                        "role_owners", "role_id", role["role_id"]
-                    ),
-                    "administrators": fetch_relationships(
-                        "role_admins", "role_id", role["role_id"]
-                    ),
-                    "members": fetch_relationships(
-                        "role_members", "role_id", role["role_id"]
-                    ),
-                    "tasks": fetch_relationships(
-                        "role_tasks", "role_id", role["role_id"]
-                    ),
-                    "proposals": fetch_proposal_ids_by_opener(role["role_id"]),
-                    "packs": fetch_relationships(
-                        "role_packs", "role_id", role["role_id"]
-                    ),
-                }
-            )
+        await compile_role_resources(
+            r.table("roles").order_by(index="role_id").slice(start, start + limit)
         )
-        .without("role_id")
         .coerce_to("array")
         .run(conn)
     )
     return resources
 
 
+async def fetch_role_resources_after(conn, after, limit):
+    """Get a keyset page of role resources, in order of role_id.
+    Args:
+        conn:
+            obj: database connection object.
+        after:
+            list: role_id of the last role of the previous page, or None for
+                the first page
+        limit:
+            int: number of roles in the page
+    """
+    lower = r.minval if after is None else after[0]
+    return (
+        await compile_role_resources(
+            r.table("roles")
+            .between(lower, r.maxval, index="role_id", left_bound="open")
+            .order_by(index="role_id")
+            .limit(limit)
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+
+
+def role_cursor_key(role_resource):
+    """Sort key of a role resource for keyset paging, ROLE_CURSOR_LENGTH
+    strings long."""
+    return [role_resource["id"]]
+
+
+def compile_role_resources(roles):
+    """Add the relationships of roles to a query of roles."""
+    return roles.map(
+        lambda role: role.merge(
+            {
+                "id": role["role_id"],
+                "owners": fetch_relationships(
+                    "role_owners", "role_id", role["role_id"]
+                ),
+                "administrators": fetch_relationships(
+                    "role_admins", "role_id", role["role_id"]
+                ),
+                "members": fetch_relationships(
+                    "role_members", "role_id", role["role_id"]
+                ),
+                "tasks": fetch_relationships("role_tasks", "role_id", role["role_id"]),
+                "proposals": fetch_proposal_ids_by_opener(role["role_id"]),
+                "packs": fetch_relationships("role_packs", "role_id", role["role_id"]),
+            }
+        )
+    ).without("role_id")
+
+
 async def insert_to_outboundqueue(conn, outbound_entry):
     """Insert a group entry into outbound_queue."""
     outbound_result = (
@@ -88,7 +120,7 @@ async def does_role_exist(conn, role_id):
         bool:
             False: if the tole was not found in rethink.
     """
-    role = await r.table("roles").filter({"role_id": role_id}).count().run(conn)
+    role = await r.table("roles").get_all(role_id, index="role_id").count().run(conn)
     return bool(role > 0)
 
 
@@ -106,7 +138,7 @@ async def fetch_role_owners(conn, role_id):
     """
     role_owners = (
         await r.table("role_owners")
-        .filter({"role_id": role_id})
+        .get_all(role_id, index="role_id")
         .get_field("related_id")
         .coerce_to("array")
         .run(conn)
@@ -150,7 +182,9 @@ async def get_role_by_name(conn, name):
         name:
             str: name of role
     """
-    return await r.table("roles").filter({"name": name}).coerce_to("array").run(conn)
+    return (
+        await r.table("roles").get_all(name, index="name").coerce_to("array").run(conn)
+    )
 
 
 async def get_role_membership(conn, next_id, role_id):
@@ -165,7 +199,7 @@ async def get_role_membership(conn, next_id, role_id):
     """
     return (
         await r.table("role_members")
-        .filter({"role_id": role_id, "related_id": next_id})
+        .get_all([role_id, next_id], index="role_id_related_id")
         .coerce_to("array")
         .run(conn)
     )
@@ -243,6 +277,29 @@ async def search_roles_count(conn, search_query):
         return 0
 
 
+async def fetch_role_search_relationships(conn, roles):
+    """Add the members and owners of each role in a page of search results
+    from the search index, in one query.
+    """
+    if not roles:
+        return []
+    return (
+        await r.expr(roles)
+        .map(
+            lambda doc: doc.merge(
+                {
+                    "members": fetch_relationships(
+                        "role_members", "role_id", doc["id"]
+                    ),
+                    "owners": fetch_relationships("role_owners", "role_id", doc["id"]),
+                }
+            )
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+
+
 def roles_search_name(search_query):
     """Search for roles based a string int the name field."""
     query = sanitize_query(search_query["search_input"])
@@ -27,6 +27,9 @@ from rbac.server.db.roles_query import fetch_expired_roles
 ENV = Env()
 LOGGER = get_default_logger(__name__)
 
+# the name and next_id of the last user of a keyset page
+USER_CURSOR_LENGTH = 2
+
 
 async def fetch_user_resource(conn, next_id):
     """Database query to get data on an individual user."""
@@ -90,7 +93,7 @@ async def delete_user_resource(conn, next_id):
     """Database query to delete an individual user."""
     resource = (
         await r.table("users")
-        .filter({"next_id": next_id})
+        .get_all(next_id, index="next_id")
         .delete(return_changes=True)
         .run(conn)
     )
@@ -104,7 +107,7 @@ async def fetch_user_resource_summary(conn, next_id):
     """Database query to get summary data on an individual user."""
     resource = (
         await r.table("users")
-        .filter(lambda user: (user["next_id"] == next_id))
+        .get_all(next_id, index="next_id")
         .merge({"id": r.row["next_id"], "name": r.row["name"], "email": r.row["email"]})
         .without("next_id", "manager_id", "start_block_num", "end_block_num")
         .coerce_to("array")
@@ -119,10 +122,58 @@ async def fetch_user_resource_summary(conn, next_id):
 async def fetch_all_user_resources(conn, start, limit):
     """Database query to compile general data on all user's in database."""
     return (
-        await r.table("users")
-        .order_by(index="name")
-        .slice(start, start + limit)
-        .map(
+        await compile_user_resources(
+            r.table("users")
+            .order_by(index="name")
+            .slice(start, start + limit)
+            .filter(not_blacklisted)
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+
+
+async def fetch_user_resources_after(conn, after, limit):
+    """Database query to compile general data on a keyset page of users, in
+    order of name and next_id.
+    Args:
+        conn:
+            obj: database connection object.
+        after:
+            list: name and next_id of the last user of the previous page, or
+                None for the first page
+        limit:
+            int: number of users in the page
+    """
+    lower = r.minval if after is None else after
+    return (
+        await compile_user_resources(
+            r.table("users")
+            .between(lower, r.maxval, index="name_next_id", left_bound="open")
+            .order_by(index="name_next_id")
+            .filter(not_blacklisted)
+            .limit(limit)
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+
+
+def user_cursor_key(user_resource):
+    """Sort key of a user resource for keyset paging, USER_CURSOR_LENGTH
+    strings long."""
+    return [user_resource["name"], user_resource["id"]]
+
+
+def not_blacklisted(user):
+    """ReQL filter of users whose username is not blacklisted."""
+    return ~user["username"].match(ENV("BLACKLISTED_USER_REGEX", "^$"))
+
+
+def compile_user_resources(users):
+    """Add the relationships of users to a query of users."""
+    return (
+        users.map(
             lambda user: user.merge(
                 {
                     "id": user["next_id"],
@@ -154,12 +205,7 @@ async def fetch_all_user_resources(conn, start, limit):
         .map(
             lambda user: (user["metadata"] == "").branch(user.without("metadata"), user)
         )
-        .filter(
-            lambda user: (~user["username"].match(ENV("BLACKLISTED_USER_REGEX", "^$")))
-        )
         .without("next_id", "manager_id", "start_block_num", "end_block_num")
-        .coerce_to("array")
-        .run(conn)
     )
 
 
@@ -169,7 +215,7 @@ def fetch_user_ids_by_manager(next_id):
     if next_id != "":
         direct_reports = (
             r.table("users")
-            .filter(lambda user: (next_id == user["manager_id"]))
+            .get_all(next_id, index="manager_id")
             .get_field("next_id")
             .coerce_to("array")
         )
@@ -179,20 +225,15 @@ def fetch_user_ids_by_manager(next_id):
 async def fetch_peers(conn, next_id):
     """Fetch a user's peers."""
     user_object = await (
-        r.db("rbac")
-        .table("users")
-        .filter({"next_id": next_id})
-        .coerce_to("array")
-        .run(conn)
+        r.table("users").get_all(next_id, index="next_id").coerce_to("array").run(conn)
     )
     if user_object:
         if "manager_id" in user_object[0]:
             if user_object[0]["manager_id"]:
                 manager_id = user_object[0]["manager_id"]
                 peers = await (
-                    r.db("rbac")
-                    .table("users")
-                    .filter({"manager_id": manager_id})
+                    r.table("users")
+                    .get_all(manager_id, index="manager_id")
                     .coerce_to("array")
                     .run(conn)
                 )
@@ -204,41 +245,81 @@ async def fetch_peers(conn, next_id):
     return []
 
 
+MANAGER_CHAIN_DEPTH = 5
+
+
 async def fetch_manager_chain(conn, next_id):
     """Get a user's manager chain up to 5 manager's high."""
-    manager_chain = []
-    for _ in range(5):
-        user_object = await (
-            r.db("rbac")
-            .table("users")
-            .filter({"next_id": next_id})
-            .coerce_to("array")
-            .run(conn)
-        )
-        if user_object:
-            manager_id = user_object[0]["manager_id"]
-            if manager_id != "":
-                manager_object = await (
-                    r.db("rbac")
-                    .table("users")
-                    .filter(
-                        (r.row["remote_id"] == manager_id)
-                        | (r.row["next_id"] == manager_id)
-                    )
-                    .coerce_to("array")
-                    .run(conn)
-                )
-                if manager_object:
-                    if manager_object[0]:
-                        manager_chain.append(manager_object[0]["next_id"])
-                        next_id = manager_object[0]["next_id"]
-                else:
-                    break
-            else:
-                break
-        else:
+    chains = await fetch_manager_chains(conn, [next_id])
+    return chains[next_id]
+
+
+async def fetch_manager_chains(conn, next_ids, depth=MANAGER_CHAIN_DEPTH):
+    """Get the manager chains of many users, up to depth managers high.
+    Each level of the org chart is resolved for every user in one query, so
+    a page of approvers costs at most depth queries.
+    Args:
+        conn:
+            obj: database connection object.
+        next_ids:
+            list: of next_ids of users
+        depth:
+            int: maximum number of managers in a chain
+    Returns:
+        dict: of lists of manager next_ids, nearest first, by next_id
+    """
+    chains = {next_id: [] for next_id in next_ids}
+    current = {next_id: next_id for next_id in chains}
+    for _ in range(depth):
+        if not current:
             break
-    return manager_chain
+        managers = await fetch_managers(conn, set(current.values()))
+        current = {
+            next_id: managers[user_id]
+            for next_id, user_id in current.items()
+            if user_id in managers
+        }
+        for next_id, manager_id in current.items():
+            chains[next_id].append(manager_id)
+    return chains
+
+
+async def fetch_managers(conn, next_ids):
+    """Get the next_id of the manager of each of many users in one query.
+    A manager_id may be either the manager's remote_id or next_id.
+    Returns:
+        dict: of manager next_ids by next_id, omitting users with no manager
+    """
+    if not next_ids:
+        return {}
+    users = (
+        await r.table("users")
+        .get_all(r.args(list(next_ids)), index="next_id")
+        .pluck("next_id", "manager_id")
+        .filter(lambda user: user["manager_id"].default("") != "")
+        .merge(
+            lambda user: {
+                "managers": r.table("users")
+                .get_all(user["manager_id"], index="remote_id")
+                .union(r.table("users").get_all(user["manager_id"], index="next_id"))
+                .get_field("next_id")
+                .coerce_to("array")
+            }
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+    return first_managers(users)
+
+
+def first_managers(users):
+    """Map each user to the first manager found for it, keeping the first
+    record of a user that appears more than once.
+    """
+    managers = {}
+    for user in users:
+        managers.setdefault(user["next_id"], user["managers"][:1])
+    return {next_id: found[0] for next_id, found in managers.items() if found}
 
 
 async def fetch_user_relationships(conn, next_id):
@@ -293,7 +374,7 @@ async def create_user_map_entry(conn, data):
 
 async def delete_user_mapping_by_next_id(conn, next_id):
     """Delete user_mapping from user_mapping table."""
-    return await r.table("user_mapping").filter({"next_id": next_id}).delete().run(conn)
+    return await r.table("user_mapping").get_all(next_id).delete().run(conn)
 
 
 async def delete_metadata_by_next_id(conn, next_id):
@@ -346,6 +427,28 @@ async def search_users_count(conn, search_query):
         return 0
 
 
+async def fetch_user_search_relationships(conn, users):
+    """Add the roles each user is a member of to a page of search results
+    from the search index, in one query.
+    """
+    if not users:
+        return []
+    return (
+        await r.expr(users)
+        .map(
+            lambda doc: doc.merge(
+                {
+                    "memberOf": fetch_relationships_by_id(
+                        "role_members", doc["id"], "role_id"
+                    )
+                }
+            )
+        )
+        .coerce_to("array")
+        .run(conn)
+    )
+
+
 def users_search_name(search_query):
     """Search for users based a string int the name field."""
     resource = (
@@ -417,7 +520,7 @@ async def update_user_password(conn, next_id, hashed_password, salt):
     """
     resource = (
         await r.table("auth")
-        .filter({"next_id": next_id})
+        .get_all(next_id)
         .update({"hashed_password": hashed_password, "salt": salt})
         .coerce_to("array")
         .run(conn)
@@ -437,14 +540,14 @@ async def get_next_admins(conn):
     """
     next_admins_role_id = (
         await r.table("roles")
-        .filter({"name": "NextAdmins"})
+        .get_all("NextAdmins", index="name")
         .coerce_to("array")
         .get_field("role_id")
         .run(conn)
     )
     return (
         await r.table("role_members")
-        .filter({"role_id": next_admins_role_id[0]})
+        .get_all(next_admins_role_id[0], index="role_id")
         .get_field("related_id")
         .coerce_to("array")
         .run(conn)
@@ -13,9 +13,11 @@
 # limitations under the License.
 # -----------------------------------------------------------------------------
 """Test Addresser"""
+# pylint: disable=protected-access
 import pytest
 
 from rbac.common import addresser
+from rbac.common.crypto.hash import _hash_string
 from rbac.common.logs import get_default_logger
 from tests.rbac.common.assertions import TestAssertions
 
@@ -50,3 +52,34 @@ class TestAddresser(TestAssertions):
         self.assertIsIdentifier(hash1)
         self.assertIsIdentifier(hash2)
         self.assertNotEqual(hash1, hash2)
+
+    def test_hash_is_memoized(self):
+        """Test hash returns the same value for a repeated id from cache"""
+        value = addresser.role.unique_id() + "-name"
+        hits = _hash_string.cache_info().hits
+        first = addresser.role.hash(value)
+        self.assertEqual(_hash_string.cache_info().hits, hits)
+        self.assertEqual(addresser.role.hash(value), first)
+        self.assertEqual(addresser.role.hash(value.upper()), first)
+        self.assertEqual(_hash_string.cache_info().hits, hits + 2)
+        self.assertEqual(addresser.role.hash(None), "00" * 12)
+
+    def test_addresses_bulk(self):
+        """Test addresses_bulk returns the same addresses as address"""
+        role_id = addresser.role.unique_id()
+        next_ids = [addresser.user.unique_id() for _ in range(3)] + ["user name"]
+
+        self.assertEqual(
+            addresser.role.member.addresses_bulk(role_id, next_ids),
+            [addresser.role.member.address(role_id, next_id) for next_id in next_ids],
+        )
+        self.assertEqual(
+            addresser.role.member.addresses_bulk([role_id] * 4, next_ids),
+            [addresser.role.member.address(role_id, next_id) for next_id in next_ids],
+        )
+        self.assertEqual(
+            addresser.user.addresses_bulk(next_ids),
+            [addresser.user.address(next_id) for next_id in next_ids],
+        )
+        with self.assertRaises(TypeError):
+            addresser.user.addresses_bulk(next_ids[0])
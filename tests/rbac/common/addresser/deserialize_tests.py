@@ -0,0 +1,44 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Test the protobuf classes of the addressers are resolved once per class"""
+# pylint: disable=protected-access
+import pytest
+
+from rbac.common.addresser import addressers
+from tests.rbac.common.assertions import TestAssertions
+
+
+def resolve_container(registered):
+    """The state container resolved by name, as on every call before caching"""
+    return type(registered)._state_container.fget.__wrapped__(registered)
+
+
+@pytest.mark.addressing
+@pytest.mark.library
+class TestAddresserDeserialize(TestAssertions):
+    """Test the protobuf classes of the addressers are resolved once per class"""
+
+    def test_resolved_classes_are_unchanged(self):
+        """Test the cached container of every addresser is the one named"""
+        for registered in addressers.ADDRESSERS.values():
+            try:
+                expected = resolve_container(registered)
+            except AttributeError:
+                with self.assertRaises(AttributeError):
+                    registered._state_container  # pylint: disable=pointless-statement
+                continue
+            self.assertIs(registered._state_container, expected)
+            self.assertIs(registered._state_container, expected)
+
@@ -0,0 +1,69 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Test the address type dispatch of the addresser registry"""
+import pytest
+
+from rbac.common import addresser
+from rbac.common.addresser import addressers
+from tests.rbac.common.assertions import TestAssertions
+
+
+def scan_address_type(address):
+    """The registry lookup before dispatch: try every addresser's pattern"""
+    for _, registered in addressers.ADDRESSERS.items():
+        result = registered.get_address_type(address=address)
+        if result:
+            return result
+    return None
+
+
+def sample_addresses():
+    """An address of every registered address type"""
+    return [
+        registered.address(
+            object_id=registered.unique_id(), related_id=registered.unique_id()
+        )
+        if registered.related_type.value
+        else registered.address(object_id=registered.unique_id())
+        for registered in addressers.ADDRESSERS.values()
+    ]
+
+
+@pytest.mark.addressing
+@pytest.mark.library
+class TestAddresserDispatch(TestAssertions):
+    """Test the address type dispatch of the addresser registry"""
+
+    def test_every_addresser_is_dispatched(self):
+        """Test each registered address type has its own type key"""
+        self.assertEqual(
+            len(addressers.ADDRESSERS_BY_TYPE_KEY), len(addressers.ADDRESSERS)
+        )
+        for address in sample_addresses():
+            self.assertEqual(
+                addresser.get_address_type(address), scan_address_type(address)
+            )
+            self.assertEqual(addresser.parse(address).address, address)
+
+    def test_invalid_addresses_are_rejected(self):
+        """Test a known type key does not bypass validation of the address"""
+        address = addresser.user.address(object_id=addresser.user.unique_id())
+        with self.assertRaises(ValueError):
+            addresser.get_address_type(address[:-2] + "ff")
+        with self.assertRaises(ValueError):
+            addresser.parse(address[:20])
+        with self.assertRaises(ValueError):
+            addresser.parse("00" * 35)
+
@@ -0,0 +1,117 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Test the batched existence checks of the relationship base class"""
+# pylint: disable=protected-access,redefined-outer-name
+import threading
+from base64 import b64encode
+
+import pytest
+
+from rbac.common.role import Role
+from rbac.common.base import base_relationship
+from rbac.common.sawtooth.client_sync import ClientSync, StateSnapshot
+from rbac.common.logs import get_default_logger
+
+LOGGER = get_default_logger(__name__)
+
+ROLES = 300
+
+
+class FakeRestClient:
+    """Answers state reads from a dict, counting the reads and their heads"""
+
+    def __init__(self, state):
+        self.state = state
+        self.heads = ["head-1"]
+        self.reads = []
+        self._lock = threading.Lock()
+
+    def get(self, path, head=None):
+        """Read /state/<address>"""
+        address = path[len("/state/") :]
+        with self._lock:
+            self.reads.append((address, head))
+        if address not in self.state:
+            return None
+        return {"data": self.state[address], "head": head}
+
+    def get_head(self):
+        """The current chain head"""
+        return self.heads[-1]
+
+
+def member_state(relationship, role_ids, next_id):
+    """The state of the member relationships of a user with roles"""
+    state = {}
+    for role_id in role_ids:
+        container = relationship._state_container()
+        container.relationships.add(object_id=role_id, related_id=next_id)
+        address = relationship.address(object_id=role_id, related_id=next_id)
+        state[address] = b64encode(container.SerializeToString()).decode()
+    return state
+
+
+@pytest.fixture
+def member():
+    """The role member relationship"""
+    return Role().member
+
+
+@pytest.fixture
+def fake(monkeypatch, member):
+    """A client of a state where user-0 is a member of the even roles"""
+    role_ids = ["{:024x}".format(i) for i in range(ROLES)]
+    rest_client = FakeRestClient(member_state(member, role_ids[::2], "user-0"))
+    client = ClientSync()
+    client._client = rest_client
+    monkeypatch.setattr(base_relationship, "ClientSync", lambda: client)
+    return client, rest_client, role_ids
+
+
+@pytest.mark.library
+def test_exists_many(member, fake):
+    """Every address is read once, in parallel, and matches exists"""
+    _, rest_client, role_ids = fake
+    pairs = [(role_id, "user-0") for role_id in role_ids]
+    result = member.exists_many(pairs + pairs[:10])
+    assert len(rest_client.reads) == ROLES
+    assert result == {pair: index % 2 == 0 for index, pair in enumerate(pairs)}
+    assert member.exists(role_ids[0], "user-0")
+    assert not member.exists(role_ids[1], "user-0")
+    assert not member.exists(role_ids[0], "user-1")
+
+
+@pytest.mark.library
+def test_exists_with_snapshot(member, fake):
+    """Repeated checks within a snapshot read each address once, at its head"""
+    client, rest_client, role_ids = fake
+    snapshot = StateSnapshot(ttl=60, client=client)
+    pairs = [(role_id, "user-0") for role_id in role_ids[:20]]
+    assert member.exists_many(pairs, snapshot) == member.exists_many(pairs, snapshot)
+    assert member.exists(role_ids[0], "user-0", snapshot)
+    assert len(rest_client.reads) == 20
+    assert {head for _, head in rest_client.reads} == {"head-1"}
+
+
+@pytest.mark.library
+def test_snapshot_expires(member, fake):
+    """An expired snapshot reads the addresses again at the new head"""
+    client, rest_client, role_ids = fake
+    snapshot = StateSnapshot(ttl=0, client=client)
+    assert member.exists(role_ids[0], "user-0", snapshot)
+    rest_client.heads.append("head-2")
+    assert member.exists(role_ids[0], "user-0", snapshot)
+    address = member.address(object_id=role_ids[0], related_id="user-0")
+    assert rest_client.reads == [(address, "head-1"), (address, "head-2")]
@@ -15,6 +15,8 @@
 """Test the Sawtooth batch helper class"""
 
 # pylint: disable=no-member
+from concurrent.futures import ProcessPoolExecutor
+
 import pytest
 
 from rbac.common import addresser
@@ -25,6 +27,7 @@ from rbac.common.sawtooth.batcher import (
     unmake,
     make_transaction,
     make_transaction_header,
+    make_transactions_parallel,
     make,
     make_batch,
     batch_to_list,
@@ -202,6 +205,41 @@ class TestBatchClient(TestAssertions):
             signer_public_key=signer.public_key,
         )
 
+    def test_make_transactions_parallel(self):
+        """Test the make transactions parallel batch function"""
+        signer = Key()
+        payloads = []
+        for i in range(5):
+            message = user_transaction_pb2.CreateUser(name="foobar{}".format(i))
+            message.next_id = addresser.user.unique_id()
+            inputs = [addresser.user.address(message.next_id)]
+            payloads.append(
+                make_payload(
+                    message=message,
+                    message_type=RBACPayload.CREATE_USER,
+                    inputs=inputs,
+                    outputs=inputs,
+                    signer_user_id=message.next_id,
+                    signer_public_key=signer.public_key,
+                )
+            )
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            transactions = make_transactions_parallel(
+                payloads=payloads,
+                signer_keypair=signer,
+                executor=executor,
+                chunk_size=2,
+            )
+
+        self.assertEqual(len(transactions), len(payloads))
+        for transaction, payload in zip(transactions, payloads):
+            self.assertValidTransaction(
+                transaction=transaction,
+                payload=payload,
+                signer_public_key=signer.public_key,
+            )
+
     def test_make_batch(self):
         """Test the make batch batch function"""
         payload, signer = self.get_test_payload()
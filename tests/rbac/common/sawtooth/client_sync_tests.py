@@ -40,7 +40,7 @@ class TestRestClient(TestAssertions):
     def test_state(self):
         """Grab the entire blockchain state and deserialize it"""
         subtree = addresser.family.namespace
-        for item in ClientSync().list_state(subtree=subtree)["data"]:
+        for item in ClientSync().iter_state(subtree=subtree, prefetch=4):
             address_type = item["address_type"] = addresser.get_address_type(
                 item["address"]
             )
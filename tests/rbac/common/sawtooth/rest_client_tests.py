@@ -0,0 +1,243 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Test the pooled transport of the Sawtooth REST clients against a stub"""
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from rbac.common.logs import get_default_logger
+from rbac.common.sawtooth.async_rest_client import AsyncRestClient
+from rbac.common.sawtooth.rest_client import CliException, RestClient
+
+LOGGER = get_default_logger(__name__)
+
+REQUESTS = 50
+PAGES = 10000
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers like the REST API, failing the first server.failures requests"""
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, don't wait on delayed acks
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve /status, the slow /slow, two pages of /blocks and
+        server.pages pages of /state
+        """
+        self.server.requests.append(("GET", self.path))
+        if self.server.failures:
+            self.server.failures -= 1
+            return self.reply(503, {"error": "unavailable"})
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        if self.path.startswith("/state"):
+            return self.reply_page()
+        if self.path.startswith("/blocks?start=2"):
+            return self.reply(200, {"data": [2], "paging": {}})
+        if self.path.startswith("/blocks"):
+            url = "http://{}:{}/blocks?start=2".format(*self.server.server_address)
+            return self.reply(200, {"data": [1], "paging": {"next": url}})
+        return self.reply(200, {"data": {"ok": True}})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Serve /batch_statuses"""
+        length = int(self.headers["Content-Length"])
+        batch_ids = json.loads(self.rfile.read(length).decode())
+        self.server.requests.append(("POST", self.path))
+        if self.server.failures:
+            self.server.failures -= 1
+            return self.reply(503, {"error": "unavailable"})
+        return self.reply(
+            200, {"data": [{"id": id, "status": "COMMITTED"} for id in batch_ids]}
+        )
+
+    def reply_page(self):
+        """Send the page of the start query, linking to the next one"""
+        start = int(parse_qs(urlparse(self.path).query).get("start", ["0"])[0])
+        paging = {}
+        if start + 1 < self.server.pages:
+            paging["next"] = "http://{}:{}/state?head=1&start={}".format(
+                *self.server.server_address, start + 1
+            )
+        return self.reply(200, {"data": [start], "head": "1", "paging": paging})
+
+    def reply(self, code, body):
+        """Send a json response on the kept-alive connection"""
+        content = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class StubServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Threaded stub of the REST API"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.connections = 0
+        self.requests = []
+        self.failures = 0
+        self.pages = PAGES
+
+    @property
+    def url(self):
+        """Base url of the stub"""
+        return "http://{}:{}".format(*self.server_address)
+
+
+@pytest.fixture
+def stub():
+    """A stub REST API served from a thread"""
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def rate(send):
+    """Requests per second of REQUESTS sequential calls"""
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        send()
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def test_requests_reuse_pooled_connections(stub):
+    """Sequential requests share one kept-alive connection."""
+    unpooled = rate(lambda: requests.get(stub.url + "/status").json())
+    unpooled_connections = stub.connections
+    client = RestClient(base_url=stub.url)
+    stub.connections = 0
+    pooled = rate(client.get_status)
+    client.close()
+    LOGGER.info(
+        "stub REST API: %.0f requests/s unpooled, %.0f pooled", unpooled, pooled
+    )
+    assert unpooled_connections == REQUESTS
+    assert stub.connections == 1
+
+
+def test_gets_are_retried_and_posts_are_not(stub):
+    """A GET outlives a restarting REST API, a POST fails at once."""
+    client = RestClient(base_url=stub.url, retries=2, retry_backoff=0.01)
+    stub.failures = 2
+    assert client.get_status() == {"ok": True}
+    assert len(stub.requests) == 3
+    stub.failures = 1
+    with pytest.raises(CliException):
+        client.get_statuses(["batch"])
+    assert client.get_statuses(["batch"]) == [{"id": "batch", "status": "COMMITTED"}]
+    client.close()
+
+
+def test_read_timeout(stub):
+    """A slow response fails after the read timeout."""
+    client = RestClient(base_url=stub.url, read_timeout=0.1, retries=0)
+    with pytest.raises(CliException):
+        client.get("/slow")
+    client.close()
+
+
+def test_iter_state_streams_pages(stub):
+    """Pages are fetched as they are consumed, one in memory at a time."""
+    client = RestClient(base_url=stub.url)
+    entries = client.iter_state(subtree="9f4448")
+    assert next(entries) == 0
+    assert len(stub.requests) == 1
+    assert ("GET", "/state?address=9f4448") in stub.requests
+    start = time.perf_counter()
+    count = 1 + sum(1 for _ in entries)
+    LOGGER.info(
+        "streamed %s pages at %.0f pages/s",
+        count,
+        count / (time.perf_counter() - start),
+    )
+    assert count == PAGES
+    assert len(stub.requests) == PAGES
+    client.close()
+
+
+def test_iter_state_prefetches_pages(stub):
+    """A prefetch thread reads a bounded number of pages ahead."""
+    stub.pages = 100
+    client = RestClient(base_url=stub.url)
+    entries = client.iter_state(prefetch=4)
+    assert next(entries) == 0
+    time.sleep(0.2)
+    assert len(stub.requests) <= 1 + 4 + 1
+    assert list(entries) == list(range(1, 100))
+    entries = client.iter_state(prefetch=4)
+    next(entries)
+    entries.close()
+    client.close()
+
+
+def test_iter_state_raises_fetch_errors(stub):
+    """An error of the prefetch thread is raised to the consumer."""
+    stub.pages = 3
+    client = RestClient(base_url=stub.url, retries=0)
+    entries = client.iter_state(prefetch=2)
+    assert next(entries) == 0
+    stub.failures = 1
+    with pytest.raises(CliException):
+        list(entries)
+    client.close()
+
+
+def test_get_concatenates_pages(stub):
+    """get still returns the data of every page at once."""
+    stub.pages = 100
+    client = RestClient(base_url=stub.url)
+    assert client.get("/state")["data"] == list(range(100))
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_client(stub):
+    """The async client pages, retries GETs and fails POSTs at once."""
+    client = AsyncRestClient(base_url=stub.url, retries=2, retry_backoff=0.01)
+    try:
+        stub.failures = 2
+        assert (await client.get("/blocks"))["data"] == [1, 2]
+        stub.failures = 1
+        with pytest.raises(CliException):
+            await client.get_statuses(["batch"], wait=1)
+        assert await client.get_statuses(["batch"]) == [
+            {"id": "batch", "status": "COMMITTED"}
+        ]
+        assert stub.connections == 1
+    finally:
+        await client.close()
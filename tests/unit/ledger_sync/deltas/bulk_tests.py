@@ -0,0 +1,92 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Test Suite for the bulk write path of the delta handler."""
+from collections import namedtuple
+
+import pytest
+
+from rbac.common import addresser
+from rbac.common.protobuf import user_state_pb2
+from rbac.ledger_sync.deltas import bulk
+
+Change = namedtuple("Change", ["address", "value"])
+Block = namedtuple("Block", ["block_num", "state_changes"])
+
+
+def user_change(next_id, name="name"):
+    """Make a state change that sets a user"""
+    container = user_state_pb2.UserContainer(
+        users=[user_state_pb2.User(next_id=next_id, name=name)]
+    )
+    return Change(addresser.user.address(next_id), container.SerializeToString())
+
+
+def user_removal(next_id):
+    """Make a state change that deletes a user"""
+    return Change(addresser.user.address(next_id), b"")
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Record the runs written instead of writing them"""
+    written = []
+
+    def record(kind):
+        def apply(changes):
+            written.append((kind, list(changes._changes)))
+
+        return apply
+
+    monkeypatch.setattr(bulk.BlockChanges, "_apply_updates", record("update"))
+    monkeypatch.setattr(bulk.BlockChanges, "_apply_removals", record("remove"))
+    return written
+
+
+def test_consecutive_changes_share_a_run(runs):
+    """Updates to distinct addresses are written together"""
+    block = Block(1, [user_change("a"), user_change("b"), user_change("c")])
+    bulk.bulk_update_database(None, block)
+    assert runs == [("update", [change.address for change in block.state_changes])]
+
+
+def test_runs_keep_block_order(runs):
+    """A repeated address, or a switch between updates and removals,
+    starts a new run
+    """
+    changes = [
+        user_change("a"),
+        user_change("b"),
+        user_change("a", "renamed"),
+        user_removal("b"),
+        user_removal("c"),
+    ]
+    bulk.bulk_update_database(None, Block(1, changes))
+    assert [(kind, len(addresses)) for kind, addresses in runs] == [
+        ("update", 2),
+        ("update", 1),
+        ("remove", 2),
+    ]
+
+
+def test_non_family_addresses_are_skipped(runs):
+    """Addresses outside the rbac namespace are ignored"""
+    bulk.bulk_update_database(None, Block(1, [Change("00" * 35, b"value")]))
+    assert runs == []
+
+
+def test_merge_rows():
+    """Existing documents are sent as deltas, new ones whole"""
+    rows = {"a": ({"id": "a", "new": True}, {"x": 1}), "b": ({"id": "b"}, {"x": 2})}
+    assert bulk._merge_rows(rows, {"a"}, "id") == [{"id": "a", "x": 1}, {"id": "b"}]
@@ -0,0 +1,66 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# -----------------------------------------------------------------------------
+"""Test Suite for the fork rollback of the delta handler."""
+from rbac.ledger_sync.deltas import handlers
+from rbac.server.db.index_migrations import REQUIRED_INDEXES
+
+
+class FakeQuery:
+    """Stand-in for a ReQL query, returning a fixed result when run"""
+
+    def __init__(self, runs, name, result):
+        self.runs = runs
+        self.name = name
+        self.result = result
+
+    def run(self, conn):
+        """Record the run and return the result"""
+        self.runs.append(self.name)
+        return self.result
+
+
+def test_drop_fork_runs_one_query_per_table(monkeypatch):
+    """Blocks and each state table are rolled back with one query each."""
+    runs = []
+    monkeypatch.setattr(
+        handlers,
+        "drop_blocks_query",
+        lambda block_num: FakeQuery(runs, "blocks", {"deleted": 2, "errors": 0}),
+    )
+    monkeypatch.setattr(
+        handlers,
+        "rollback_query",
+        lambda table, block_num: FakeQuery(
+            runs,
+            table,
+            [{"deleted": 3, "errors": 0}, {"replaced": 1, "errors": 0, "changes": []}],
+        ),
+    )
+    results = handlers.drop_fork(None, 10)
+    assert runs == ["blocks"] + handlers.FORK_TABLES
+    assert len(set(runs)) == len(runs)
+    assert results == {
+        "deleted": 2 + 3 * len(handlers.FORK_TABLES),
+        "replaced": len(handlers.FORK_TABLES),
+        "errors": 0,
+    }
+
+
+def test_fork_tables_are_indexed():
+    """Every rolled back table has its block number indexes."""
+    indexes = {(index.table, index.name) for index in REQUIRED_INDEXES}
+    for table in handlers.FORK_TABLES:
+        assert (table, "start_block_num") in indexes
+        assert (table, "end_block_num") in indexes
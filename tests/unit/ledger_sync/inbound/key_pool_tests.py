@@ -0,0 +1,70 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Test Suite for the key pair pool of the inbound listener."""
+import time
+
+from rbac.common.crypto.keys import Key
+from rbac.common.crypto.secrets import decrypt_private_key
+from rbac.ledger_sync.inbound import key_pool
+
+AES_KEY = "11" * 32
+
+
+def wait_for_depth(pool, depth, timeout=10):
+    """Wait until the refill thread has filled the pool to depth"""
+    deadline = time.monotonic() + timeout
+    while pool.metrics()["depth"] < depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pool.metrics()["depth"]
+
+
+def test_pool_refills_in_background():
+    """Pairs are taken from the pool, which refills up to its size."""
+    pool = key_pool.KeyPool(size=3, aes_key=AES_KEY).start()
+    try:
+        assert wait_for_depth(pool, 3) == 3
+        key, encrypted = pool.take()
+        assert pool.metrics()["hits"] == 1
+        assert (
+            decrypt_private_key(AES_KEY, key.public_key, encrypted)
+            == key.private_key_bytes
+        )
+        assert wait_for_depth(pool, 3) == 3
+    finally:
+        pool.close()
+
+
+def test_empty_pool_generates_inline():
+    """An empty pool falls back to generating the pair on the caller."""
+    pool = key_pool.KeyPool(size=0, aes_key=AES_KEY).start()
+    key, encrypted = pool.take()
+    assert isinstance(key, Key)
+    assert encrypted
+    assert pool.metrics() == {"depth": 0, "size": 0, "hits": 0, "misses": 1}
+    pool.close()
+
+
+def test_take_without_pool():
+    """Callers get a pair whether or not the pool is open."""
+    key_pool.close_pool()
+    assert key_pool.take_key_pair().key.public_key
+    pool = key_pool.open_pool(size=1, aes_key=AES_KEY)
+    try:
+        wait_for_depth(pool, 1)
+        key_pool.take_key_pair()
+        assert pool.metrics()["hits"] == 1
+    finally:
+        key_pool.close_pool()
+    assert key_pool.get_pool() is None
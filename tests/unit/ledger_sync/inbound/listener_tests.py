@@ -0,0 +1,191 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Test Suite for the batched pipeline of the inbound queue listener."""
+import pytest
+from sawtooth_sdk.protobuf import batch_pb2
+
+# addresser must be loaded before the listener's client_sync import
+from rbac.common import addresser  # pylint: disable=unused-import
+from rbac.common.sawtooth.rest_client import CliException
+from rbac.ledger_sync.inbound import listener
+from rbac.ledger_sync.inbound.listener import InboundPipeline
+
+
+class FakeClient:
+    """ Stand-in for ClientSync that commits every batch on its second
+    status check.
+    """
+
+    def __init__(self, invalid=()):
+        self.sent = []
+        self.checks = {}
+        self.invalid = set(invalid)
+
+    def send_batches(self, batch_list):
+        """Record the batch ids of a submitted BatchList"""
+        self.sent.append([batch.header_signature for batch in batch_list.batches])
+
+    def get_statuses(self, batch_ids, wait=None):
+        """Return PENDING on the first check of a batch, then its result"""
+        statuses = []
+        for batch_id in batch_ids:
+            self.checks[batch_id] = self.checks.get(batch_id, 0) + 1
+            status = "PENDING"
+            if self.checks[batch_id] > 1:
+                status = "INVALID" if batch_id in self.invalid else "COMMITTED"
+            statuses.append({"id": batch_id, "status": status})
+        return statuses
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """ Replace the RethinkDB reads and writes of the listener, returning
+    the (record id, status) pairs written.
+    """
+    results = []
+    monkeypatch.setattr(
+        listener,
+        "prepare",
+        lambda rec, conn, remote_ids=None: batch_pb2.Batch(
+            header_signature="batch-" + rec["id"]
+        ),
+    )
+    monkeypatch.setattr(
+        listener,
+        "record_status",
+        lambda rec, status, conn: results.append((rec["id"], status["status"])),
+    )
+    monkeypatch.setattr(
+        listener,
+        "record_error",
+        lambda rec, error, conn: results.append((rec["id"], "ERROR")),
+    )
+    return results
+
+
+def make_record(rec_id, data_type="user", remote_id=None, members=None):
+    """Create an inbound queue record"""
+    data = {"remote_id": remote_id or rec_id}
+    if members is not None:
+        data["members"] = members
+    return {"id": rec_id, "data_type": data_type, "data": data}
+
+
+def test_records_are_packed_into_batch_lists(recorded):
+    """Batches are sent batch_size at a time and each record is resolved."""
+    client = FakeClient(invalid=["batch-u3"])
+    pipeline = InboundPipeline(None, batch_size=2, max_in_flight=4, client=client)
+    for rec_id in ["u1", "u2", "u3", "u4", "u5"]:
+        pipeline.submit(make_record(rec_id))
+    assert client.sent == [["batch-u1", "batch-u2"], ["batch-u3", "batch-u4"]]
+    pipeline.flush()
+    assert client.sent[-1] == ["batch-u5"]
+    assert sorted(recorded) == [
+        ("u1", "COMMITTED"),
+        ("u2", "COMMITTED"),
+        ("u3", "INVALID"),
+        ("u4", "COMMITTED"),
+        ("u5", "COMMITTED"),
+    ]
+    assert pipeline.pending == 0
+
+
+def test_in_flight_batch_lists_are_bounded(recorded):
+    """No more than max_in_flight BatchLists are outstanding."""
+    client = FakeClient()
+    pipeline = InboundPipeline(None, batch_size=1, max_in_flight=2, client=client)
+    pipeline.submit(make_record("u1"))
+    pipeline.submit(make_record("u2"))
+    assert not recorded
+    pipeline.submit(make_record("u3"))
+    assert ("u1", "COMMITTED") in recorded
+    assert len(client.sent) == 3
+
+
+def test_groups_wait_for_their_members(recorded):
+    """A group is only built once the users it references are resolved."""
+    client = FakeClient()
+    pipeline = InboundPipeline(None, batch_size=10, max_in_flight=4, client=client)
+    pipeline.submit(make_record("u1"))
+    pipeline.submit(make_record("u2"))
+    pipeline.submit(make_record("g1", data_type="group", members=["u2"]))
+    assert recorded == [("u1", "COMMITTED"), ("u2", "COMMITTED")]
+    assert client.sent == [["batch-u1", "batch-u2"]]
+    pipeline.flush()
+    assert recorded[-1] == ("g1", "COMMITTED")
+
+
+def test_failed_submission_is_retried_per_batch(recorded):
+    """A rejected BatchList is resubmitted one batch at a time."""
+
+    class RejectingClient(FakeClient):
+        """Rejects any BatchList containing batch-u2"""
+
+        def send_batches(self, batch_list):
+            ids = [batch.header_signature for batch in batch_list.batches]
+            if "batch-u2" in ids:
+                raise ValueError("invalid batch")
+            super().send_batches(batch_list)
+
+    client = RejectingClient()
+    pipeline = InboundPipeline(None, batch_size=3, max_in_flight=4, client=client)
+    for rec_id in ["u1", "u2", "u3"]:
+        pipeline.submit(make_record(rec_id))
+    pipeline.flush()
+    assert client.sent == [["batch-u1"], ["batch-u3"]]
+    assert sorted(recorded) == [
+        ("u1", "COMMITTED"),
+        ("u2", "ERROR"),
+        ("u3", "COMMITTED"),
+    ]
+
+
+def test_failed_status_checks_are_retried(recorded, monkeypatch):
+    """A failed status request leaves the batches in flight for the next poll."""
+
+    class FlakyClient(FakeClient):
+        """Fails the first status request"""
+
+        failures = 1
+
+        def get_statuses(self, batch_ids, wait=None):
+            if self.failures:
+                self.failures -= 1
+                raise CliException("timed out")
+            return super().get_statuses(batch_ids, wait=wait)
+
+    monkeypatch.setattr(listener, "STATUS_RETRY_DELAY", 0)
+    client = FlakyClient()
+    pipeline = InboundPipeline(None, batch_size=1, max_in_flight=4, client=client)
+    pipeline.submit(make_record("u1"))
+    pipeline.poll()
+    assert pipeline.pending == 1
+    pipeline.flush()
+    assert recorded == [("u1", "COMMITTED")]
+
+
+def test_committed_users_are_remembered(recorded):
+    """Users committed in a run are cached for the groups that follow."""
+    client = FakeClient(invalid=["batch-u2"])
+    pipeline = InboundPipeline(None, batch_size=10, max_in_flight=4, client=client)
+    for rec_id in ["u1", "u2"]:
+        rec = make_record(rec_id, remote_id="CN=" + rec_id)
+        rec["next_id"] = "next-" + rec_id
+        pipeline.submit(rec)
+    pipeline.flush()
+    assert pipeline.remote_id_cache.get("CN=u1") == "next-u1"
+    assert pipeline.remote_id_cache.get("CN=u2") is None
+    pipeline.submit(make_record("d1", data_type="user_deleted", remote_id="CN=u1"))
+    assert pipeline.remote_id_cache.get("CN=u1") is None
@@ -0,0 +1,83 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Test Suite for the bulk remote id translation of the inbound listener."""
+import pytest
+
+# addresser must be loaded before the listener's client_sync import
+from rbac.common import addresser  # pylint: disable=unused-import
+from rbac.ledger_sync.inbound import listener
+from rbac.ledger_sync.inbound import remote_ids
+from rbac.ledger_sync.inbound.remote_ids import RemoteIdCache
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """ Serve fetch_next_ids from in-memory tables, returning the
+    (table, remote ids) of every query made.
+    """
+    tables = {
+        "users": {"CN=alice": "next-alice", "CN=bob": "next-bob"},
+        "user_mapping": {"CN=carol": "next-carol"},
+    }
+    made = []
+
+    def fetch_next_ids(conn, table, wanted):
+        made.append((table, sorted(wanted)))
+        return {
+            remote_id: next_id
+            for remote_id, next_id in tables[table].items()
+            if remote_id in wanted
+        }
+
+    monkeypatch.setattr(remote_ids, "fetch_next_ids", fetch_next_ids)
+    return made
+
+
+def test_translate_with_one_query_per_table(queries):
+    """Members are resolved together, unknown remote ids are kept."""
+    rec = {"data": {"members": ["CN=alice", "CN=carol", "CN=bob", "CN=dave"]}}
+    listener.translate_field_to_next(rec, "members", conn=object())
+    assert rec["data"]["members"] == ["next-alice", "next-carol", "next-bob", "CN=dave"]
+    assert queries == [
+        ("users", ["CN=alice", "CN=bob", "CN=carol", "CN=dave"]),
+        ("user_mapping", ["CN=carol", "CN=dave"]),
+    ]
+
+
+def test_cache_is_reused_across_groups(queries):
+    """A later group of the same run reads resolved members from the cache."""
+    cache = RemoteIdCache(max_size=10)
+    first = {"data": {"members": ["CN=alice", "CN=bob"]}}
+    listener.translate_field_to_next(first, "members", object(), cache)
+    second = {"data": {"owners": "CN=alice"}}
+    listener.translate_field_to_next(second, "owners", object(), cache)
+    assert second["data"]["owners"] == ["next-alice"]
+    assert len(queries) == 1
+    assert cache.metrics()["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """The cache holds at most max_size remote ids."""
+    cache = RemoteIdCache(max_size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    cache.discard("a")
+    assert cache.get("a") is None
+    assert len(cache) == 1
+    assert cache.metrics()["evictions"] == 1
@@ -0,0 +1,74 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Test Suite for the known block ids of the ledger sync subscriber."""
+import time
+
+from rbac.ledger_sync import known_blocks
+from rbac.ledger_sync.known_blocks import KNOWN_COUNT, KnownBlocks
+
+
+class BlocksIndex:
+    """ In-memory stand-in for the blocks table read newest first through
+    its primary index, which only visits the rows it returns.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.visited = 0
+
+    def query(self, limit):
+        """Stand-in for last_blocks_query"""
+        index = self
+
+        class Query:
+            """Stand-in for the ReQL query"""
+
+            @staticmethod
+            def run(conn):
+                """Yield block ids newest first"""
+                for block_num in range(index.count - 1, index.count - 1 - limit, -1):
+                    index.visited += 1
+                    yield "block-{}".format(block_num)
+
+        return Query()
+
+
+def load_time(monkeypatch, count):
+    """Time loading the known blocks of a chain of count blocks"""
+    blocks = BlocksIndex(count)
+    monkeypatch.setattr(known_blocks, "last_blocks_query", blocks.query)
+    start = time.perf_counter()
+    ids = known_blocks.last_known_blocks(None, KNOWN_COUNT)
+    return time.perf_counter() - start, ids, blocks.visited
+
+
+def test_start_up_reads_only_the_known_blocks(monkeypatch):
+    """Start up reads the same few blocks at 1M blocks as at 100."""
+    short, _, _ = load_time(monkeypatch, 100)
+    elapsed, ids, visited = load_time(monkeypatch, 1000000)
+    assert visited == KNOWN_COUNT
+    assert ids == ["block-{}".format(num) for num in range(999985, 1000000)]
+    assert elapsed < short * 50 + 0.01
+
+
+def test_ring_keeps_the_most_recent_ids():
+    """The ring holds the newest ids, oldest first, without repeats."""
+    ring = KnownBlocks(count=3)
+    ring.extend(["a", "b"])
+    ring.add("b")
+    ring.add("c")
+    ring.add("d")
+    assert ring.ids() == ["b", "c", "d"]
+    assert len(ring) == 3
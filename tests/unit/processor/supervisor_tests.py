@@ -0,0 +1,83 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Test Suite for the supervisor of the transaction processor workers."""
+import os
+import sys
+import threading
+import time
+
+from rbac.processor.supervisor import Supervisor
+
+
+def crash():
+    """A worker that fails at once"""
+    sys.exit(1)
+
+
+def serve():
+    """A worker that runs until terminated"""
+    time.sleep(60)
+
+
+def wait_until(condition, timeout=10):
+    """Poll until condition holds, or fail after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def pid_alive(pid):
+    """Whether a process of the given id is running"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def run_in_thread(supervisor):
+    """Run the supervisor loop on a thread"""
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_restarts_workers_that_exit():
+    """Workers that exit are started again until shutdown"""
+    supervisor = Supervisor(crash, workers=2, restart_delay=0.01)
+    thread = run_in_thread(supervisor)
+    wait_until(lambda: supervisor.metrics()["exited"] >= 4)
+    supervisor.shutdown()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    metrics = supervisor.metrics()
+    assert metrics["workers"] == 2
+    assert metrics["started"] >= metrics["exited"] + 1
+
+
+def test_shutdown_terminates_workers():
+    """Shutdown stops every worker and returns from run"""
+    supervisor = Supervisor(serve, workers=3, restart_delay=0.01)
+    thread = run_in_thread(supervisor)
+    wait_until(lambda: len(supervisor.pids()) == 3)
+    pids = supervisor.pids()
+    assert len(set(pids)) == 3
+    assert os.getpid() not in pids
+    supervisor.shutdown()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert supervisor.metrics() == {"workers": 3, "started": 3, "exited": 0}
+    assert not any(pid_alive(pid) for pid in pids)
@@ -0,0 +1,155 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/api/auth_cache.py"""
+import asyncio
+import time
+
+import pytest
+
+from rbac.server.api.auth_cache import AuthCache
+
+TOKEN = "token-of-user-1"
+AUTH = {"next_id": "user-1", "encrypted_private_key": "abc"}
+
+
+def watching_cache(**kwargs):
+    """Create a cache that behaves as if its changefeed is running."""
+    cache = AuthCache(**kwargs)
+    cache.watching = True
+    return cache
+
+
+def test_cache_bypassed_without_changefeed():
+    """Nothing is cached while the auth changefeed is down."""
+    cache = AuthCache()
+    cache.put(TOKEN, "user-1", AUTH)
+    assert cache.get(TOKEN) is None
+    assert cache.metrics()["size"] == 0
+
+
+def test_hit_and_miss_counters():
+    """Cached tokens are returned and counted as hits."""
+    cache = watching_cache()
+    assert cache.get(TOKEN) is None
+    cache.put(TOKEN, "user-1", AUTH)
+    entry = cache.get(TOKEN)
+    assert entry.next_id == "user-1"
+    assert entry.auth == AUTH
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+
+
+def test_entries_expire():
+    """Entries expire after the TTL and with the token."""
+    cache = watching_cache(ttl=0)
+    cache.put(TOKEN, "user-1", AUTH)
+    assert cache.get(TOKEN) is None
+
+    cache = watching_cache(ttl=300)
+    cache.put(TOKEN, "user-1", AUTH, token_expires=time.time() - 1)
+    assert cache.get(TOKEN) is None
+
+
+def test_least_recently_used_is_evicted():
+    """The least recently used token is dropped when the cache is full."""
+    cache = watching_cache(max_size=2)
+    cache.put("a", "user-a", AUTH)
+    cache.put("b", "user-b", AUTH)
+    cache.get("a")
+    cache.put("c", "user-c", AUTH)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_invalidate_drops_tokens_and_keys():
+    """Invalidating a user drops every token and the decrypted key."""
+    cache = watching_cache()
+    cache.put(TOKEN, "user-1", AUTH)
+    cache.put("other-token", "user-1", AUTH)
+    cache.put_key("user-1", "key")
+    assert cache.get_key("user-1") == "key"
+    cache.invalidate("user-1")
+    assert cache.get(TOKEN) is None
+    assert cache.get("other-token") is None
+    assert cache.get_key("user-1") is None
+
+
+def test_key_cache_can_be_disabled():
+    """A key_ttl of 0 disables caching of decrypted keys."""
+    cache = watching_cache(key_ttl=0)
+    cache.put(TOKEN, "user-1", AUTH)
+    cache.put_key("user-1", "key")
+    assert cache.get_key("user-1") is None
+
+
+class FakeFeed:
+    """Changefeed cursor that yields the given changes, then blocks."""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.blocked = asyncio.Event()
+
+    async def fetch_next(self):
+        """Mirror rethinkdb Cursor.fetch_next"""
+        if not self.changes:
+            self.blocked.set()
+            await asyncio.Event().wait()
+        return True
+
+    async def next(self):
+        """Mirror rethinkdb Cursor.next"""
+        return self.changes.pop(0)
+
+
+class FakeConnection:
+    """Connection whose queries all return the given cursor."""
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.closed = False
+
+    async def _start(self, term, **global_optargs):
+        return self.feed
+
+    async def close(self, noreply_wait=False):
+        """Mirror rethinkdb Connection.close"""
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_changefeed_invalidates_users():
+    """Auth table changes evict the changed user's entries."""
+    cache = AuthCache()
+    feed = FakeFeed([{"old_val": {"next_id": "user-1"}, "new_val": None}])
+    conn = FakeConnection(feed)
+
+    async def connect():
+        cache.put(TOKEN, "user-1", AUTH)
+        return conn
+
+    watcher = asyncio.ensure_future(cache.watch(connect=connect))
+    await asyncio.wait_for(feed.blocked.wait(), 1)
+    assert cache.watching
+    assert cache.metrics()["invalidations"] == 1
+
+    cache.put(TOKEN, "user-1", AUTH)
+    watcher.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await watcher
+    assert not cache.watching
+    assert cache.metrics()["size"] == 0
+    assert conn.closed
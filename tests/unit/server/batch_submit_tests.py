@@ -0,0 +1,80 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for submitting batch lists to the validator"""
+import pytest
+from sawtooth_sdk.protobuf import batch_pb2
+from sawtooth_sdk.protobuf import client_batch_submit_pb2
+
+from rbac.server.api.errors import ApiBadRequest
+from rbac.server.api.utils import send, send_batches
+
+SUBMIT = client_batch_submit_pb2.ClientBatchSubmitResponse
+STATUS = client_batch_submit_pb2.ClientBatchStatusResponse
+BATCH_STATUS = client_batch_submit_pb2.ClientBatchStatus
+
+
+class Response:
+    """Stand-in for a validator response message"""
+
+    def __init__(self, message):
+        self.content = message.SerializeToString()
+
+
+class Connection:
+    """Answers the submit and status requests with fixed responses"""
+
+    def __init__(self, submit_status, batch_status=BATCH_STATUS.COMMITTED):
+        self.responses = [
+            SUBMIT(status=submit_status),
+            STATUS(
+                status=STATUS.OK,
+                batch_statuses=[BATCH_STATUS(batch_id="b1", status=batch_status)],
+            ),
+        ]
+        self.sent = []
+
+    async def send(self, message_type, content, timeout):
+        """Record a request and return the next response"""
+        self.sent.append(message_type)
+        return Response(self.responses[len(self.sent) - 1])
+
+
+def batch_list():
+    """A batch list of one batch"""
+    return batch_pb2.BatchList(batches=[batch_pb2.Batch(header_signature="b1")])
+
+
+@pytest.mark.asyncio
+async def test_send_and_send_batches_share_submission():
+    """Both senders submit, then wait for the batch statuses"""
+    conn = Connection(SUBMIT.OK)
+    assert await send(conn, batch_list(), 5) == BATCH_STATUS.COMMITTED
+    assert len(conn.sent) == 2
+    conn = Connection(SUBMIT.OK)
+    statuses = await send_batches(conn, batch_list(), 5)
+    assert [status.batch_id for status in statuses] == ["b1"]
+
+
+@pytest.mark.asyncio
+async def test_rejected_submission():
+    """A rejected batch list raises, or returns None to webhooks, without
+    asking for statuses"""
+    with pytest.raises(ApiBadRequest):
+        await send_batches(Connection(SUBMIT.INVALID_BATCH), batch_list(), 5)
+    with pytest.raises(ApiBadRequest):
+        await send(Connection(SUBMIT.INVALID_BATCH), batch_list(), 5)
+    conn = Connection(SUBMIT.QUEUE_FULL)
+    assert await send(conn, batch_list(), 5, webhook=True) is None
+    assert len(conn.sent) == 1
@@ -0,0 +1,131 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/db/changefeeds.py"""
+import asyncio
+import collections
+
+import pytest
+from rethinkdb import ReqlDriverError
+
+from rbac.server.db.changefeeds import follow_changefeed
+
+
+class Feed:
+    """Changefeed cursor that yields the given changes, then blocks."""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.blocked = asyncio.Event()
+
+    async def fetch_next(self):
+        """Mirror rethinkdb Cursor.fetch_next"""
+        if not self.changes:
+            self.blocked.set()
+            await asyncio.Event().wait()
+        return True
+
+    async def next(self):
+        """Mirror rethinkdb Cursor.next"""
+        return self.changes.pop(0)
+
+
+class Connection:
+    """Stand-in for a RethinkDB connection"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self, noreply_wait=True):
+        """Mirror rethinkdb Connection.close"""
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_bad_change_is_skipped():
+    """A change the handler fails on is counted and the feed goes on."""
+    feed = Feed([{"id": "bad"}, {"id": "good"}])
+    conn = Connection()
+    handled = []
+    events = []
+    stats = collections.Counter()
+
+    async def query(_conn):
+        return feed
+
+    async def connect():
+        return conn
+
+    async def on_change(change):
+        if change["id"] == "bad":
+            raise KeyError("name")
+        handled.append(change["id"])
+
+    follower = asyncio.ensure_future(
+        follow_changefeed(
+            query,
+            on_change,
+            on_up=lambda: events.append("up"),
+            on_down=lambda: events.append("down"),
+            connect=connect,
+            stats=stats,
+        )
+    )
+    await asyncio.wait_for(feed.blocked.wait(), 1)
+    assert handled == ["good"]
+    assert stats["errors"] == 1
+    assert events == ["up"]
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    assert events == ["up", "down"]
+    assert conn.closed
+
+
+@pytest.mark.asyncio
+async def test_failed_changefeed_is_reopened():
+    """A changefeed that fails is reopened after waiting retry_delay."""
+    feeds = [ReqlDriverError("connection lost"), Feed([{"id": "1"}])]
+    handled = []
+    waits = []
+
+    async def query(_conn):
+        feed = feeds.pop(0)
+        if isinstance(feed, Exception):
+            raise feed
+        return feed
+
+    async def connect():
+        return Connection()
+
+    async def wait(delay):
+        waits.append(delay)
+
+    follower = asyncio.ensure_future(
+        follow_changefeed(
+            query,
+            lambda change: handled.append(change["id"]),
+            wait=wait,
+            connect=connect,
+            retry_delay=3,
+        )
+    )
+    for _ in range(100):
+        if handled:
+            break
+        await asyncio.sleep(0.01)
+    follower.cancel()
+    assert handled == ["1"]
+    assert waits == [3]
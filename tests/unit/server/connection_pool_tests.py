@@ -0,0 +1,136 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/db/connection_pool.py"""
+import asyncio
+
+import pytest
+from rethinkdb import ReqlDriverError
+
+from rbac.server.db.connection_pool import ConnectionPool
+
+
+class FakeConnection:
+    """Stand-in for an asyncio RethinkDB connection."""
+
+    def __init__(self):
+        self.open = True
+        self.pings = 0
+
+    def is_open(self):
+        """Mirror rethinkdb Connection.is_open"""
+        return self.open
+
+    async def close(self, noreply_wait=False):
+        """Mirror rethinkdb Connection.close"""
+        self.open = False
+
+    async def _start(self, term, **global_optargs):
+        self.pings += 1
+        if not self.open:
+            raise ReqlDriverError("Connection is closed.")
+        return 1
+
+
+def fake_pool(**kwargs):
+    """Create a pool that hands out FakeConnections."""
+    created = []
+
+    async def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect=connect, **kwargs), created
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused():
+    """Releasing a connection makes it available to the next caller."""
+    pool, created = fake_pool()
+    async with pool.acquire() as first:
+        pass
+    async with pool.acquire() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.metrics()["acquired"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded():
+    """Callers beyond max_size wait for a connection to be released."""
+    pool, created = fake_pool(max_size=2)
+    release = asyncio.Event()
+
+    async def hold():
+        async with pool.acquire():
+            await release.wait()
+
+    tasks = [asyncio.ensure_future(hold()) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert pool.metrics()["in_use"] == 2
+    release.set()
+    await asyncio.gather(*tasks)
+    assert len(created) == 2
+    assert pool.metrics()["waited"] == 2
+    assert pool.metrics()["idle"] == 2
+
+
+@pytest.mark.asyncio
+async def test_driver_error_discards_connection():
+    """A connection that raised a driver error is not returned to the pool."""
+    pool, created = fake_pool()
+    with pytest.raises(ReqlDriverError):
+        async with pool.acquire():
+            raise ReqlDriverError("Connection is closed.")
+    assert pool.size == 0
+    async with pool.acquire():
+        pass
+    assert len(created) == 2
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_connection_is_replaced():
+    """Closed idle connections fail their health check and are replaced."""
+    pool, created = fake_pool(health_check_interval=0)
+    async with pool.acquire() as conn:
+        pass
+    conn.open = False
+    async with pool.acquire() as replacement:
+        pass
+    assert replacement is not conn
+    assert len(created) == 2
+    assert pool.metrics()["health_check_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_connections_are_evicted():
+    """Connections idle longer than max_idle are closed."""
+    pool, created = fake_pool(max_idle=0)
+    async with pool.acquire():
+        pass
+    await pool.evict_idle()
+    assert pool.metrics()["evicted"] == 1
+    assert not created[0].is_open()
+
+
+@pytest.mark.asyncio
+async def test_closed_pool_refuses_acquire():
+    """Acquiring from a closed pool raises a driver error."""
+    pool, _ = fake_pool()
+    await pool.close()
+    with pytest.raises(ReqlDriverError):
+        async with pool.acquire():
+            pass
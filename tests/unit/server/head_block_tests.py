@@ -0,0 +1,85 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/api/head_block.py"""
+from rbac.server.api.head_block import HeadBlockTracker, format_block
+
+
+def block_row(num, fork=""):
+    """Make a blocks table row, on a fork if given."""
+    return {
+        "block_id": "block-{}{}".format(num, fork),
+        "block_num": num,
+        "previous_block_id": "block-{}".format(num - 1),
+    }
+
+
+def test_changefeed_moves_head():
+    """New blocks from the changefeed become the head and are cached."""
+    tracker = HeadBlockTracker()
+    tracker.watching = True
+    tracker._apply_change({"new_val": block_row(1)})
+    tracker._apply_change({"old_val": block_row(1), "new_val": block_row(2)})
+    head = tracker.get_head()
+    assert head["id"] == "block-2"
+    assert head["num"] == 2
+    assert "block_id" not in head
+    assert tracker.get_block("block-1")["num"] == 1
+
+
+def test_fork_drops_block():
+    """A head replaced by a lower block was dropped by a fork."""
+    tracker = HeadBlockTracker()
+    tracker.watching = True
+    tracker._apply_change({"new_val": block_row(5)})
+    tracker._apply_change({"old_val": block_row(5), "new_val": block_row(4)})
+    assert tracker.get_head()["num"] == 4
+    assert tracker.get_block("block-5") is None
+
+
+def test_fork_at_same_height_drops_block():
+    """A head replaced at the same height is evicted, with every block
+    cached above the new head."""
+    tracker = HeadBlockTracker()
+    tracker.watching = True
+    for num in range(1, 6):
+        tracker.put_block(format_block(block_row(num)))
+    tracker._apply_change({"new_val": block_row(5)})
+    tracker._apply_change({"old_val": block_row(5), "new_val": block_row(3, "b")})
+    assert tracker.get_head()["id"] == "block-3b"
+    for num in (3, 4, 5):
+        assert tracker.get_block("block-{}".format(num)) is None
+    assert tracker.get_block("block-2")["num"] == 2
+    tracker._apply_change({"old_val": block_row(3, "b"), "new_val": block_row(3, "c")})
+    assert tracker.get_block("block-3b") is None
+    assert tracker.get_head()["id"] == "block-3c"
+
+
+def test_stale_head_is_not_trusted():
+    """Without the changefeed, a head older than two polls is ignored."""
+    tracker = HeadBlockTracker(poll_interval=0)
+    tracker.set_head(format_block(block_row(1)))
+    assert tracker.get_head() is None
+    tracker.poll_interval = 60
+    assert tracker.get_head()["num"] == 1
+
+
+def test_blocks_are_bounded():
+    """Only the most recently used max_blocks blocks are kept."""
+    tracker = HeadBlockTracker(max_blocks=2)
+    for num in range(1, 4):
+        tracker.put_block(format_block(block_row(num)))
+    assert tracker.get_block("block-1") is None
+    assert tracker.get_block("block-3")["num"] == 3
+    assert tracker.metrics()["blocks"] == 2
@@ -0,0 +1,73 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/db/index_migrations.py"""
+import pytest
+from rethinkdb import ReqlOpFailedError
+
+from rbac.server.db import index_migrations
+from rbac.server.db.index_migrations import MIGRATIONS, REQUIRED_INDEXES
+
+
+def test_migration_versions_increase():
+    """Migration versions must be unique and applied in ascending order."""
+    versions = [version for version, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+
+def test_required_indexes_are_unique():
+    """An index must only be created once, either by setup_db or a migration."""
+    names = [(index.table, index.name) for index in REQUIRED_INDEXES]
+    assert len(names) == len(set(names))
+
+
+def test_compound_indexes_have_fields():
+    """Compound indexes list at least two fields and are not multi indexes."""
+    for index in REQUIRED_INDEXES:
+        if index.fields:
+            assert len(index.fields) > 1
+            assert not index.multi
+
+
+def checks(*outcomes):
+    """Make a check_indexes that returns or raises each outcome in turn."""
+    calls = []
+
+    async def check(_conn):
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return check, calls
+
+
+@pytest.mark.asyncio
+async def test_wait_for_indexes_until_migrated(monkeypatch):
+    """A missing database or missing indexes are waited for."""
+    check, calls = checks(ReqlOpFailedError("no database"), ["users.remote_id"], [])
+    monkeypatch.setattr(index_migrations, "check_indexes", check)
+    assert await index_migrations.wait_for_indexes(None, 10, delay=0) == []
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_wait_for_indexes_gives_up(monkeypatch):
+    """Still missing indexes are returned at the deadline instead of raised."""
+    check, _ = checks(ReqlOpFailedError("no database"))
+    monkeypatch.setattr(index_migrations, "check_indexes", check)
+    missing = await index_migrations.wait_for_indexes(None, 0, delay=0)
+    assert len(missing) == len(REQUIRED_INDEXES)
@@ -0,0 +1,119 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for batched manager chain and approver resolution"""
+import pytest
+
+from rbac.server.api import proposals
+from rbac.server.db import users_query
+
+# user -> manager, a chain seven managers high plus a separate pair
+ORG_CHART = {"user{}".format(i): "user{}".format(i + 1) for i in range(7)}
+ORG_CHART["other"] = "user3"
+
+
+def patch_managers(monkeypatch):
+    """Answer fetch_managers from ORG_CHART, recording each batch asked for"""
+    batches = []
+
+    async def fetch_managers(conn, next_ids):
+        batches.append(set(next_ids))
+        return {
+            next_id: ORG_CHART[next_id] for next_id in next_ids if next_id in ORG_CHART
+        }
+
+    monkeypatch.setattr(users_query, "fetch_managers", fetch_managers)
+    return batches
+
+
+def test_first_managers():
+    """The first record of a user decides its manager"""
+    assert users_query.first_managers(
+        [
+            {"next_id": "a", "managers": ["m1", "m2"]},
+            {"next_id": "b", "managers": []},
+            {"next_id": "a", "managers": ["m3"]},
+            {"next_id": "b", "managers": ["m4"]},
+        ]
+    ) == {"a": "m1"}
+
+
+@pytest.mark.asyncio
+async def test_manager_chains(monkeypatch):
+    """Chains are at most five high and resolved one level per query"""
+    batches = patch_managers(monkeypatch)
+    chains = await users_query.fetch_manager_chains(
+        None, ["user0", "user5", "other", "unknown"]
+    )
+    assert chains == {
+        "user0": ["user1", "user2", "user3", "user4", "user5"],
+        "user5": ["user6", "user7"],
+        "other": ["user3", "user4", "user5", "user6", "user7"],
+        "unknown": [],
+    }
+    assert len(batches) == 5
+    assert batches[0] == {"user0", "user5", "other", "unknown"}
+    assert await users_query.fetch_manager_chain(None, "user6") == ["user7"]
+
+
+class Query:
+    """Stand-in for a ReQL query"""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def run(self, conn):
+        """Return the canned result"""
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_compile_proposal_resources(monkeypatch):
+    """Approvers are the managers of each approver and then the approvers"""
+    patch_managers(monkeypatch)
+    monkeypatch.setattr(
+        proposals, "fetch_manager_chains", users_query.fetch_manager_chains
+    )
+    queried = []
+
+    def fetch_relationships_bulk(table, index, identifiers):
+        queried.append((table, index, set(identifiers)))
+        return Query(
+            [
+                {"role_id": "role1", "identifiers": ["user5", "other"]},
+                {"role_id": "role2", "identifiers": ["user6"]},
+            ]
+        )
+
+    async def get_next_admins(conn):
+        return ["admin"]
+
+    monkeypatch.setattr(proposals, "fetch_relationships_bulk", fetch_relationships_bulk)
+    monkeypatch.setattr(proposals, "get_next_admins", get_next_admins)
+    resources = await proposals.compile_proposal_resources(
+        None,
+        [
+            {"type": "ADD_ROLE_MEMBER", "object": "role1"},
+            {"type": "ADD_ROLE_OWNER", "object": "role2"},
+            {"type": "UPDATE_USER_MANAGER", "object": "user0"},
+            {"type": "ADD_ROLE_MEMBER", "object": "role3"},
+        ],
+    )
+    assert queried == [("role_owners", "role_id", {"role1", "role2", "role3"})]
+    assert [resource["approvers"] for resource in resources] == [
+        ["user6", "user7", "user3", "user4", "user5", "other"],
+        ["user7", "user6"],
+        ["admin"],
+        [],
+    ]
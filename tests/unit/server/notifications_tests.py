@@ -0,0 +1,164 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/api/notifications.py"""
+import asyncio
+
+import pytest
+from rethinkdb import ReqlOpFailedError
+
+from rbac.server.api import notifications
+
+
+class FakeTable:
+    """Records the batches inserted into the notifications table"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.batches = []
+
+    async def insert(self, rows):
+        """Insert a batch of rows"""
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        """Every row inserted, in order"""
+        return [row for batch in self.batches for row in batch]
+
+
+@pytest.mark.asyncio
+async def test_batches_by_size():
+    """A full batch is written without waiting for the flush interval"""
+    table = FakeTable()
+    writer = notifications.NotificationWriter(
+        max_batch=10, flush_interval=60, insert=table.insert
+    )
+    writer.start()
+    for i in range(25):
+        await writer.put(i)
+    await asyncio.sleep(0.05)
+    assert [len(batch) for batch in table.batches] == [10, 10]
+    await writer.close()
+    assert table.rows == list(range(25))
+
+
+@pytest.mark.asyncio
+async def test_batches_by_time():
+    """A partial batch is written once the flush interval passes"""
+    table = FakeTable()
+    writer = notifications.NotificationWriter(
+        max_batch=100, flush_interval=0.02, insert=table.insert
+    )
+    writer.start()
+    for i in range(3):
+        await writer.put(i)
+    await asyncio.sleep(0.1)
+    assert table.batches == [[0, 1, 2]]
+    assert writer.running
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_backpressure():
+    """Enqueuing waits while the queue is full instead of growing it"""
+    table = FakeTable(delay=0.01)
+    writer = notifications.NotificationWriter(
+        max_batch=5, flush_interval=0, max_queue=5, insert=table.insert
+    )
+    writer.start()
+    for i in range(50):
+        await writer.put(i)
+        assert writer.metrics()["queue"] <= 5
+    await writer.close()
+    assert table.rows == list(range(50))
+    assert writer.metrics()["waits"] > 0
+
+
+@pytest.mark.asyncio
+async def test_restart_loses_nothing():
+    """Closing flushes queued rows, and a new writer carries on after it"""
+    table = FakeTable(delay=0.001)
+    writer = notifications.open_writer(
+        max_batch=7, flush_interval=60, insert=table.insert
+    )
+    for i in range(100):
+        await writer.put(i)
+    await writer.close()
+    assert not writer.running
+    with pytest.raises(RuntimeError):
+        await writer.put(100)
+
+    writer = notifications.open_writer(
+        max_batch=7, flush_interval=60, insert=table.insert
+    )
+    assert notifications.get_writer() is writer
+    for i in range(100, 150):
+        await writer.put(i)
+    await writer.close()
+    assert table.rows == list(range(150))
+    assert writer.metrics()["written"] == 50
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_is_dropped():
+    """A batch the database rejects is counted and does not stop the writer"""
+
+    async def insert(rows):
+        if 0 in rows:
+            raise ReqlOpFailedError("table unavailable")
+
+    writer = notifications.NotificationWriter(
+        max_batch=2, flush_interval=60, insert=insert
+    )
+    writer.start()
+    for i in range(4):
+        await writer.put(i)
+    await writer.close()
+    assert writer.metrics()["dropped"] == 2
+    assert writer.metrics()["written"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unexpected_insert_error_is_dropped():
+    """Any insert error is counted as dropped rather than ending the flusher"""
+
+    async def insert(rows):
+        if 0 in rows:
+            raise TypeError("not serializable")
+
+    writer = notifications.NotificationWriter(
+        max_batch=2, flush_interval=60, insert=insert
+    )
+    writer.start()
+    for i in range(4):
+        await writer.put(i)
+    await writer.close()
+    assert writer.metrics()["dropped"] == 2
+    assert writer.metrics()["written"] == 2
+
+
+@pytest.mark.asyncio
+async def test_close_does_not_wait_on_a_dead_flusher():
+    """Closing returns even if the flusher stopped with rows queued"""
+    writer = notifications.NotificationWriter(
+        max_batch=10, flush_interval=60, insert=FakeTable().insert
+    )
+    writer.start()
+    writer._flusher.cancel()  # pylint: disable=protected-access
+    await asyncio.sleep(0)
+    assert not writer.running
+    writer._queue.put_nowait(0)  # pylint: disable=protected-access
+    await asyncio.wait_for(writer.close(), 1)
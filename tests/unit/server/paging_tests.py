@@ -0,0 +1,81 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for keyset paging cursors and cached table counts"""
+import pytest
+
+from rbac.server.api.errors import ApiBadRequest
+from rbac.server.api.table_counts import TableCounts
+from rbac.server.api.utils import decode_cursor, encode_cursor, get_request_cursor
+
+
+class Request:
+    """Stand-in for a sanic request with query arguments"""
+
+    def __init__(self, **args):
+        self.args = {key: [value] for key, value in args.items()}
+
+
+def test_cursor_round_trip():
+    """Cursors are opaque and decode to the sort key they were made from"""
+    key = ["Jane Doe", "a1b2c3"]
+    cursor = encode_cursor(key)
+    assert "Jane" not in cursor
+    assert decode_cursor(cursor) == key
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor("a string"),
+        encode_cursor(["Jane Doe"]),
+        encode_cursor(["Jane Doe", "a1b2c3", "extra"]),
+        encode_cursor(["Jane Doe", 7]),
+        encode_cursor([["Jane Doe"], "a1b2c3"]),
+    ],
+)
+def test_invalid_cursor(cursor):
+    """Malformed cursors are bad requests"""
+    with pytest.raises(ApiBadRequest):
+        decode_cursor(cursor, 2)
+
+
+def test_request_cursor():
+    """Requests are keyset paged if they have a cursor argument"""
+    assert get_request_cursor(Request(start="100")) == (False, None)
+    assert get_request_cursor(Request(cursor="")) == (True, None)
+    assert get_request_cursor(Request(cursor=encode_cursor(["r1"])), 1) == (
+        True,
+        ["r1"],
+    )
+    with pytest.raises(ApiBadRequest):
+        get_request_cursor(Request(cursor=encode_cursor(["r1", "r2"])), 1)
+
+
+def test_table_counts():
+    """Counts are only trusted while their table is followed"""
+    counts = TableCounts()
+    assert counts.get("users") is None
+    counts._counts["users"] = 10  # pylint: disable=protected-access
+    counts._live.add("users")  # pylint: disable=protected-access
+    counts.apply_delta("users", 1)
+    counts.apply_delta("users", -1)
+    counts.apply_delta("users", 1)
+    assert counts.get("users") == 11
+    counts.close()
+    assert counts.get("users") is None
+    assert counts.metrics()["hits"] == 1
+    assert counts.metrics()["misses"] == 2
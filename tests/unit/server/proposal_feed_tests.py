@@ -0,0 +1,175 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/api/feed.py"""
+import asyncio
+import json
+
+import pytest
+
+from rbac.server.api import feed
+
+
+class FakeServer:
+    """Records the room changes and emits of a socketio server"""
+
+    def __init__(self):
+        self.rooms = {}
+        self.emitted = []
+
+    def enter_room(self, sid, room):
+        """Put a socket in a room"""
+        self.rooms.setdefault(room, set()).add(sid)
+
+    def leave_room(self, sid, room):
+        """Take a socket out of a room"""
+        self.rooms[room].discard(sid)
+
+    async def emit(self, event, data, room=None):
+        """Record an emit"""
+        self.emitted.append((event, room, json.loads(data)))
+
+
+class Acquire:
+    """Stand-in for connection_pool.acquire"""
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *args):
+        return False
+
+
+@pytest.fixture
+def proposal_feed(monkeypatch):
+    """A feed whose proposals compile to fixed approvers"""
+
+    async def compile_proposal_resource(conn, proposal):
+        proposal["approvers"] = ["owner", "manager"]
+        return proposal
+
+    monkeypatch.setattr(feed, "compile_proposal_resource", compile_proposal_resource)
+    monkeypatch.setattr(feed, "acquire", Acquire)
+    return feed.ProposalFeed(FakeServer())
+
+
+def test_subscriptions(proposal_feed):
+    """Sockets move between rooms without leaking subscriptions"""
+    proposal_feed.subscribe("sid1", "owner")
+    proposal_feed.subscribe("sid2", "owner")
+    proposal_feed.subscribe("sid2", "opener")
+    assert proposal_feed.sio.rooms == {
+        feed.user_room("owner"): {"sid1"},
+        feed.user_room("opener"): {"sid2"},
+    }
+    proposal_feed.unsubscribe("sid1")
+    proposal_feed.unsubscribe("sid2")
+    proposal_feed.unsubscribe("unknown")
+    assert proposal_feed.metrics()["sockets"] == 0
+    assert proposal_feed.metrics()["users"] == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_to_rooms(proposal_feed):
+    """Changes are only emitted to the rooms of subscribed users"""
+    proposal_feed.subscribe("sid1", "owner")
+    proposal_feed.subscribe("sid2", "opener")
+    proposal_feed.subscribe("sid3", "bystander")
+    await proposal_feed.dispatch({"id": "p1", "status": "OPEN", "opener": "opener"})
+    await proposal_feed.dispatch(
+        {"id": "p2", "status": "CONFIRMED", "opener": "opener"}
+    )
+    await proposal_feed.dispatch(None)
+    assert [(room, list(data)) for _, room, data in proposal_feed.sio.emitted] == [
+        (feed.user_room("owner"), ["open_proposal"]),
+        (feed.user_room("opener"), ["user_proposal"]),
+        (feed.user_room("opener"), ["user_proposal"]),
+    ]
+    assert proposal_feed.metrics()["changes"] == 2
+
+
+def test_feed_messages():
+    """Open proposals go to approvers and assigned approvers once each"""
+    messages = feed.feed_messages(
+        {
+            "status": "OPEN",
+            "approvers": ["a", "b"],
+            "assigned_approver": ["b", "c"],
+            "opener": "d",
+        }
+    )
+    assert [next_id for next_id, _ in messages] == ["a", "b", "c", "d"]
+
+
+class Subscription:
+    """Stand-in for a changefeed cursor over fixed changes"""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    async def fetch_next(self):
+        """Wait forever once the changes are consumed"""
+        if not self.changes:
+            await asyncio.sleep(60)
+        return True
+
+    async def next(self):
+        """The next change"""
+        return self.changes.pop(0)
+
+
+class Connection:
+    """Stand-in for a RethinkDB connection"""
+
+    async def close(self, noreply_wait=True):
+        """Close the connection"""
+
+
+@pytest.mark.asyncio
+async def test_watch_survives_dispatch_errors(proposal_feed, monkeypatch):
+    """A proposal that fails to compile or emit doesn't stop the feed"""
+    compile_proposal_resource = feed.compile_proposal_resource
+
+    async def flaky_compile(conn, proposal):
+        if proposal["id"] == "bad":
+            raise KeyError("opener")
+        return await compile_proposal_resource(conn, proposal)
+
+    async def subscribe_to_proposals(conn):
+        return Subscription(
+            [
+                {"new_val": {"id": "bad", "status": "OPEN", "opener": "opener"}},
+                {"new_val": {"id": "p1", "status": "OPEN", "opener": "opener"}},
+            ]
+        )
+
+    async def connect():
+        return Connection()
+
+    monkeypatch.setattr(feed, "compile_proposal_resource", flaky_compile)
+    monkeypatch.setattr(
+        feed.proposals_query, "subscribe_to_proposals", subscribe_to_proposals
+    )
+    proposal_feed.subscribe("sid1", "owner")
+    task = asyncio.ensure_future(proposal_feed.watch(connect=connect))
+    for _ in range(100):
+        if proposal_feed.sio.emitted:
+            break
+        await asyncio.sleep(0.01)
+    assert proposal_feed.watching
+    task.cancel()
+    assert proposal_feed.metrics()["errors"] == 1
+    assert [
+        data["open_proposal"]["id"] for _, _, data in proposal_feed.sio.emitted
+    ] == ["p1"]
@@ -0,0 +1,56 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for the batch update of proposals in rbac/server/api/proposals.py"""
+import pytest
+
+from rbac.common.crypto.keys import Key
+from rbac.common.crypto.hash import unique_id
+from rbac.server.api.proposals import make_proposal_updates
+
+
+def make_proposal(proposal_type="ADD_ROLE_MEMBER"):
+    """Make a proposal resource as fetch_proposal_resources returns it"""
+    return {
+        "id": unique_id(),
+        "type": proposal_type,
+        "object": unique_id(),
+        "target": unique_id(),
+    }
+
+
+@pytest.mark.asyncio
+async def test_batch_per_proposal():
+    """Each proposal gets its own batch in one batch list"""
+    proposals = [make_proposal(), make_proposal("ADD_ROLE_OWNER"), make_proposal()]
+    batch_list, batch_proposal_ids, errors = await make_proposal_updates(
+        proposals, "APPROVED", "reason", Key(), unique_id()
+    )
+    assert not errors
+    assert len(batch_list.batches) == 3
+    assert [
+        batch_proposal_ids[batch.header_signature] for batch in batch_list.batches
+    ] == [proposal["id"] for proposal in proposals]
+    assert all(len(batch.transactions) == 1 for batch in batch_list.batches)
+
+
+@pytest.mark.asyncio
+async def test_no_proposals():
+    """No proposals make an empty batch list"""
+    batch_list, batch_proposal_ids, errors = await make_proposal_updates(
+        [], "REJECTED", "reason", Key(), unique_id()
+    )
+    assert not batch_list.batches
+    assert not batch_proposal_ids
+    assert not errors
@@ -21,19 +21,22 @@ ROLE_RELATIONSHIP_CASES = [
     (
         "admins",
         "158fa3c5-5d73-4dbf-9426-84e8b090efd6",
-        "r.table(role_admins).filter({{role_id: 158fa3c5-5d73-4dbf-9426-84e8b090efd6}})"
+        "r.table(role_admins)"
+        ".get_all(158fa3c5-5d73-4dbf-9426-84e8b090efd6, index=role_id)"
         ".get_field(related_id).coerce_to(array)",
     ),
     (
         "owners",
         "158fa3c5-5d73-4dbf-9426-84e8b090efd6",
-        "r.table(role_owners).filter({{role_id: 158fa3c5-5d73-4dbf-9426-84e8b090efd6}})"
+        "r.table(role_owners)"
+        ".get_all(158fa3c5-5d73-4dbf-9426-84e8b090efd6, index=role_id)"
         ".get_field(related_id).coerce_to(array)",
     ),
     (
         "members",
         "158fa3c5-5d73-4dbf-9426-84e8b090efd6",
-        "r.table(role_members).filter({{role_id: 158fa3c5-5d73-4dbf-9426-84e8b090efd6}})"
+        "r.table(role_members)"
+        ".get_all(158fa3c5-5d73-4dbf-9426-84e8b090efd6, index=role_id)"
         ".get_field(related_id).coerce_to(array)",
     ),
 ]
@@ -0,0 +1,84 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/db/retry.py"""
+import pytest
+from rethinkdb import ReqlQueryLogicError
+
+from rbac.server.db.retry import backoff_delay, retry, retry_metrics
+
+
+def attempts(*outcomes):
+    """Make a retryable function that returns or raises each outcome in turn."""
+    calls = []
+
+    async def attempt():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return attempt, calls
+
+
+@pytest.mark.asyncio
+async def test_retries_until_success():
+    """Retried exceptions are retried and counted."""
+    func, calls = attempts(
+        ReqlQueryLogicError("empty"), ReqlQueryLogicError("empty"), 1
+    )
+    before = retry_metrics().get("test_success_retry_count", 0)
+    result = await retry(
+        func, retry_on=(ReqlQueryLogicError,), base_delay=0, name="test_success"
+    )
+    assert result == 1
+    assert len(calls) == 3
+    assert retry_metrics()["test_success_retry_count"] == before + 2
+
+
+@pytest.mark.asyncio
+async def test_last_error_is_raised():
+    """The last exception is raised once the tries are used up."""
+    func, calls = attempts(*[ReqlQueryLogicError(str(i)) for i in range(3)])
+    with pytest.raises(ReqlQueryLogicError, match="2"):
+        await retry(func, retry_on=(ReqlQueryLogicError,), tries=3, base_delay=0)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    """Exceptions not in retry_on propagate immediately."""
+    func, calls = attempts(ValueError("bad"), 1)
+    with pytest.raises(ValueError):
+        await retry(func, retry_on=(ReqlQueryLogicError,), base_delay=0)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_until_and_deadline():
+    """Results are retried until accepted, and not past the deadline."""
+    func, calls = attempts([], [], ["found"])
+    assert await retry(func, until=bool, base_delay=0) == ["found"]
+
+    func, calls = attempts([], [], ["found"])
+    assert await retry(func, until=bool, base_delay=5, max_delay=5, deadline=0) == []
+    assert len(calls) == 1
+
+
+def test_backoff_is_bounded():
+    """Backoff grows exponentially up to max_delay."""
+    for attempt in range(1, 10):
+        delay = backoff_delay(attempt, base_delay=0.1, max_delay=1)
+        assert 0 <= delay <= min(1, 0.1 * 2 ** (attempt - 1))
@@ -0,0 +1,104 @@
+# Copyright 2019 Contributors to Hyperledger Sawtooth
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ------------------------------------------------------------------------------
+"""Unit Tests for rbac/server/api/search_index.py"""
+from re import escape
+
+from rbac.server.api.search_index import SearchIndex, TextIndex
+
+ROLES = [
+    ("r1", "Finance Approvers", "approves finance requests"),
+    ("r2", "finance", "the finance team"),
+    ("r3", "Payroll", "reviews Finance reports"),
+    ("r4", "Engineering", "builds things"),
+]
+
+
+def make_index():
+    """Index the test roles"""
+    index = TextIndex("role_id", ("name", "description"))
+    for role_id, name, description in ROLES:
+        index.put(
+            role_id, {"role_id": role_id, "name": name, "description": description}
+        )
+    return index
+
+
+def test_search_by_name():
+    """Matches ignore case, are sorted by name and counted in full"""
+    results, count = make_index().search("FINANCE", 0, 2)
+    assert count == 3
+    assert [result["id"] for result in results] == ["r1", "r3"]
+    results, count = make_index().search("finance", 2, 4)
+    assert [result["id"] for result in results] == ["r2"]
+
+
+def test_search_by_relevance():
+    """Exact names rank before name prefixes and other fields"""
+    results, _ = make_index().search("finance", 0, 10, rank=True)
+    assert [result["id"] for result in results] == ["r2", "r1", "r3"]
+
+
+def test_short_and_missing_input():
+    """Input shorter than a trigram is still matched as a substring"""
+    assert make_index().search("in", 0, 10)[1] == 4
+    assert make_index().search("nothing like it", 0, 10) == ([], 0)
+
+
+def test_updates_and_removals():
+    """Replacing and removing documents updates the postings"""
+    index = make_index()
+    index.put("r4", {"role_id": "r4", "name": "Finance Engineering"})
+    assert index.search("engineering", 0, 10)[1] == 1
+    assert index.search("finance", 0, 10)[1] == 4
+    index.remove("r4")
+    index.remove("r4")
+    assert index.search("engineering", 0, 10) == ([], 0)
+    assert len(index) == 3
+
+
+def test_search_index_changes(monkeypatch):
+    """Changefeed changes load the index, which is ready once loaded"""
+    monkeypatch.setenv("BLACKLISTED_USER_REGEX", "^admin")
+    index = SearchIndex()
+    index.apply_change("user", {"state": "initializing"})
+    for key, username, email in (
+        ("1", "jane", "jane.doe@example.com"),
+        ("2", "admin1", "admin.doe@example.com"),
+        ("3", None, "john.doe@example.com"),
+    ):
+        user = {"id": key, "next_id": "n" + key, "name": key, "email": email}
+        if username:
+            user["username"] = username
+        index.apply_change("user", {"new_val": user})
+    assert not index.ready("user")
+    index.apply_change("user", {"state": "ready"})
+    assert index.ready("user")
+    assert not index.ready("role")
+
+    results, count = index.search("user", escape("doe@example"), (0, 50))
+    assert count == 1
+    assert results == [{"id": "n1", "name": "1", "email": "jane.doe@example.com"}]
+
+    index.apply_change("user", {"old_val": {"id": "1"}, "new_val": None})
+    assert index.search("user", escape("doe@example"), (0, 50)) == ([], 0)
+
+
+def test_pack_and_role_input_is_sanitized():
+    """Packs and roles are searched with special characters as spaces"""
+    index = SearchIndex()
+    index.apply_change(
+        "role", {"new_val": {"id": "1", "role_id": "r1", "name": "Tier 1 Support"}}
+    )
+    assert index.search("role", escape("tier-1"), (0, 50))[1] == 1